@@ -8,6 +8,8 @@ from abc import ABC, abstractmethod
 import ctypes
 import os
 import argparse
+import threading
+import traceback
 
 
 import tkinter
@@ -18,7 +20,8 @@ from tkinter.font import Font
 
 from model import (
     _ConfigField, _PeriodeField, _UpdatedTarget, _TimeFrame, _TimeFrame_literals, 
-    FullDatas, Periode, TimeTarget, _TimeID, PeriodesStorage, Activity, NoHistoryError,
+    FullDatas, DatasSnapshot, Periode, TimeTarget, _TimeID, PeriodesStorageView, Activity, NoHistoryError,
+    HistoryNodeInfos, 
     prettyTimedelta, datetimeToText, datetimeFromText, prettyDatetime, timedeltaFromText,
     prettyTimeFrame, timeFrameToText, timeFrameFromText, 
 )
@@ -27,6 +30,9 @@ from utils import (
     _UpdatedALLTarget, _SaveResponse, _ActivityColumn,
 )
 from generateScheduleView import drawSchedule
+from binarySaveFormat import BINARY_FILE_EXTENSION
+from shardedSave import SHARDED_EXTENSION, isShardedPath
+from compressedSave import GZIP_EXTENSION, XZ_EXTENSION
 from projectPaths import (
     DATAS_DIRECTORY, ICON_PATH, LOGGS_FILE_PATH,
     SCHEDULES_DIRECTORY, FILE_ENCODING, )
@@ -77,8 +83,12 @@ _T_TableElement = TypeVar("_T_TableElement", Activity, Periode)
 #   - <activity1>: ... 
 #   - <activity2>: ... etc
 
-DATAS_FILE_TYPES: "list[tuple[str, str]]" = [("JSON", ".json"), ]
-"""the file types that are accepted for the datas: [(name, .extention), ...]"""
+DATAS_FILE_TYPES: "list[tuple[str, str]]" = [
+    ("JSON", ".json"), ("compressed JSON (gzip)", ".json" + GZIP_EXTENSION), 
+    ("compressed JSON (xz)", ".json" + XZ_EXTENSION), 
+    ("binary", BINARY_FILE_EXTENSION), ("sharded", SHARDED_EXTENSION), ]
+"""the file types that are accepted for the datas: [(name, .extention), ...]\n
+the sharded datas are opened with their manifest (see shardedSave.MANIFEST_NAME)"""
 SCHEDULE_FILE_TYPES: "list[tuple[str, str]]" = [
     ("SVG", ".svg"), ("HTML", ".html")]
 
@@ -94,11 +104,46 @@ def getSelectedTimeInterval(startIntervalText:str, endIntervalText:str, datas:"F
         endTime=(allPeriodesInterval.endTime if endIntervalText == "all"
                     else datetimeFromText(endIntervalText)))
 
+class BackgroundSave():
+    """write a snapshot of the datas on a worker thread\n
+    the thread never touch the datas nor tkinter, the app poll it and 
+    mark the snapshot as saved when it finished (see App.safeSaveToFile)"""
+    POLLING_DELAY: int = 50
+    """the delay (in ms) between two checks of the tkinter loop"""
+    
+    def __init__(self, datas:"FullDatas", snapshot:"DatasSnapshot", filePath:"Path") -> None:
+        self.datas: "FullDatas" = datas
+        self.snapshot: "DatasSnapshot" = snapshot
+        self.filePath: "Path" = filePath
+        self.__error: "BaseException|None" = None
+        # not a daemon: the app must not exit while the file is being written
+        self.__thread = threading.Thread(target=self.__run, name="background save", daemon=False)
+        self.__thread.start()
+    
+    def __run(self)->None:
+        try: self.snapshot.saveToPath(self.filePath)
+        except BaseException as err:
+            self.__error = err
+    
+    def isRunning(self)->bool:
+        return self.__thread.is_alive()
+    
+    def join(self)->None:
+        self.__thread.join()
+    
+    def getError(self)->"BaseException|None":
+        """the error raised by the save (only valide once it finished)"""
+        return self.__error
+
+
 class App():
     datas: FullDatas
     tkinterRoot: "MainFrame"
+    backgroundSave: "BackgroundSave|None"
+    """the save currently running on a worker thread (None -> no save running)"""
     
     def __init__(self, args:"Args") -> None:
+        self.backgroundSave = None
         if args["openDatasPath"] is None:
             self.datas = FullDatas.create_empty()
         else: # => path to load is given
@@ -141,6 +186,7 @@ class App():
     
     def askToSave(self)->"_SaveResponse":
         """ask the app tho save the datas if needed"""
+        self.waitBackgroundSave()
         if self.datas.isSaved() is True:
             return "done"
         # ask to save it
@@ -161,28 +207,72 @@ class App():
             return "canceled" # abort closing the app
         else: raise ValueError(f"invalide response: {response}")
     
-    def safeSaveToFile(self, datas:"None|FullDatas", filePath:"Path")->"Literal[True]":
+    def safeSaveToFile(self, datas:"None|FullDatas", filePath:"Path", background:bool=False)->bool:
         """to save the datas in a safe way in the file at the given path\n
-        None => use the datas of the app"""
-        # backup tyhe content to avoid loosing the datas
+        None => use the datas of the app\n
+        `background` -> the snapshot of the datas is written on a worker thread (the app stay usable), 
+        return False when it can't be started (an other save is running)"""
         if datas is None: 
             datas = self.datas
-        if filePath.exists():
-            with open(filePath, mode="rb") as file:
-                backupRawContent: bytes = file.read()
-        else: backupRawContent = bytes()
-        try:
-            with open(filePath, mode="w", encoding=FILE_ENCODING) as file:
-                datas.saveToFile(file)
-        except Exception as err: # rewrite the backup content
-            with open(filePath, mode="wb") as file:
-                file.write(backupRawContent)
-            tkinter.messagebox.showinfo(
-                title="backup restored", message="the datas in the file are restored as they were before saving")
-            raise err
-        else: # => the save was successfull
+        if self.backgroundSave is not None:
+            if background is True:
+                tkinter.messagebox.showinfo(
+                    title="save info", message="an other save is running, retry when it is finished")
+                return False
+            self.waitBackgroundSave()
+        if (datas.getSavePath() == filePath) and datas.appendToJournal():
+            # => only the actions since the last save were appended
             tkinter.messagebox.showinfo(title="save info", message="saved the datas")
             return True
+        if (background is True) and (isShardedPath(filePath) is False):
+            self.backgroundSave = BackgroundSave(datas, datas.takeSnapshot(), filePath)
+            self.tkinterRoot.after(BackgroundSave.POLLING_DELAY, self.__pollBackgroundSave)
+            return True
+        # => save it now (atomic: when it fails the file is left untouched)
+        #   the sharded datas are always saved now: only their modified shards are written
+        try: datas.saveToPath(filePath)
+        except Exception as err:
+            tkinter.messagebox.showinfo(
+                title="save failed", message="the datas in the file were left as they were before saving")
+            raise err
+        tkinter.messagebox.showinfo(title="save info", message="saved the datas")
+        return True
+    
+    def __pollBackgroundSave(self)->None:
+        """check (from the tkinter loop) whether the background save is finished"""
+        if self.backgroundSave is None:
+            return None # => alredy finished (see .waitBackgroundSave())
+        if self.backgroundSave.isRunning():
+            self.tkinterRoot.after(BackgroundSave.POLLING_DELAY, self.__pollBackgroundSave)
+            return None
+        self.__finishBackgroundSave()
+    
+    def waitBackgroundSave(self)->None:
+        """wait for the background save to finish (when one is running)"""
+        if self.backgroundSave is None:
+            return None
+        self.backgroundSave.join()
+        self.__finishBackgroundSave()
+    
+    def __finishBackgroundSave(self)->None:
+        """report the result of the (finished) background save\n
+        a failed save is only reported (not raised): it is called from the tkinter loop 
+        and before closing, the datas stay unsaved (=> .askToSave() will offer to save them)"""
+        backgroundSave: "BackgroundSave" = assertIsinstance(BackgroundSave, self.backgroundSave)
+        self.backgroundSave = None
+        error: "BaseException|None" = backgroundSave.getError()
+        if error is not None:
+            # => logged (the logger record the outputs)
+            print(f"[ERROR] the background save to {backgroundSave.filePath} failed:")
+            traceback.print_exception(type(error), error, error.__traceback__)
+            tkinter.messagebox.showerror(
+                title="save failed", 
+                message=f"the save to {backgroundSave.filePath} failed:\n\t{error!r}\n"
+                        + "the datas in the file were left as they were before saving")
+            return None
+        # => the save was successfull
+        backgroundSave.datas.snapshotSaved(backgroundSave.snapshot, backgroundSave.filePath)
+        tkinter.messagebox.showinfo(title="save info", message="saved the datas")
     
     
     def iconifyAll(self, event:"tkinter.Event[tkinter.Misc]")->None:
@@ -224,19 +314,30 @@ class App():
             return None # => nothing to update
         self.tkinterRoot.updateDatas(targets)
     
-    def revert(self, currentWindow:"tkinter.Toplevel|None"=None)->None:
-        """revert the previous action done on the datas then focus the `currentWindow` (None -> main app)"""
-        try: self.updatedDatas(self.datas.revert())
+    def revert(self, currentWindow:"tkinter.Toplevel|None"=None, nbActions:int=1)->None:
+        """revert the `nbActions` previous actions done on the datas then focus the `currentWindow` (None -> main app)\n
+        the app is updated once, after all the actions are reverted"""
+        try: self.updatedDatas(self.datas.revertMany(nbActions))
         except NoHistoryError:
             tkinter.messagebox.showwarning("impossible to revert", "there is not more history, it can't revert")
         (currentWindow or self.tkinterRoot).focus()
             
-    def redo(self, currentWindow:"tkinter.Toplevel|None"=None)->None:
-        """revert the previous action done on the datas then focus the `currentWindow` (None -> main app)"""
-        try: self.updatedDatas(self.datas.redo())
+    def redo(self, currentWindow:"tkinter.Toplevel|None"=None, nbActions:int=1)->None:
+        """redo the `nbActions` next actions reverted on the datas then focus the `currentWindow` (None -> main app)\n
+        the app is updated once, after all the actions are redone"""
+        try: self.updatedDatas(self.datas.redoMany(nbActions))
         except NoHistoryError:
             tkinter.messagebox.showwarning("impossible to redo", "there is not more history, it can't redo")
         (currentWindow or self.tkinterRoot).focus()
+    
+    def revertTo(self, nodeID:int, currentWindow:"tkinter.Toplevel|None"=None)->None:
+        """revert / redo the actions until the history is at the node `nodeID` 
+        then focus the `currentWindow` (None -> main app)\n
+        the app is updated once, after all the actions are reverted / redone"""
+        try: self.updatedDatas(self.datas.revertTo(nodeID))
+        except ValueError:
+            tkinter.messagebox.showwarning("impossible to go to this node", "this node of the history can't be reached anymore")
+        (currentWindow or self.tkinterRoot).focus()
 
 
 
@@ -362,13 +463,14 @@ class MenusWidget(tkinter.Menu):
         self.activitiesManager:"None|ActivitiesManager" = None
         self.exportDialog:"None|ExportDialog" = None
         self.scheduleDialog:"None|ScheduleDialog" = None
+        self.historyBrowser:"None|HistoryBrowser" = None
         
         # fileSubMenu
         self.fileSubMenu = tkinter.Menu(self)
         self.fileSubMenu.add_command(label="New", command=self.newDatas, accelerator="Ctrl+N")
         self.fileSubMenu.add_command(label="Open", command=self.openFromFile, accelerator="Ctrl+O")
-        self.fileSubMenu.add_command(label="Save", command=self.saveToFile, accelerator="Ctrl+S")
-        self.fileSubMenu.add_command(label="Save as", command=self.saveAsToFile, accelerator="Ctrl+RShift+S")
+        self.fileSubMenu.add_command(label="Save", command=lambda: self.saveToFile(background=True), accelerator="Ctrl+S")
+        self.fileSubMenu.add_command(label="Save as", command=lambda: self.saveAsToFile(background=True), accelerator="Ctrl+RShift+S")
         self.fileSubMenu.add_command(label="Merge with", command=self.mergeWithFile, accelerator="Ctrl+M")
         self.fileSubMenu.add_command(label="Exit", command=self.application.exit)
         self.add_cascade(menu=self.fileSubMenu, label="File")
@@ -377,6 +479,7 @@ class MenusWidget(tkinter.Menu):
         self.editSubMenu.add_command(label="Edit work config", command=self.startEditWorkloadConfig)
         self.editSubMenu.add_command(label="Revert last change", command=self.application.revert, accelerator="Ctrl+Z")
         self.editSubMenu.add_command(label="Eedo changes", command=self.application.redo, accelerator="Ctrl+Y")
+        self.editSubMenu.add_command(label="Browse the history", command=self.openHistoryBrowser, accelerator="Ctrl+H")
         self.add_cascade(menu=self.editSubMenu, label="Edit")
         # ActivitiesSubMenu
         self.ActivitiesSubMenu = tkinter.Menu(self)
@@ -391,12 +494,13 @@ class MenusWidget(tkinter.Menu):
         # fileSubMenu
         self.mainFrame.bind("<Control-n>", func=lambda e: self.newDatas())
         self.mainFrame.bind("<Control-o>", func=lambda e: self.openFromFile())
-        self.mainFrame.bind("<Control-s>", func=lambda e: self.saveToFile())
-        self.mainFrame.bind("<Control-S>", func=lambda e: self.saveAsToFile())
+        self.mainFrame.bind("<Control-s>", func=lambda e: self.saveToFile(background=True))
+        self.mainFrame.bind("<Control-S>", func=lambda e: self.saveAsToFile(background=True))
         self.mainFrame.bind("<Control-m>", func=lambda e: self.mergeWithFile())
         # editSubMenu
         self.mainFrame.bind("<Control-z>", func=lambda e: self.application.revert())
         self.mainFrame.bind("<Control-y>", func=lambda e: self.application.redo())
+        self.mainFrame.bind("<Control-h>", func=lambda e: self.openHistoryBrowser())
         # exportSubMenu
         self.mainFrame.bind("<Control-e>", func=lambda e: self.openExportMenu())
         self.mainFrame.bind("<Control-g>", func=lambda e: self.openScheduleMenu())
@@ -436,29 +540,31 @@ class MenusWidget(tkinter.Menu):
         updates = self.application.datas.mergeDatasWith(newDatas)
         self.application.updatedDatas(updates)
     
-    def saveToFile(self)->bool:
-        """save the datas (ask a file if it don't have one) and return whether the datas was saved"""
+    def saveToFile(self, background:bool=False)->bool:
+        """save the datas (ask a file if it don't have one) and return whether the datas was saved\n
+        `background` -> the file is written on a worker thread (see App.safeSaveToFile)"""
         filePath: "Path|None" = self.application.datas.getSavePath()
         if filePath is None: 
             # => don't have a save path => ask for it
-            return self.saveAsToFile() # finished
+            return self.saveAsToFile(background=background) # finished
         # => have a file
         if self.application.datas.isSaved():
             # => alredy saved
             tkinter.messagebox.showinfo(title="save info", message="alredy saved '~'")
             return True 
         print("[DEBUG] true saved datas @ saveToFile")
-        return self.application.safeSaveToFile(datas=None, filePath=filePath)
+        return self.application.safeSaveToFile(datas=None, filePath=filePath, background=background)
     
-    def saveAsToFile(self)->bool:
-        """ask a file to save the datas and return whether the datas was saved"""
+    def saveAsToFile(self, background:bool=False)->bool:
+        """ask a file to save the datas and return whether the datas was saved\n
+        `background` -> the file is written on a worker thread (see App.safeSaveToFile)"""
         # ask a file for saving 
         filePath: "Path|None" = self.application.askFilenameToSaveDatas(master=self)
         print("[DEBUG] save filename:", filePath)
         if filePath is None: # => no file selected, don't save anything
             return False
         print("[DEBUG] true saved datas @ saveAsToFile")
-        return self.application.safeSaveToFile(datas=None, filePath=filePath)
+        return self.application.safeSaveToFile(datas=None, filePath=filePath, background=background)
     
 
     def startEditWorkloadConfig(self)->None:
@@ -497,11 +603,22 @@ class MenusWidget(tkinter.Menu):
         else: # => not opened => open a new one
             self.scheduleDialog = ScheduleDialog(self)
 
+    def openHistoryBrowser(self)->None:
+        if self.historyBrowser is not None:
+            tkinter.messagebox.showinfo(
+                title="history browser alredy opened", 
+                message="the history browser is alredy opened")
+            self.historyBrowser.focus()
+        else: # => not opened => open a new one
+            self.historyBrowser = HistoryBrowser(self)
+
     def updatedDatas(self, targets:"set[_UpdatedTarget]")->None:
         if self.activitiesManager is not None:
             self.activitiesManager.updatedDatas(targets)
         if self.exportDialog is not None:
             self.exportDialog.updatedDatas(targets)
+        if self.historyBrowser is not None:
+            self.historyBrowser.updatedDatas(targets)
         # the editConfigDialog don't need to be updated
         # (ensure it don't have an updatedDatas methode)
         assert hasattr(self.editConfigDialog, "updatedDatas") is False
@@ -759,6 +876,7 @@ class GenericSortableTableFrame(tkinter.Frame, ABC, Generic[_T_TableColumn, _T_T
         # if it is the same column filp the state, if use asc order
         nextState:bool = (True if (currColumn != targetedColumn) else (not currState))
         self.currentSortStatus = (targetedColumn, nextState)
+        # => always sorted again: reversing the lines would also reverse the order of the ties
         self.sortLines()
     
     def sortLines(self)->None:
@@ -799,7 +917,8 @@ class PeriodeTable(GenericSortableTableFrame[_PeriodeColumn, Periode]):
     def __init__(self, perodesFrame:PerodesFrame) -> None:
         super().__init__(perodesFrame, perodesFrame.application)
         self.perodesFrame: PerodesFrame = perodesFrame
-        self.__subPeriodes: "PeriodesStorage[_TimeID]" # setted in self.updatedDatas()
+        self.__subPeriodes: "PeriodesStorageView" # setted in self.updatedDatas()
+        self.__shownPeriodes: "list[Periode]" # setted in self.getSortedElements()
         
         self.table.bind("<Double-1>", self.onDoubleClick)
         self.updatedDatas(self.UPDATE_CONDITIONS)
@@ -807,8 +926,9 @@ class PeriodeTable(GenericSortableTableFrame[_PeriodeColumn, Periode]):
     @override
     def getSortedElements(self)->"list[Periode]":
         sortCol, order = self.currentSortStatus
-        return self.__subPeriodes.getPeriodes_sortedByfield(
+        self.__shownPeriodes = self.__subPeriodes.getPeriodes_sortedByfield(
             _PeriodeColumn_TO_PeriodeField[sortCol], order)
+        return self.__shownPeriodes
     
     @override
     def getElementDatas(self, element: Periode)->"dict[_PeriodeColumn, str]":
@@ -827,9 +947,10 @@ class PeriodeTable(GenericSortableTableFrame[_PeriodeColumn, Periode]):
         if targets.isdisjoint(self.UPDATE_CONDITIONS):
             return None # => none of the requirements are meeted
         # => at least one of the updatedtarget is in the conditions
-        # clear the dialogs of the previous periodes
-        try: dialogesToRemove: "list[Periode]" = [periode for periode in self.__subPeriodes]
-        except AttributeError: pass # => self.__subPeriodes not setted
+        # clear the dialogs of the previous periodes 
+        # (the view is live, so use the periodes that are shown)
+        try: dialogesToRemove: "list[Periode]" = list(self.__shownPeriodes)
+        except AttributeError: pass # => self.__shownPeriodes not setted
         else: # => dialogs to remove
             for periode in dialogesToRemove:
                 try: self.application.tkinterRoot.\
@@ -1471,6 +1592,70 @@ class ActivitiesManager(CustomTopLevel):
         super().destroy()
 
 
+class HistoryBrowser(CustomTopLevel):
+    COLUMNS: "tuple[str, ...]" = ("node", "action", "time", "state")
+    
+    def __init__(self, menusWidget:"MenusWidget") -> None:
+        super().__init__(menusWidget, menusWidget.application, title="history browser", resizeable=True)
+        self.menusWidget: MenusWidget = menusWidget
+        
+        self.tableFrame = tkinter.Frame(self)
+        self.table = tkinter.ttk.Treeview(self.tableFrame, columns=self.COLUMNS, show="headings", selectmode="browse")
+        self.scrollbar = tkinter.ttk.Scrollbar(self.tableFrame, orient="vertical", command=self.table.yview)
+        self.table.configure(yscrollcommand=self.scrollbar.set)
+        for columnName in self.COLUMNS:
+            self.table.heading(columnName, text=columnName, anchor="center")
+            self.table.column(columnName, anchor="center")
+        self.table.tag_configure("current", background="lightgreen")
+        self.table.tag_configure("reverted", foreground="grey")
+        self.table.bind("<Double-1>", lambda e: self.goToSelectedNode())
+        self.goToButton = tkinter.Button(
+            self, text="go to the selected node", command=self.goToSelectedNode, 
+            font=self.menusWidget.mainFrame.fonts.big, bg="maroon1")
+        
+        # place the widgets (the table take the maximum space available)
+        self.tableFrame.grid_rowconfigure(0, weight=1)
+        self.tableFrame.grid_columnconfigure(0, weight=1)
+        self.table.grid(row=0, column=0, sticky="nswe")
+        self.scrollbar.grid(row=0, column=1, sticky="nsw")
+        self.tableFrame.pack(anchor="n", fill="both", expand=True, side=tkinter.TOP)
+        self.goToButton.pack(anchor="s", fill="x", side=tkinter.BOTTOM)
+        self.updateNodes()
+    
+    def updateNodes(self)->None:
+        """list all the nodes of the history (the current one is selected)"""
+        self.table.delete(*self.table.get_children())
+        for node in self.application.datas.getHistoryNodes():
+            # the node id is used as the id of the line
+            self.table.insert(
+                "", tkinter.END, iid=str(node.nodeID), values=self.__getNodeValues(node), tags=(node.state, ))
+            if node.state == "current":
+                self.table.selection_set(str(node.nodeID))
+                self.table.see(str(node.nodeID))
+    
+    def __getNodeValues(self, node:"HistoryNodeInfos")->"list[str]":
+        return [str(node.nodeID), 
+                ("initial state" if node.actionName is None else node.actionName), 
+                ("" if node.creationTime is None else prettyDatetime(node.creationTime, "full")), 
+                node.state]
+    
+    def goToSelectedNode(self)->None:
+        selection: "tuple[str, ...]" = self.table.selection()
+        if len(selection) != 1: 
+            return None # => not a single node selected
+        self.application.revertTo(int(selection[0]), currentWindow=self)
+    
+    def updatedDatas(self, targets:"set[_UpdatedTarget]")->None:
+        # => any update of the datas come with a change of the history
+        self.updateNodes()
+    
+    @override
+    def destroy(self)->None:
+        """unbind it and destroy the window"""
+        self.menusWidget.historyBrowser = None
+        super().destroy()
+
+
 class ActivitiesCheckableFrame(tkinter.Frame):
     UPDATE_CONDITIONS: "set[_UpdatedTarget]" = {"activity", }
     
@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager, AbstractContextManager
+from pathlib import Path
+
+from holo.__typing import Iterator, Literal, TextIO, BinaryIO, Any, cast
+
+### atomic saves
+# the new content is written to a temp file next to the target, fsync-ed,
+# then it replace the target with os.replace (atomic on the same file system)
+# => at any time the target is either fully the old content or fully the new one
+# the previous contents are kept as backups generations: path.bak1 (the newest), path.bak2, ...
+# they are hard links to the old files (no copy), rotated with renames
+
+BACKUP_GENERATIONS: int = 3
+"""the number of previous contents kept as backups (0 -> no backups)"""
+_TEMP_SUFFIX: str = ".tmp"
+_UMASK: int = os.umask(0o022)
+os.umask(_UMASK)
+"""read once at import: os.umask can only be read by setting it (not thread safe, the saves use a worker thread)"""
+
+
+def getBackupPath(path:Path, generation:int)->Path:
+    """the path of the backup `generation` of the file at `path` (1 -> the newest)"""
+    return path.with_name(f"{path.name}.bak{generation}")
+
+def rotateBackups(path:Path, generations:int=BACKUP_GENERATIONS)->None:
+    """shift the backups of the file at `path` and make its current content the newest backup\n
+    the oldest generation is dropped, nothing is copied (renames and a hard link)"""
+    if (generations <= 0) or (path.exists() is False):
+        return None
+    for generation in range(generations - 1, 0, -1):
+        backupPath: Path = getBackupPath(path, generation)
+        if backupPath.exists():
+            os.replace(backupPath, getBackupPath(path, generation + 1))
+    newestBackup: Path = getBackupPath(path, 1)
+    newestBackup.unlink(missing_ok=True)
+    try: os.link(path, newestBackup)
+    except OSError: # => the file system don't support hard links, copy it (streamed)
+        shutil.copy2(path, newestBackup)
+
+def _copyFileMode(tempPath:Path, path:Path)->None:
+    """give to the temp file the permissions of the file at `path` it will replace 
+    (mkstemp create it as 0600), or the default ones of a new file"""
+    if path.exists(): shutil.copymode(path, tempPath)
+    else: os.chmod(tempPath, 0o666 & ~_UMASK)
+
+def _fsyncDirectory(directory:Path)->None:
+    """ensure the renames in the `directory` are on the disk (not supported on windows)"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return None
+    fd: int = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try: os.fsync(fd)
+    finally: os.close(fd)
+
+@contextmanager
+def _atomicWrite(path:Path, mode:"Literal['w', 'wb']", encoding:"str|None",
+                 backupGenerations:int)->"Iterator[Any]":
+    """open a temp file to write the new content of the file at `path`\n
+    when the block exit normaly, the temp file is fsync-ed then it atomically replace the file
+    (after rotating its backups), when an error is raised the temp file is removed and
+    the file at `path` is left untouched\n
+    the name of the yielded file is the temp path, not `path`"""
+    fd, tempName = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=_TEMP_SUFFIX)
+    tempPath = Path(tempName)
+    try:
+        with os.fdopen(fd, mode=mode, encoding=encoding) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        _copyFileMode(tempPath, path)
+        rotateBackups(path, backupGenerations)
+        os.replace(tempPath, path)
+    except BaseException as err:
+        tempPath.unlink(missing_ok=True)
+        raise err
+    _fsyncDirectory(path.parent)
+
+def atomicWriteText(path:Path, encoding:str, 
+                    backupGenerations:int=BACKUP_GENERATIONS)->"AbstractContextManager[TextIO]":
+    """atomically write a text file (see _atomicWrite)"""
+    return cast("AbstractContextManager[TextIO]", _atomicWrite(path, "w", encoding, backupGenerations))
+
+def atomicWriteBinary(path:Path, 
+                      backupGenerations:int=BACKUP_GENERATIONS)->"AbstractContextManager[BinaryIO]":
+    """atomically write a binary file (see _atomicWrite)"""
+    return cast("AbstractContextManager[BinaryIO]", _atomicWrite(path, "wb", None, backupGenerations))
@@ -0,0 +1,114 @@
+import json
+import struct
+
+from holo.__typing import (
+    Any as _Any, Iterable, Iterator, NamedTuple,
+)
+
+from saveFormat import AsJson_FullDatas
+
+### the .wtb binary format
+# all the values are little endian
+#   - header: magic, version, nb of strings, size of the metadatas, nb of records
+#   - the strings table: for each string, its size (uint32) then its utf-8 bytes
+#     (the activities and comments are interned in it, each string is stored once)
+#   - the metadatas: the json of the FullDatas without the periodes (utf-8)
+#   - padding (to align the records on 8 bytes)
+#   - the records: one fixed size record per periode, sorted by startTime
+#     (startTime, endTime) as int64 microseconds since utils.EPOCH
+#     (activity, comments) as int32 ids in the strings table (NO_ACTIVITY_ID for the empty activity)
+
+BINARY_MAGIC: bytes = b"WTBDATAS"
+BINARY_VERSION: int = 1
+BINARY_FILE_EXTENSION: str = ".wtb"
+NO_ACTIVITY_ID: int = -1
+_HEADER = struct.Struct("<8sIIIQ")
+_STRING_SIZE = struct.Struct("<I")
+RECORD = struct.Struct("<qqii")
+"""startTime, endTime, activity id, comments id"""
+_RECORDS_ALIGNMENT: int = 8
+
+
+class AsBinary_Periode(NamedTuple):
+    startTime: int
+    """microseconds since utils.EPOCH"""
+    endTime: int
+    """microseconds since utils.EPOCH"""
+    activity: "str|None"
+    comments: str
+
+class BinaryDatas(NamedTuple):
+    metadatas: "AsJson_FullDatas"
+    """the json of the FullDatas (its periodes are empty)"""
+    strings: "list[str]"
+    records: "list[tuple[int, int, int, int]]"
+    """the raw records, the ids refer to the `strings`"""
+
+
+def isBinaryDatas(prefix:bytes)->bool:
+    """tell whether the `prefix` (the first bytes of a file) is the start of a binary datas file"""
+    return prefix.startswith(BINARY_MAGIC)
+
+def packPeriodes(periodes:"Iterable[AsBinary_Periode]")->"tuple[bytes, list[str]]":
+    """pack the `periodes` as records, return (the records, the strings table they refer to)"""
+    stringsIds: "dict[str, int]" = {}
+    records: "list[bytes]" = []
+    for periode in periodes:
+        activityId: int = (NO_ACTIVITY_ID if periode.activity is None
+                           else stringsIds.setdefault(periode.activity, len(stringsIds)))
+        records.append(RECORD.pack(
+            periode.startTime, periode.endTime, activityId,
+            stringsIds.setdefault(periode.comments, len(stringsIds))))
+    return (b"".join(records), list(stringsIds.keys()))
+
+def unpackPeriodes(records:bytes, strings:"list[str]")->"Iterator[AsBinary_Periode]":
+    """iterate over the periodes packed with packPeriodes"""
+    for startTime, endTime, activityId, commentsId in RECORD.iter_unpack(records):
+        yield AsBinary_Periode(
+            startTime=startTime, endTime=endTime, 
+            activity=(None if activityId == NO_ACTIVITY_ID else strings[activityId]),
+            comments=strings[commentsId])
+
+def encodeBinaryDatas(metadatas:"AsJson_FullDatas", periodes:"Iterable[AsBinary_Periode]")->bytes:
+    """return the full content of a binary datas file (the periodes of `metadatas` are ignored)"""
+    records, strings = packPeriodes(periodes)
+    stringsTable: "list[bytes]" = []
+    for string in strings:
+        encodedString: bytes = string.encode("utf-8")
+        stringsTable.append(_STRING_SIZE.pack(len(encodedString)))
+        stringsTable.append(encodedString)
+    metadatasBytes: bytes = json.dumps(
+        {**metadatas, "periodes": []}, ensure_ascii=False).encode("utf-8")
+    header: bytes = _HEADER.pack(
+        BINARY_MAGIC, BINARY_VERSION, len(strings), len(metadatasBytes), len(records) // RECORD.size)
+    size: int = len(header) + sum(map(len, stringsTable)) + len(metadatasBytes)
+    padding: bytes = bytes(-size % _RECORDS_ALIGNMENT)
+    return b"".join([header, *stringsTable, metadatasBytes, padding, records])
+
+def decodeBinaryDatas(buffer:"bytes|_Any")->"BinaryDatas":
+    """decode the content of a binary datas file (any buffer: bytes, mmap, ...)\n
+    the records section is unpacked in a single pass (no parsing)"""
+    with memoryview(buffer) as view:
+        if len(view) < _HEADER.size:
+            raise ValueError("the buffer is too small to be a binary datas")
+        magic, version, nbStrings, metadatasSize, nbRecords = _HEADER.unpack_from(view, 0)
+        if isBinaryDatas(magic) is False:
+            raise ValueError(f"invalide magic bytes: {magic!r}")
+        if version != BINARY_VERSION:
+            raise ValueError(f"unsupported binary datas version: {version} (expected {BINARY_VERSION})")
+        offset: int = _HEADER.size
+        strings: "list[str]" = []
+        for _ in range(nbStrings):
+            (stringSize, ) = _STRING_SIZE.unpack_from(view, offset)
+            offset += _STRING_SIZE.size
+            strings.append(str(view[offset: offset+stringSize], encoding="utf-8"))
+            offset += stringSize
+        metadatas: "AsJson_FullDatas" = json.loads(str(view[offset: offset+metadatasSize], encoding="utf-8"))
+        offset += metadatasSize
+        offset += -offset % _RECORDS_ALIGNMENT
+        endOffset: int = offset + nbRecords * RECORD.size
+        if endOffset > len(view):
+            raise ValueError(f"the buffer is truncated: {len(view)} bytes, expected {endOffset} bytes")
+        with view[offset: endOffset] as recordsView:
+            records: "list[tuple[int, int, int, int]]" = list(RECORD.iter_unpack(recordsView))
+    return BinaryDatas(metadatas=metadatas, strings=strings, records=records)
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+from holo.__typing import Iterable, Iterator
+
+from utils import _TimeFrame_literals
+
+
+_ONE_DAY: timedelta = timedelta(days=1)
+_ONE_WEEK: timedelta = timedelta(days=7)
+_EPSILON: timedelta = timedelta.resolution
+
+# the buckets of each timeframe are identified by a compact integer key:
+#  - day: the ordinal of the day (datetime.toordinal)
+#  - week: the number of weeks (starting on monday) since the 01/01/0001 (that is a monday)
+#  - month: year * 12 + (month - 1)
+#  - year: the year
+# the keys of a timeframe are consecutive integers => key+1 is the next bucket
+
+
+def bucketKey(t:datetime, timeFrame:"_TimeFrame_literals")->int:
+    """return the key of the bucket of the `timeFrame` that contain `t`"""
+    if timeFrame == "day": return t.toordinal()
+    elif timeFrame == "week": return (t.toordinal() - 1) // 7
+    elif timeFrame == "month": return t.year * 12 + (t.month - 1)
+    elif timeFrame == "year": return t.year
+    else: raise ValueError(f"invalide timeFrame: {timeFrame}")
+
+def bucketKeys(times:"Iterable[datetime]", timeFrame:"_TimeFrame_literals")->"list[int]":
+    """return the keys of the buckets that contain each of the `times` (batch version of bucketKey)"""
+    if timeFrame == "day": return [t.toordinal() for t in times]
+    elif timeFrame == "week": return [(t.toordinal() - 1) // 7 for t in times]
+    elif timeFrame == "month": return [t.year * 12 + (t.month - 1) for t in times]
+    elif timeFrame == "year": return [t.year for t in times]
+    else: raise ValueError(f"invalide timeFrame: {timeFrame}")
+
+def bucketStart(key:int, timeFrame:"_TimeFrame_literals")->datetime:
+    """return the start of the bucket with the given `key`"""
+    if timeFrame == "day": return datetime.fromordinal(key)
+    elif timeFrame == "week": return datetime.fromordinal(key * 7 + 1)
+    elif timeFrame == "month":
+        year, month = divmod(key, 12)
+        return datetime(year=year, month=month+1, day=1)
+    elif timeFrame == "year": return datetime(year=key, month=1, day=1)
+    else: raise ValueError(f"invalide timeFrame: {timeFrame}")
+
+def bucketBounds(key:int, timeFrame:"_TimeFrame_literals")->"tuple[datetime, datetime]":
+    """return the (start, end) of the bucket with the given `key` (the end is excluded)"""
+    startTime: datetime = bucketStart(key, timeFrame)
+    if timeFrame == "day": return (startTime, startTime + _ONE_DAY)
+    elif timeFrame == "week": return (startTime, startTime + _ONE_WEEK)
+    else: return (startTime, bucketStart(key + 1, timeFrame))
+
+def bucketsRange(startTime:datetime, endTime:datetime, timeFrame:"_TimeFrame_literals")->"range":
+    """return the keys of the buckets that intersect [`startTime`, `endTime`[ (in order)"""
+    if endTime <= startTime:
+        return range(0) # => empty interval
+    return range(bucketKey(startTime, timeFrame), bucketKey(endTime - _EPSILON, timeFrame) + 1)
+
+def splitPerBucket(startTime:datetime, endTime:datetime,
+                   timeFrame:"_TimeFrame_literals")->"Iterator[tuple[int, datetime, datetime]]":
+    """split [`startTime`, `endTime`[ on the buckets of the `timeFrame`\n
+    yield (key, start, end) for each part (in order), clipped to the interval"""
+    for key in bucketsRange(startTime, endTime, timeFrame):
+        bucketStartTime, bucketEndTime = bucketBounds(key, timeFrame)
+        yield (key, max(startTime, bucketStartTime), min(endTime, bucketEndTime))
+
+def durationPerBucket(startTime:datetime, endTime:datetime,
+                      timeFrame:"_TimeFrame_literals")->"dict[int, timedelta]":
+    """return the duration of [`startTime`, `endTime`[ inside each bucket it intersect"""
+    return {key: (partEnd - partStart) for key, partStart, partEnd
+            in splitPerBucket(startTime, endTime, timeFrame)}
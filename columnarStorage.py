@@ -0,0 +1,203 @@
+import numpy
+from datetime import datetime, timedelta
+
+from holo.__typing import (
+    FinalClass, Iterable, Iterator,
+)
+from holo.prettyFormats import PrettyfyClass
+
+from model import (
+    Periode, Activity, _TimeID, EPSILON_DURATION,
+)
+from calendarEngine import bucketsRange
+from utils import (
+    _TimeFrame, EPOCH, _MICROSECOND, 
+    datetimeToMicroseconds, microsecondsToDatetime,
+)
+
+
+class ColumnarPeriodesStorage(FinalClass, PrettyfyClass):
+    """read-only columnar storage of periodes, for the analytics on large datasets\n
+    the periodes are stored as int64 microseconds start/end arrays, an int32 activity code array
+    and an int32 comment code array (the activities and comments are in side tables)\n
+    the totals, per activity sums and bucketing are vectorized (no loops over the periodes)\n
+    the periodes must be sorted and disjoint (like in a PeriodesStorage)"""
+    __slots__ = ("timeframe", "__startTimes", "__endTimes", "__activityCodes",
+                 "__commentCodes", "__activities", "__comments", )
+
+    def __init__(self, timeID:"_TimeID|None", startTimes:"numpy.ndarray", endTimes:"numpy.ndarray",
+                 activityCodes:"numpy.ndarray", commentCodes:"numpy.ndarray",
+                 activities:"tuple[Activity, ...]", comments:"tuple[str, ...]") -> None:
+        assert len(startTimes) == len(endTimes) == len(activityCodes) == len(commentCodes)
+        self.timeframe: "_TimeID|None" = timeID
+        self.__startTimes: "numpy.ndarray" = startTimes
+        self.__endTimes: "numpy.ndarray" = endTimes
+        self.__activityCodes: "numpy.ndarray" = activityCodes
+        self.__commentCodes: "numpy.ndarray" = commentCodes
+        self.__activities: "tuple[Activity, ...]" = activities
+        """the side table of the activities (indexed by the activity codes)"""
+        self.__comments: "tuple[str, ...]" = comments
+        """the side table of the comments (indexed by the comment codes)"""
+
+    @classmethod
+    def fromPeriodes(cls, periodes:"Iterable[Periode]", timeID:"_TimeID|None"=None)->"ColumnarPeriodesStorage":
+        """create the storage from sorted disjoint periodes (like the ones of a PeriodesStorage or a view of it)"""
+        startTimes: "list[int]" = []
+        endTimes: "list[int]" = []
+        activityCodes: "list[int]" = []
+        commentCodes: "list[int]" = []
+        activitiesTable: "dict[Activity, int]" = {}
+        commentsTable: "dict[str, int]" = {Periode.EMPTY_COMMENT: 0}
+        for periode in periodes:
+            startTimes.append(datetimeToMicroseconds(periode.startTime))
+            endTimes.append(datetimeToMicroseconds(periode.endTime))
+            activityCodes.append(activitiesTable.setdefault(periode.activity, len(activitiesTable)))
+            commentCodes.append(commentsTable.setdefault(periode.comments, len(commentsTable)))
+        return ColumnarPeriodesStorage(
+            timeID=timeID,
+            startTimes=numpy.array(startTimes, dtype=numpy.int64),
+            endTimes=numpy.array(endTimes, dtype=numpy.int64),
+            activityCodes=numpy.array(activityCodes, dtype=numpy.int32),
+            commentCodes=numpy.array(commentCodes, dtype=numpy.int32),
+            activities=tuple(activitiesTable.keys()), comments=tuple(commentsTable.keys()))
+
+    def __len__(self)->int:
+        return len(self.__startTimes)
+
+    def isEmpty(self)->bool:
+        return len(self.__startTimes) == 0
+
+    def __iter__(self)->"Iterator[Periode]":
+        """iterate over the periodes (they are recreated)"""
+        for startTime, endTime, activityCode, commentCode in zip(
+                self.__startTimes.tolist(), self.__endTimes.tolist(),
+                self.__activityCodes.tolist(), self.__commentCodes.tolist()):
+            yield Periode(
+                startTime=microsecondsToDatetime(startTime),
+                endTime=microsecondsToDatetime(endTime),
+                activity=self.__activities[activityCode],
+                comments=self.__comments[commentCode])
+
+    def __sliced(self, timeID:"_TimeID|None", startTimes:"numpy.ndarray", endTimes:"numpy.ndarray",
+                 selection:"slice|numpy.ndarray")->"ColumnarPeriodesStorage":
+        """create a storage with the same side tables, `startTimes` and `endTimes` must be already selected"""
+        return ColumnarPeriodesStorage(
+            timeID=timeID, startTimes=startTimes, endTimes=endTimes,
+            activityCodes=self.__activityCodes[selection],
+            commentCodes=self.__commentCodes[selection],
+            activities=self.__activities, comments=self.__comments)
+
+    def getSubset(self, timeID:"_TimeID")->"ColumnarPeriodesStorage":
+        """get the subset of the periodes inside the given `timeID` (the periodes crossing its bounds are clipped)\n
+        the arrays are views on the arrays of self, only the clipped bounds are copied"""
+        tStart: int = datetimeToMicroseconds(timeID.startTime)
+        tEnd: int = datetimeToMicroseconds(timeID.endTime)
+        # the periodes are disjoint => the end times are also sorted
+        firstIndex = int(numpy.searchsorted(self.__endTimes, tStart, side="right"))
+        endIndex = int(numpy.searchsorted(self.__startTimes, tEnd, side="left"))
+        if endIndex <= firstIndex:
+            return self.__sliced(timeID, self.__startTimes[0: 0], self.__endTimes[0: 0], slice(0, 0))
+        selection = slice(firstIndex, endIndex)
+        startTimes = self.__startTimes[selection]
+        endTimes = self.__endTimes[selection]
+        if startTimes[0] < tStart:
+            startTimes = startTimes.copy()
+            startTimes[0] = tStart
+        if endTimes[-1] > tEnd:
+            endTimes = endTimes.copy()
+            endTimes[-1] = tEnd
+        return self.__sliced(timeID, startTimes, endTimes, selection)
+
+    def getAllPeriodesInterval(self)->"_TimeID|None":
+        """return the precise interval that holds all the periodes\n
+        if it has no periodes, return its timeframe"""
+        if self.isEmpty():
+            return self.timeframe
+        return _TimeID(startTime=microsecondsToDatetime(self.__startTimes[0]),
+                       endTime=microsecondsToDatetime(self.__endTimes[-1]))
+
+    def __durations(self)->"numpy.ndarray":
+        return self.__endTimes - self.__startTimes
+
+    def cumulatedDuration(self)->timedelta:
+        return timedelta(microseconds=int(self.__durations().sum()))
+
+    def getActivitiesUsageCount(self, activity:"Activity")->int:
+        """tell how much time this activity is used (0 if the activity isn't used, never raise a KeyError)"""
+        try: activityCode: int = self.__activities.index(activity)
+        except ValueError: return 0 # => not in the side table
+        return int(numpy.count_nonzero(self.__activityCodes == activityCode))
+
+    def cumulatedDurationPerActivity(self)->"dict[Activity, timedelta]":
+        """return the activities used by the periodes and their cumulated duration"""
+        nbActivities: int = len(self.__activities)
+        counts = numpy.bincount(self.__activityCodes, minlength=nbActivities)
+        totals = numpy.bincount(self.__activityCodes, weights=self.__durations(), minlength=nbActivities)
+        return {activity: timedelta(microseconds=round(total))
+                for activity, count, total in zip(self.__activities, counts.tolist(), totals.tolist())
+                if count != 0}
+
+    def __getBuckets(self, timeFrame:"_TimeFrame")->"tuple[list[_TimeID], numpy.ndarray]":
+        """return the consecutive _TimeIDs that cover all the periodes and their bounds in microseconds\n
+        (there is one more bound than timeIDs)"""
+        allPeriodesInterval: "_TimeID|None" = self.getAllPeriodesInterval()
+        if self.isEmpty() or (allPeriodesInterval is None):
+            return ([], numpy.zeros(1, dtype=numpy.int64))
+        timeIDs: "list[_TimeID]"
+        if isinstance(timeFrame, str):
+            # => calendar timeframe, the buckets are directly computed
+            timeIDs = [_TimeID.fromBucketKey(key, timeFrame) for key in bucketsRange(
+                allPeriodesInterval.startTime, allPeriodesInterval.endTime, timeFrame)]
+        else: # => custom timeframe
+            timeIDs = [_TimeID.getTimeID(allPeriodesInterval.startTime, timeFrame)]
+            while timeIDs[-1].endTime < allPeriodesInterval.endTime:
+                timeIDs.append(timeIDs[-1].next())
+        bounds = numpy.array(
+            [datetimeToMicroseconds(timeID.startTime) for timeID in timeIDs] \
+                + [datetimeToMicroseconds(timeIDs[-1].endTime)],
+            dtype=numpy.int64)
+        return (timeIDs, bounds)
+
+    def __splitIndices(self, bounds:"numpy.ndarray")->"tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]":
+        """split the periodes on the `bounds`, return for each part:
+        (index of the periode, index of the bucket, clipped start, clipped end)\n
+        the parts are sorted by periode and bucket, the empty parts are removed"""
+        firstBuckets = numpy.searchsorted(bounds, self.__startTimes, side="right") - 1
+        lastBuckets = numpy.searchsorted(bounds, self.__endTimes, side="left") - 1
+        nbParts = lastBuckets - firstBuckets + 1
+        periodesIndices = numpy.repeat(numpy.arange(len(self.__startTimes)), nbParts)
+        partsOffsets = numpy.cumsum(nbParts) - nbParts
+        bucketsIndices = firstBuckets[periodesIndices] \
+            + (numpy.arange(len(periodesIndices)) - partsOffsets[periodesIndices])
+        startTimes = numpy.maximum(self.__startTimes[periodesIndices], bounds[bucketsIndices])
+        endTimes = numpy.minimum(self.__endTimes[periodesIndices], bounds[bucketsIndices + 1])
+        notEmpty = (endTimes - startTimes) >= (EPSILON_DURATION // _MICROSECOND)
+        return (periodesIndices[notEmpty], bucketsIndices[notEmpty],
+                startTimes[notEmpty], endTimes[notEmpty])
+
+    def splitPer_TimeFrame(self, timeFrame:"_TimeFrame")->"dict[_TimeID, ColumnarPeriodesStorage]":
+        timeIDs, bounds = self.__getBuckets(timeFrame)
+        if len(timeIDs) == 0:
+            return {} # => no periodes
+        periodesIndices, bucketsIndices, startTimes, endTimes = self.__splitIndices(bounds)
+        # the buckets are sorted => cut where the bucket changes
+        cuts: "list[int]" = (numpy.flatnonzero(numpy.diff(bucketsIndices)) + 1).tolist()
+        result: "dict[_TimeID, ColumnarPeriodesStorage]" = {}
+        for start, end in zip([0] + cuts, cuts + [len(bucketsIndices)]):
+            timeID: "_TimeID" = timeIDs[int(bucketsIndices[start])]
+            result[timeID] = self.__sliced(
+                timeID, startTimes[start: end], endTimes[start: end],
+                selection=periodesIndices[start: end])
+        return result
+
+    def cumulatedDurationPer_TimeFrame(self, timeFrame:"_TimeFrame")->"dict[_TimeID, timedelta]":
+        """return the cumulated duration of each _TimeID that contains some periodes (without creating the sub storages)"""
+        timeIDs, bounds = self.__getBuckets(timeFrame)
+        if len(timeIDs) == 0:
+            return {} # => no periodes
+        _, bucketsIndices, startTimes, endTimes = self.__splitIndices(bounds)
+        counts = numpy.bincount(bucketsIndices, minlength=len(timeIDs))
+        totals = numpy.bincount(bucketsIndices, weights=(endTimes - startTimes), minlength=len(timeIDs))
+        return {timeID: timedelta(microseconds=round(total))
+                for timeID, count, total in zip(timeIDs, counts.tolist(), totals.tolist())
+                if count != 0}
@@ -0,0 +1,58 @@
+import gzip
+import io
+import lzma
+from contextlib import contextmanager
+from pathlib import Path
+
+from holo.__typing import Literal, Iterator, BinaryIO, TextIO, cast
+
+from atomicSave import atomicWriteBinary
+
+### the compressed json saves (.json.gz and .json.xz)
+# the json is streamed through the stdlib compressors, it is never fully buffered
+# on load the compression is detected with the magic bytes of the file (not its suffix)
+
+_Compression = Literal["gzip", "xz"]
+
+GZIP_EXTENSION: str = ".gz"
+XZ_EXTENSION: str = ".xz"
+GZIP_MAGIC: bytes = b"\x1f\x8b"
+XZ_MAGIC: bytes = b"\xfd7zXZ\x00"
+MAGIC_SIZE: int = max(len(GZIP_MAGIC), len(XZ_MAGIC))
+"""the number of bytes to read to detect the compression (see detectCompression)"""
+GZIP_LEVEL: int = 6
+"""faster than the default (9) for nearly the same size on the saves"""
+XZ_PRESET: int = 6
+
+
+def getCompression(path:Path)->"_Compression|None":
+    """the compression to save the file at `path` with (from its suffix)"""
+    if path.suffix == GZIP_EXTENSION: return "gzip"
+    elif path.suffix == XZ_EXTENSION: return "xz"
+    else: return None
+
+def detectCompression(prefix:bytes)->"_Compression|None":
+    """the compression of a file from its first bytes (at least MAGIC_SIZE bytes)"""
+    if prefix.startswith(GZIP_MAGIC): return "gzip"
+    elif prefix.startswith(XZ_MAGIC): return "xz"
+    else: return None
+
+def openDecompressed(file:BinaryIO, compression:"_Compression")->"BinaryIO":
+    """return a binary file that stream the decompressed content of the `file` (it isn't closed by it)"""
+    if compression == "gzip":
+        return cast(BinaryIO, gzip.GzipFile(fileobj=file, mode="rb"))
+    return cast(BinaryIO, lzma.LZMAFile(file, mode="rb"))
+
+@contextmanager
+def atomicWriteCompressedText(path:Path, compression:"_Compression", encoding:str)->"Iterator[TextIO]":
+    """atomically write a compressed text file (see atomicSave), the text is compressed while it is written"""
+    with atomicWriteBinary(path) as rawFile:
+        compressedFile: "BinaryIO"
+        if compression == "gzip":
+            # mtime=0 => the same datas give the same file
+            compressedFile = cast(BinaryIO, gzip.GzipFile(
+                fileobj=rawFile, mode="wb", compresslevel=GZIP_LEVEL, mtime=0))
+        else: compressedFile = cast(BinaryIO, lzma.LZMAFile(rawFile, mode="wb", preset=XZ_PRESET))
+        # closing them flush the end of the compressed stream (the raw file stay open)
+        with compressedFile, io.TextIOWrapper(compressedFile, encoding=encoding) as file:
+            yield file
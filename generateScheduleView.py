@@ -7,10 +7,11 @@ from holo.__typing import (
 )
 
 from model import (
-    PeriodesStorage, Periode, 
+    PeriodesStorageView, Periode, 
     _TimeID, _DayID, _WeekID, _MonthID,
     prettyDatetime,
 )
+from calendarEngine import bucketKeys, bucketBounds, bucketsRange
 
 
 HOUR_FORMAT: str = "%Hh%M"
@@ -51,19 +52,15 @@ class DrawingRect(NamedTuple):
 
 
 def __computeGridSizeAndDaysToGrid(timeFrame:"_TimeID")->GridInfos:
-    sortedDays = sorted(
-        (_DayID.fromDatetime(interval.startTime)
-         for interval in timeFrame.splitPer_TimeFrame("day").keys()),
-        key=lambda day:day.startTime)
-    weeks: "list[_TimeID]" = \
-        [_TimeID.fromDuration(subPeriode.startTime, subPeriode.duration)
-         for subPeriode in timeFrame.splitPer_TimeFrame("week").values()]
-    months: "list[_TimeID]" = \
-        [_TimeID.fromDuration(subPeriode.startTime, subPeriode.duration)
-         for subPeriode in timeFrame.splitPer_TimeFrame("month").values()]
+    sortedDays: "list[_DayID]" = [
+        _DayID(*bucketBounds(dayKey, "day"))
+        for dayKey in bucketsRange(timeFrame.startTime, timeFrame.endTime, "day")]
+    daysStarts: "list[datetime]" = [day.startTime for day in sortedDays]
+    weeksKeys: "list[int]" = bucketKeys(daysStarts, "week")
+    monthsKeys: "list[int]" = bucketKeys(daysStarts, "month")
     NB_DAYS = len(sortedDays)
-    NB_WEEKS = len(weeks)
-    NB_MONTHS =  len(months)
+    NB_WEEKS = len(set(weeksKeys))
+    NB_MONTHS =  len(set(monthsKeys))
 
     # determine visual mode and the number of cols/rows
 
@@ -78,30 +75,21 @@ def __computeGridSizeAndDaysToGrid(timeFrame:"_TimeID")->GridInfos:
         # week or months mode
         NB_COLS = 7
         NB_ROWS = NB_WEEKS
-        dayToGrid = {}
-        for indexWeek, interval in enumerate(weeks):
-            daysOfWeekInterval = sorted(interval.splitPer_TimeFrame("day").keys(),
-                                key=lambda day:day.startTime)
-            for day in daysOfWeekInterval:
-                weekDay: int = day.startTime.isocalendar()[2]
-                day = _DayID.fromDatetime(day.startTime)
-                dayToGrid[day] = GridPos(row=indexWeek, col=weekDay-1)
-                del day, weekDay
-            del interval, indexWeek, daysOfWeekInterval
-        print()
+        # the weeks keys are consecutive => the row is the offset to the first week
+        dayToGrid = {day: GridPos(row=weekKey-weeksKeys[0], col=day.startTime.weekday())
+                     for day, weekKey in zip(sortedDays, weeksKeys)}
     else: # => accros multiple months
         NB_ROWS = NB_MONTHS
         NB_COLS = 0
         dayToGrid = {}
-        for indexMonth, interval in enumerate(months):
-            daysOfWeekInterval = sorted(interval.splitPer_TimeFrame("day").keys(),
-                                key=lambda day:day.startTime)
-            NB_COLS = max(NB_COLS, len(daysOfWeekInterval))
-            for indexDay, day in enumerate(daysOfWeekInterval):
-                day = _DayID.fromDatetime(day.startTime)
-                dayToGrid[day] = GridPos(row=indexMonth, col=indexDay)
-                del day, indexDay
-            del interval, indexMonth, daysOfWeekInterval
+        firstDayIndex: int = 0
+        """the index of the first day (of the interval) inside the current month"""
+        for indexDay, (day, monthKey) in enumerate(zip(sortedDays, monthsKeys)):
+            if monthKey != monthsKeys[firstDayIndex]:
+                # => first day of a new month
+                firstDayIndex = indexDay
+            dayToGrid[day] = GridPos(row=monthKey-monthsKeys[0], col=indexDay-firstDayIndex)
+            NB_COLS = max(NB_COLS, indexDay-firstDayIndex+1)
     
     return GridInfos(nbCols=NB_COLS, nbRows=NB_ROWS, daysToGrid=dayToGrid, days=sortedDays)
 
@@ -206,7 +194,7 @@ def drawEmptySchedule(timeFrame:"_TimeID")->"DrawingInfos":
     
     
 
-def drawSchedule(periodes:"PeriodesStorage[_TimeID]")->"drawsvg.Drawing":
+def drawSchedule(periodes:"PeriodesStorageView")->"drawsvg.Drawing":
     # check it is the correct duration
     drawingInfos = drawEmptySchedule(periodes.timeframe)
     
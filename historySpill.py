@@ -0,0 +1,54 @@
+import pickle
+import tempfile
+
+from holo.__typing import BinaryIO, FinalClass
+
+from projectPaths import LOGGS_FILE_PATH
+
+### the spill file of the history
+# the cold actions of the history are written to it and read back when they are needed
+# it is an anonymous temp file next to the logs: removed when closed (or when the app exit)
+# it is append only: an action is spilled once, the space of the discarded actions isn't reused
+# the actions are pickled (not .toJson()): the json of the periodes don't keep the microseconds
+#  => a reloaded action would not match the periodes of the storage anymore
+
+SPILL_DIRECTORY = LOGGS_FILE_PATH.parent
+
+
+class HistorySpillFile(FinalClass):
+    __slots__ = ("__file", "__size", )
+
+    def __init__(self) -> None:
+        self.__file: "BinaryIO|None" = None
+        """created at the first spill"""
+        self.__size: int = 0
+        """the end of the file (where the next object is written)"""
+
+    def write(self, obj:object)->"tuple[int, int]":
+        """append the `obj`, return where it was written: (offset, size)"""
+        if self.__file is None:
+            self.__file = tempfile.TemporaryFile(
+                mode="w+b", dir=SPILL_DIRECTORY, prefix="historySpill.", suffix=".tmp")
+        encoded: bytes = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        location: "tuple[int, int]" = (self.__size, len(encoded))
+        self.__file.seek(self.__size)
+        self.__file.write(encoded)
+        self.__size += len(encoded)
+        return location
+
+    def read(self, location:"tuple[int, int]")->object:
+        """read back the object written at `location`"""
+        if self.__file is None:
+            raise ValueError("nothing was spilled")
+        offset, size = location
+        self.__file.seek(offset)
+        return pickle.loads(self.__file.read(size))
+
+    def getSize(self)->int:
+        return self.__size
+
+    def close(self)->None:
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+            self.__size = 0
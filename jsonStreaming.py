@@ -0,0 +1,123 @@
+import json
+import codecs
+from io import BufferedReader
+
+from holo.__typing import Any, Iterator, TextIO, BinaryIO
+
+
+_WHITESPACES: str = " \t\n\r"
+
+
+class JsonStreamReader():
+    """incremental json reader over a file\n
+    the values are decoded one at a time (with json.JSONDecoder.raw_decode)
+    and the buffer is refilled from the file when needed\n
+    it allow to walk a large object / array without loading the whole file"""
+    __slots__ = ("__file", "__chunkSize", "__decoder", "__textDecoder",
+                 "__buffer", "__pos", "__eof", )
+    CHUNK_SIZE: int = 1 << 16
+    """the number of bytes (or characters) read at each refill"""
+
+    def __init__(self, file:"BufferedReader|BinaryIO|TextIO", chunkSize:int=CHUNK_SIZE) -> None:
+        self.__file: "BufferedReader|BinaryIO|TextIO" = file
+        self.__chunkSize: int = chunkSize
+        self.__decoder: "json.JSONDecoder" = json.JSONDecoder()
+        self.__textDecoder: "codecs.IncrementalDecoder|None" = None
+        """decode the bytes of a binary file (the encoding is detected like json.load)"""
+        self.__buffer: str = ""
+        self.__pos: int = 0
+        """the position of the next character to read in the buffer"""
+        self.__eof: bool = False
+
+    def __refill(self)->bool:
+        """read the next chunk of the file (the consumed part of the buffer is dropped)\n
+        return False when the end of the file was already reached"""
+        if self.__eof is True:
+            return False
+        chunk: "bytes|str" = self.__file.read(self.__chunkSize)
+        text: str
+        if isinstance(chunk, bytes):
+            if self.__textDecoder is None:
+                self.__textDecoder = codecs.getincrementaldecoder(json.detect_encoding(chunk))()
+            text = self.__textDecoder.decode(chunk, final=(len(chunk) == 0))
+        else: text = chunk
+        if len(chunk) == 0:
+            self.__eof = True
+        self.__buffer = self.__buffer[self.__pos: ] + text
+        self.__pos = 0
+        return True
+
+    def __skipWhitespaces(self)->None:
+        while True:
+            buffer: str = self.__buffer
+            pos: int = self.__pos
+            while (pos < len(buffer)) and (buffer[pos] in _WHITESPACES):
+                pos += 1
+            self.__pos = pos
+            if (pos < len(buffer)) or (self.__refill() is False):
+                return None # => on a character or at the end of the file
+
+    def __error(self, message:str)->"json.JSONDecodeError":
+        return json.JSONDecodeError(message, self.__buffer, self.__pos)
+
+    def peek(self)->str:
+        """return the next (non whitespace) character without consuming it ('' at the end of the file)"""
+        self.__skipWhitespaces()
+        if self.__pos < len(self.__buffer):
+            return self.__buffer[self.__pos]
+        return ""
+
+    def expect(self, char:str)->None:
+        """consume the next (non whitespace) character, it must be `char`"""
+        if self.peek() != char:
+            raise self.__error(f"expected {repr(char)}")
+        self.__pos += 1
+
+    def readValue(self)->"Any":
+        """read the full json value at the current position"""
+        self.__skipWhitespaces()
+        while True:
+            try: value, end = self.__decoder.raw_decode(self.__buffer, self.__pos)
+            except json.JSONDecodeError as err:
+                if self.__refill() is True:
+                    continue # => the value might be truncated, retry with more datas
+                raise err
+            if (end == len(self.__buffer)) and (self.__eof is False):
+                # => might be a truncated value (like a number), retry with more datas
+                self.__refill()
+                continue
+            self.__pos = end
+            return value
+
+    def iterArray(self)->"Iterator[Any]":
+        """iterate over the elements of the array at the current position (read one by one)"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.__pos += 1
+            return None # => empty array
+        while True:
+            yield self.readValue()
+            if self.peek() == ",":
+                self.__pos += 1
+                continue
+            self.expect("]")
+            return None
+
+    def iterObject(self)->"Iterator[str]":
+        """iterate over the keys of the object at the current position\n
+        the value of each key must be read (.readValue(), .iterArray(), ...) before the next key"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.__pos += 1
+            return None # => empty object
+        while True:
+            key: "Any" = self.readValue()
+            if not isinstance(key, str):
+                raise self.__error(f"expected a key but got: {repr(key)}")
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.__pos += 1
+                continue
+            self.expect("}")
+            return None
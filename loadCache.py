@@ -0,0 +1,98 @@
+import os
+import struct
+from pathlib import Path
+
+from holo.__typing import Iterable, BinaryIO
+
+from atomicSave import atomicWriteBinary
+from binarySaveFormat import (
+    AsBinary_Periode, BinaryDatas, encodeBinaryDatas, decodeBinaryDatas, )
+from saveFormat import AsJson_FullDatas
+from saveJournal import hashOpenedFile
+
+### the load cache of a json save file
+# it is a sidecar file next to the save file, written after the save file was parsed:
+#   - header: magic, the size and mtime (ns) of the save file, the sha256 of its content
+#   - the datas of the save file (periodes already normalized) in the binary format (see binarySaveFormat)
+# it is used only when the save file still has the same size, mtime and content hash
+#  => the json parsing, the checks of the periodes and their merging are skipped
+# any error while reading or writing the cache is ignored (the save file is simply parsed)
+
+LOAD_CACHE_EXTENSION: str = ".loadcache"
+_CACHE_MAGIC: bytes = b"WTLCACHE"
+_HEADER = struct.Struct("<8sQq32s")
+"""magic, size of the save file, mtime_ns of the save file, sha256 of the save file"""
+
+
+def getLoadCachePath(savePath:Path)->Path:
+    return savePath.with_name(savePath.name + LOAD_CACHE_EXTENSION)
+
+def createLoadCacheHeader(saveFile:"BinaryIO")->bytes:
+    """the header of the load cache of the opened `saveFile` (from its stat and its content)\n
+    it must be taken before the file is parsed: if the file is modified during the parse, 
+    the cache written after it will not match the file (=> it is never used)"""
+    stat = os.fstat(saveFile.fileno())
+    return _HEADER.pack(_CACHE_MAGIC, stat.st_size, stat.st_mtime_ns,
+                        bytes.fromhex(hashOpenedFile(saveFile)))
+
+def readLoadCache(savePath:Path)->"BinaryDatas|None":
+    """return the cached datas of the save file at `savePath` (None when there is no valide cache)"""
+    cachePath: Path = getLoadCachePath(savePath)
+    try:
+        with open(cachePath, mode="rb") as file:
+            header: bytes = file.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                return None # => truncated cache
+            magic, size, mtimeNs, _ = _HEADER.unpack(header)
+            stat = os.stat(savePath)
+            if (magic != _CACHE_MAGIC) or (size != stat.st_size) or (mtimeNs != stat.st_mtime_ns):
+                return None # => outdated cache (checked before hashing the save file)
+            with open(savePath, mode="rb") as saveFile:
+                if header != createLoadCacheHeader(saveFile):
+                    return None # => same size and mtime but different content
+            return decodeBinaryDatas(file.read())
+    except (OSError, ValueError, struct.error):
+        return None # => no cache or corrupted cache
+
+def writeLoadCache(savePath:Path, header:bytes, metadatas:"AsJson_FullDatas",
+                   periodes:"Iterable[AsBinary_Periode]")->None:
+    """atomically write the load cache of the save file at `savePath`\n
+    `header` must have been created before the save file was parsed (see createLoadCacheHeader)\n
+    `periodes` must be normalized (sorted, disjoint and not touching), they are loaded without checks"""
+    try:
+        with atomicWriteBinary(getLoadCachePath(savePath), backupGenerations=0) as file:
+            file.write(header)
+            file.write(encodeBinaryDatas(metadatas, periodes))
+    except OSError:
+        pass # => it is only a cache
+
+def removeLoadCache(savePath:Path)->None:
+    """remove the load cache of the save file at `savePath` (when the file is replaced it is outdated)"""
+    getLoadCachePath(savePath).unlink(missing_ok=True)
+
+
+def _benchmark(nbPeriodes:int=200_000)->None:
+    """compare the cold (parse the json) and warm (from the load cache) loads of a json save file"""
+    import tempfile
+    import time
+    from datetime import datetime, timedelta
+    from model import FullDatas, Periode
+    datas = FullDatas.create_empty()
+    startTime = datetime(2000, 1, 1)
+    datas.extends([
+        Periode(startTime + timedelta(hours=2*index), startTime + timedelta(hours=2*index + 1),
+                activity=f"activity {index % 7}", comments=("" if index % 3 else f"comment {index}"))
+        for index in range(nbPeriodes)])
+    with tempfile.TemporaryDirectory() as directory:
+        savePath = Path(directory).joinpath("datas.json")
+        datas.saveToPath(savePath)
+        for name in ("cold", "warm"):
+            t0: float = time.perf_counter()
+            with open(savePath, mode="rb") as file:
+                loadedDatas: "FullDatas" = FullDatas.fromFile(file)
+            print(f"{name} load of {nbPeriodes} periodes: {time.perf_counter() - t0:.3f}s")
+            assert loadedDatas.toJson()["periodes"] == datas.toJson()["periodes"]
+
+
+if __name__ == "__main__":
+    _benchmark()
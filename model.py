@@ -1,16 +1,20 @@
 import os.path
 from io import BufferedReader
+import mmap
+import json
+import time
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
 from pathlib import Path
-import json
 import locale
+import heapq
+import bisect
 
 from holo.__typing import (
-    Literal, Iterable, Sequence, Union, Iterator, TextIO,
+    Literal, Iterable, Sequence, Union, Iterator, TextIO, BinaryIO,
     Generic, PartialyFinalClass, FinalClass, Self,
     assertIsinstance, overload, override, get_args, cast,
-    DefaultDict, Any, 
+    DefaultDict, Any, NamedTuple, 
 )
 from holo.protocols import _T
 from holo.prettyFormats import (
@@ -20,6 +24,21 @@ from holo.prettyFormats import (
 from holo.linkedObjects import (
     SkipList, History as _HistoryBackend, NoHistoryError, )
 
+from periodesIndexes import (
+    DurationPrefixIndex, CalendarRollupsIndex, SortedFieldIndex, ModifiedBucketsIndex, )
+from calendarEngine import bucketKey, bucketKeys, bucketBounds, splitPerBucket, durationPerBucket
+from jsonStreaming import JsonStreamReader
+from saveJournal import appendJournal, readJournal, removeJournal, getJournalSize
+from atomicSave import atomicWriteText, atomicWriteBinary
+from loadCache import readLoadCache, writeLoadCache, removeLoadCache, createLoadCacheHeader
+from historySpill import HistorySpillFile
+from compressedSave import (
+    _Compression, MAGIC_SIZE, getCompression, detectCompression, 
+    openDecompressed, atomicWriteCompressedText, )
+from shardedSave import (
+    MANIFEST_NAME, MANIFEST_VERSION, isShardedPath, isShardsManifest, getShardFileName,
+    readManifest, writeManifest, readShard, writeShard, removeUnusedShards, )
+from projectPaths import FILE_ENCODING
 from utils import (
     TrustError, Jsonable,
     _UpdatedTarget, _PeriodeFields_sortable,
@@ -27,19 +46,31 @@ from utils import (
     _T_TimeID, _ConfigField, _PeriodeField, _CommentsMerge,
     datetimeFromText, datetimeToText, prettyDatetime, prettyTimedelta, 
     timedeltaFromText, prettyTimeFrame, isEmptySubActions,
+    datetimeToMicroseconds, microsecondsToDatetime, _JournalDirection, _HistoryNodeState,
+    _JsonCompactMode,
 )
 from saveFormat import (
     AsJson_Datetime, AsJson_Activity, AsJson_PrettyTimedelta,
     AsJson_Periode, AsJson_FullDatas, AsJson_Configuration,
-    AsJson_TimeTarget,
+    AsJson_TimeTarget, AsJson_HistoryAction, AsJson_HistoryPeriodesActions,
+    AsJson_HistoryClockingAction, AsJson_HistoryEditConfig, AsJson_HistoryActivities,
+    AsJson_HistorySelectedTimeFrame, AsJson_HistorySelectedTime, AsJson_JournalEntry,
+    AsJson_HistoryBulkExtends,
+    AsJson_ShardSummary, AsJson_ShardsManifest,
     datetimeToJson, datetimeFromJson,
 )
+from binarySaveFormat import (
+    BINARY_MAGIC, BINARY_FILE_EXTENSION, NO_ACTIVITY_ID, AsBinary_Periode, BinaryDatas,
+    isBinaryDatas, encodeBinaryDatas, decodeBinaryDatas, packPeriodes, unpackPeriodes,
+)
 
 
 ### all datetime are in local time
 locale.setlocale(locale.LC_TIME, "fr_FR")
 
 EPSILON_DURATION: timedelta = timedelta.resolution
+SHARDS_TIMEFRAME: "_TimeFrame_literals" = "month"
+"""the timeframe of the shards of the sharded datas (see shardedSave)"""
 
 
 def timeFrameFromText(text:str)->"_TimeFrame":
@@ -73,21 +104,37 @@ def timeFrameFromJson(data:"_TimeFrame_literals|AsJson_Periode")->"_TimeFrame":
 def getRealPath(file:"TextIO|BufferedReader")->"Path":
     return Path(os.path.realpath(file.name))
 
+def truncatePeriodesToSeconds(periodes:"Sequence[Periode]")->"list[Periode]":
+    """truncate the `periodes` to the seconds (see Periode.truncatedToSeconds), the empty ones are skipped"""
+    return [truncated for truncated in map(Periode.truncatedToSeconds, periodes)
+            if truncated is not None]
+
 #########################################################
 
 
 class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
     __slots__ = ("__allPeriodes", "__selectedTime", "__selectedTimeFrame", "__clockinTime",
                  "__registeredActivities", "__configuration", "__history", "__trustMode", 
-                 "__saveFilePath", "__lastSave_histNodeID", )
+                 "__saveFilePath", "__lastSave_histNodeID", "__shards", "__replaying", )
     __finals__ = {"__allPeriodes", "__registeredActivities", "__history", "__configuration"}
+    LOADING_BATCH_SIZE: int = 4096
+    """the number of periodes decoded before being added to the storage when loading a file"""
+    JOURNAL_MAX_RATIO: float = 0.25
+    """when the journal is bigger than this ratio of its snapshot, a full save is needed to compact it"""
     
-    def __init__(self, allPeriodes:"None|Iterable[Periode]", configuration:"Configuration", 
+    def __init__(self, allPeriodes:"None|Iterable[Periode]|PeriodesStorage[None]", configuration:"Configuration", 
                  selectedTime:"datetime", selectedTimeFrame:"_TimeFrame", 
                  clockinTime:"datetime|None", registeredActivities:"Iterable[Activity]|None",
                  fromSaveFile:"Path|None") -> None:
-        self.__allPeriodes: "PeriodesStorage[None]" = \
-            PeriodesStorage(timeID=None, periodes=None, histActions=None)
+        self.__allPeriodes: "PeriodesStorage[None]"
+        if isinstance(allPeriodes, PeriodesStorage):
+            # => already filled storage (see .fromFile(...)), use it directly
+            self.__allPeriodes = allPeriodes
+        else: 
+            # => the periodes are loaded, not recorded in the history (it is cleared after)
+            self.__allPeriodes = PeriodesStorage(timeID=None, periodes=None, histActions=None)
+            if allPeriodes is not None:
+                self.__allPeriodes.loadPeriodes(list(allPeriodes))
         self.__configuration: "Configuration" = configuration
         self.__selectedTime: "datetime" = selectedTime
         self.__selectedTimeFrame: "_TimeFrame" = selectedTimeFrame
@@ -99,11 +146,14 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
         self.__trustMode: bool = False
         self.__saveFilePath: "Path|None" = fromSaveFile
         """allow to use the trused methodes when True"""
-        # add the perioes
-        if allPeriodes is not None:
-            self.extends(list(allPeriodes))
+        self.__shards: "_ShardsState|None" = None
+        """the state of the sharded datas it was loaded from / saved to (None -> not sharded)"""
+        self.__replaying: bool = False
+        """True while the journal is replayed: the periodes of its actions are merged (see ._trusted_addPeriodes)"""
+        self.__registeredActivities.update(self.__allPeriodes.getUsedActivities())
         # set the id here when the list is fully inited from the datas
         self.__history.clearHistory()
+        self.__history.clearJournal()
         self.__lastSave_histNodeID: int = self.__history.getCurrentNodeID()
     
     ### history public ops
@@ -120,6 +170,30 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
         try: return self.__history.redoOne(self)
         finally: self.__trustMode = False
     
+    def revertMany(self, nbActions:int)->"set[_UpdatedTarget]":
+        """revert the last `nbActions` actions at once (the updates of all of them are returned), 
+        might raise a NoHistoryError"""
+        self.__trustMode = True
+        try: return self.__history.revertMany(self, nbActions)
+        finally: self.__trustMode = False
+    
+    def redoMany(self, nbActions:int)->"set[_UpdatedTarget]":
+        """redo the next `nbActions` actions at once (the updates of all of them are returned), 
+        might raise a NoHistoryError"""
+        self.__trustMode = True
+        try: return self.__history.redoMany(self, nbActions)
+        finally: self.__trustMode = False
+    
+    def revertTo(self, nodeID:int)->"set[_UpdatedTarget]":
+        """revert / redo the actions until the history is at the node `nodeID` 
+        (the updates of all of them are returned), might raise a ValueError"""
+        self.__trustMode = True
+        try: return self.__history.revertTo(self, nodeID)
+        finally: self.__trustMode = False
+    
+    def getHistoryNodes(self)->"list[HistoryNodeInfos]":
+        return self.__history.getNodesInfos()
+    
     ### create / save the datas
     
     @classmethod
@@ -132,25 +206,38 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
         return datas
     
     def toJson(self)->"AsJson_FullDatas":
-        clockinTime: "AsJson_Datetime|None" = \
-            (None if self.__clockinTime is None else datetimeToJson(self.__clockinTime))
-        return AsJson_FullDatas(
-            cls=self.__class__.__name__,
-            periodes=[periode.toJson() for periode in self.__allPeriodes],
-            registeredActivities= \
-                [activity.toJson() for activity in self.__registeredActivities],
-            configuration=self.__configuration.toJson(),
-            selectedTime=datetimeToJson(self.__selectedTime),
-            selectedTimeFrame=timeFrameToJson(self.__selectedTimeFrame),
-            clockinTime=clockinTime)
+        return self.takeSnapshot().toJson()
+    
+    def takeSnapshot(self)->"DatasSnapshot":
+        """return an immutable snapshot of the datas (cheap: the periodes are shared, not copied)\n
+        it can be saved from an other thread while the datas keep being modified\n
+        all the shards are loaded (when sharded)"""
+        self.__ensureAllLoaded()
+        return self.__takeSnapshot(periodes=tuple(self.__allPeriodes))
+    
+    def __takeSnapshot(self, periodes:"tuple[Periode, ...]")->"DatasSnapshot":
+        # the last action is in the snapshot => it must not be modified by a coalescing
+        self.__history.sealLastAction()
+        return DatasSnapshot(
+            periodes=periodes,
+            registeredActivities=frozenset(self.__registeredActivities),
+            configuration=self.__configuration.copy(),
+            selectedTime=self.__selectedTime, 
+            selectedTimeFrame=self.__selectedTimeFrame,
+            clockinTime=self.__clockinTime,
+            histNodeID=self.__history.getCurrentNodeID(),
+            journalSize=self.__history.getJournalSize())
     
     @classmethod
-    def fromJson(cls, datas:"AsJson_FullDatas", *, _fromFile:"Path|None")->"Self":
+    def fromJson(cls, datas:"AsJson_FullDatas", *, _fromFile:"Path|None", 
+                 _loadedPeriodes:"PeriodesStorage[None]|None"=None)->"Self":
+        """`_loadedPeriodes`: the storage of the periodes already loaded (then datas["periodes"] is ignored)"""
         assert datas["cls"] == cls.__name__
         fullDatas = FullDatas.__new__(cls)
         FullDatas.__init__(
             self=fullDatas, 
-            allPeriodes=[Periode.fromJson(subData) for subData in datas["periodes"]],
+            allPeriodes=(_loadedPeriodes if _loadedPeriodes is not None
+                         else [Periode.fromJson(subData) for subData in datas["periodes"]]),
             registeredActivities= \
                 [Activity.fromJson(subData) for subData in datas["registeredActivities"]],
             configuration=Configuration.fromJson(datas["configuration"]),
@@ -163,16 +250,268 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
     
     @classmethod
     def fromFile(cls, file:BufferedReader)->"FullDatas":
-        return cls.fromJson(json.load(file), _fromFile=getRealPath(file))
+        """load the datas from a json file (or a binary file, detected with its magic bytes)\n
+        the periodes are streamed: each one is decoded then added to the storage by batches, 
+        the json of all the periodes is never fully loaded\n
+        the compressed json files are detected with their magic bytes and streamed (see compressedSave)\n
+        the load cache of a json file is used when it is valide, 
+        otherwise it is rewritten once the file is parsed (see loadCache)\n
+        when the file is the manifest of sharded datas, they are loaded lazily (see .fromShardedDirectory)"""
+        if isShardsManifest(getRealPath(file)):
+            return cls.fromShardedDirectory(getRealPath(file).parent)
+        prefix: bytes = file.read(max(len(BINARY_MAGIC), MAGIC_SIZE))
+        file.seek(0)
+        if isBinaryDatas(prefix) is True:
+            return cls.fromBinaryFile(file)
+        cachedDatas: "BinaryDatas|None" = readLoadCache(getRealPath(file))
+        if cachedDatas is not None:
+            # => the periodes of the cache are already normalized
+            return cls.__fromBinaryDatas(cachedDatas, fromFile=getRealPath(file), trusted=True)
+        # taken before the parse (=> a cache never hold the content of an other version of the file)
+        cacheHeader: bytes = createLoadCacheHeader(file)
+        compression: "_Compression|None" = detectCompression(prefix)
+        if compression is None:
+            datas, allPeriodes = cls.__readJsonFile(file)
+        else: 
+            with openDecompressed(file, compression) as decompressedFile:
+                datas, allPeriodes = cls.__readJsonFile(decompressedFile)
+        # the cache is written before the journal is replayed (it is the content of the file)
+        writeLoadCache(getRealPath(file), cacheHeader, datas, map(Periode.toBinary, allPeriodes))
+        fullDatas = cls.fromJson(datas, _fromFile=getRealPath(file), _loadedPeriodes=allPeriodes)
+        fullDatas.__replayJournal()
+        return fullDatas
     
-    def saveToFile(self, file:TextIO, compact:bool=False)->None:
-        """save the datas to a file in the json format"""
-        prettyPrintToJSON(
-            self.toJson(), stream=file, end=None,
-            indentSequence=" "*2, 
-            compact=(compact or JSON_SEMI_COMPACT_ARGS))
-        self.__saveFilePath = getRealPath(file)
+    @classmethod
+    def __readJsonFile(cls, file:"BinaryIO")->"tuple[AsJson_FullDatas, PeriodesStorage[None]]":
+        """stream the json in the `file`: return its datas (without the periodes) and the storage of its periodes"""
+        reader = JsonStreamReader(file)
+        allPeriodes: "PeriodesStorage[None]" = \
+            PeriodesStorage(timeID=None, periodes=None, histActions=None)
+        datas: "dict[str, Any]" = {}
+        for key in reader.iterObject():
+            if key != "periodes":
+                datas[key] = reader.readValue()
+                continue
+            # => stream the periodes
+            batch: "list[Periode]" = []
+            for periodeDatas in reader.iterArray():
+                batch.append(Periode.fromJson(periodeDatas))
+                if len(batch) >= cls.LOADING_BATCH_SIZE:
+                    allPeriodes.loadPeriodes(batch)
+                    batch = []
+            allPeriodes.loadPeriodes(batch)
+        return (cast("AsJson_FullDatas", datas), allPeriodes)
+    
+    @classmethod
+    def fromBinaryFile(cls, file:BufferedReader)->"FullDatas":
+        """load the datas from a binary file (see binarySaveFormat), the file is memory mapped"""
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            binaryDatas: "BinaryDatas" = decodeBinaryDatas(buffer)
+        return cls.__fromBinaryDatas(binaryDatas, fromFile=getRealPath(file), trusted=False)
+    
+    @classmethod
+    def __fromBinaryDatas(cls, binaryDatas:"BinaryDatas", fromFile:"Path", trusted:bool)->"FullDatas":
+        """create the datas (and replay their journal) from decoded binary datas\n
+        `trusted`: the periodes are known to be normalized (from a load cache), 
+        they are created and added without any checks"""
+        strings: "list[str]" = binaryDatas.strings
+        activities: "dict[int, Activity]" = {NO_ACTIVITY_ID: Activity(None)}
+        """the activities of the ids (created once per id)"""
+        createPeriode = (Periode._trusted_new if trusted is True else Periode)
+        periodes: "list[Periode]" = []
+        for startTime, endTime, activityId, commentsId in binaryDatas.records:
+            activity: "Activity|None" = activities.get(activityId, None)
+            if activity is None:
+                activity = activities[activityId] = Activity(strings[activityId])
+            periodes.append(createPeriode(
+                microsecondsToDatetime(startTime), microsecondsToDatetime(endTime),
+                activity, strings[commentsId]))
+        allPeriodes: "PeriodesStorage[None]" = \
+            PeriodesStorage(timeID=None, periodes=None, histActions=None)
+        if trusted is True:
+            allPeriodes._trusted_addPeriodes(periodes)
+        else: allPeriodes.loadPeriodes(periodes)
+        datas = cls.fromJson(binaryDatas.metadatas, _fromFile=fromFile, _loadedPeriodes=allPeriodes)
+        datas.__replayJournal()
+        return datas
+    
+    @classmethod
+    def fromShardedDirectory(cls, directory:"Path")->"FullDatas":
+        """load the sharded datas (see shardedSave) in the `directory`\n
+        only the manifest is read, the shards are loaded when their periodes are needed"""
+        directory = Path(os.path.realpath(directory))
+        manifest: "AsJson_ShardsManifest" = readManifest(directory)
+        datas = cls.fromJson(
+            manifest["datas"], _fromFile=directory, 
+            _loadedPeriodes=PeriodesStorage(timeID=None, periodes=None, histActions=None))
+        summaries: "dict[int, ShardSummary]" = {
+            summary.monthKey: summary for summary in map(ShardSummary.fromJson, manifest["shards"])}
+        datas.__shards = _ShardsState(
+            directory=directory, generation=manifest["generation"], 
+            summaries=summaries, unloaded=set(summaries.keys()))
+        datas.__allPeriodes.getModifiedBuckets(SHARDS_TIMEFRAME) # => start the tracking
+        return datas
+    
+    def __ensureLoaded(self, startTime:datetime, endTime:datetime)->None:
+        """load the shards with periodes that intersect (or touch) [`startTime`, `endTime`]"""
+        if (self.__shards is None) or (len(self.__shards.unloaded) == 0):
+            return None # => nothing to load
+        self.__loadShards([key for key in self.__shards.unloaded 
+                           if self.__shards.summaries[key].intersect(startTime, endTime)])
+    
+    def __ensureAllLoaded(self)->None:
+        if (self.__shards is None) or (len(self.__shards.unloaded) == 0):
+            return None # => nothing to load
+        self.__loadShards(list(self.__shards.unloaded))
+    
+    def __loadShards(self, keys:"list[int]")->None:
+        """add the periodes of the (unloaded) shards to the storage (not in the history)"""
+        if len(keys) == 0:
+            return None
+        shards: "_ShardsState" = assertIsinstance(_ShardsState, self.__shards)
+        periodes: "list[Periode]" = []
+        for key in sorted(keys):
+            periodes.extend(map(Periode.fromJson, readShard(
+                shards.directory, shards.summaries[key].fileName)))
+        self.__allPeriodes.loadPeriodes(periodes)
+        # => the loaded shards are still the same as on the disk
+        self.__allPeriodes.getModifiedBuckets(SHARDS_TIMEFRAME).discard(keys)
+        shards.unloaded.difference_update(keys)
+    
+    def __unloadedSummaries(self)->"list[ShardSummary]":
+        if self.__shards is None:
+            return []
+        return [self.__shards.summaries[key] for key in self.__shards.unloaded]
+    
+    def __getBucketsTotals(self, timeFrame:"_TimeFrame_literals")->"dict[int, timedelta]":
+        """the cumulated duration of each bucket (key) that contains some periodes, 
+        including the unloaded shards (from their summary, the old ones without buckets are loaded)"""
+        self.__loadShards([summary.monthKey for summary in self.__unloadedSummaries()
+                           if summary.bucketsDuration is None])
+        totals: "dict[int, timedelta]" = self.__allPeriodes.getRollup(timeFrame).getTotals()
+        for summary in self.__unloadedSummaries():
+            assert summary.bucketsDuration is not None
+            for key, duration in summary.bucketsDuration[timeFrame].items():
+                totals[key] = totals.get(key, timedelta(0)) + duration
+        return totals
+    
+    def __saveToShards(self, path:"Path")->None:
+        """save the datas in the sharded layout (see shardedSave) in the directory at `path`\n
+        when the datas were loaded from / saved to it, only the modified months are written"""
+        directory = Path(os.path.realpath(path))
+        modifiedBuckets: "ModifiedBucketsIndex" = self.__allPeriodes.getModifiedBuckets(SHARDS_TIMEFRAME)
+        summaries: "dict[int, ShardSummary]"
+        keysToWrite: "set[int]"
+        unloaded: "set[int]"
+        generation: int
+        if (self.__shards is not None) and (self.__shards.directory == directory):
+            summaries = dict(self.__shards.summaries)
+            keysToWrite = modifiedBuckets.getKeys()
+            unloaded = set(self.__shards.unloaded)
+            generation = self.__shards.generation + 1
+        else: # => a new sharded save, all the months are written
+            self.__ensureAllLoaded()
+            summaries = {}
+            keysToWrite = set(bucketKeys(
+                [periode.startTime for periode in self.__allPeriodes], SHARDS_TIMEFRAME))
+            unloaded = set()
+            generation = 1
+            if directory.joinpath(MANIFEST_NAME).exists():
+                # => don't reuse the names of the shards of the datas it replace
+                generation += readManifest(directory)["generation"]
+        for key in keysToWrite:
+            startTime, endTime = bucketBounds(key, SHARDS_TIMEFRAME)
+            periodes: "list[Periode]" = self.__allPeriodes.getPeriodesStartingIn(startTime, endTime)
+            if len(periodes) == 0:
+                summaries.pop(key, None) # => its file is removed after the commit
+                continue
+            fileName: str = getShardFileName(key, generation)
+            writeShard(directory, fileName, key, [periode.toJson() for periode in periodes])
+            summaries[key] = ShardSummary.fromPeriodes(key, fileName, periodes)
+        directory.mkdir(parents=True, exist_ok=True)
+        writeManifest(directory, AsJson_ShardsManifest(
+            cls="ShardsManifest", version=MANIFEST_VERSION, generation=generation,
+            datas=self.__takeSnapshot(periodes=()).toJson(),
+            shards=[summaries[key].toJson() for key in sorted(summaries.keys())]))
+        removeUnusedShards(directory, [summary.fileName for summary in summaries.values()])
+        self.__shards = _ShardsState(
+            directory=directory, generation=generation, summaries=summaries, unloaded=unloaded)
+        modifiedBuckets.clear()
+        self.__saveFilePath = directory
+        self.__history.sealLastAction()
         self.__lastSave_histNodeID = self.__history.getCurrentNodeID()
+        self.__history.clearJournal()
+    
+    def saveToBinaryFile(self, file:BinaryIO)->None:
+        """save the datas to a file in the binary format (see binarySaveFormat), in a single write"""
+        snapshot: "DatasSnapshot" = self.takeSnapshot()
+        snapshot.saveToBinaryFile(file)
+        self.snapshotSaved(snapshot, getRealPath(file))
+    
+    def saveToFile(self, file:TextIO, compact:"_JsonCompactMode"=False)->None:
+        """save the datas to a file in the json format (see DatasSnapshot.saveToFile)"""
+        snapshot: "DatasSnapshot" = self.takeSnapshot()
+        snapshot.saveToFile(file, compact=compact)
+        self.snapshotSaved(snapshot, getRealPath(file))
+    
+    def saveToPath(self, path:"Path")->None:
+        """atomically save the datas to the file at `path` (see DatasSnapshot.saveToPath)\n
+        a path with the SHARDED_EXTENSION is saved as sharded datas (see shardedSave)"""
+        if isShardedPath(path):
+            return self.__saveToShards(path)
+        snapshot: "DatasSnapshot" = self.takeSnapshot()
+        snapshot.saveToPath(path)
+        self.snapshotSaved(snapshot, path)
+    
+    def snapshotSaved(self, snapshot:"DatasSnapshot", path:"Path")->None:
+        """the `snapshot` (taken from self) was fully saved to the file at `path`\n
+        the actions done after the snapshot was taken stay unsaved"""
+        self.__saveFilePath = Path(os.path.realpath(path))
+        self.__lastSave_histNodeID = snapshot.histNodeID
+        # the actions done before the snapshot are in it => they are removed from the journal
+        self.__history.clearJournal(upTo=snapshot.journalSize)
+        removeJournal(self.__saveFilePath)
+    
+    def appendToJournal(self)->bool:
+        """save the actions done since the last save by appending them to the journal of the save file 
+        (see saveJournal), return whether it was saved\n
+        it don't save anything when a full save is needed instead: 
+        no json save file or the journal is too big (=> compact it)"""
+        if (self.__saveFilePath is None) or (self.__saveFilePath.is_file() is False):
+            return False # => no snapshot (or sharded datas, they only save the modified shards)
+        with open(self.__saveFilePath, mode="rb") as file:
+            if isBinaryDatas(file.read(len(BINARY_MAGIC))):
+                return False # => the binary snapshots are always fully saved
+        snapshotSize: int = os.path.getsize(self.__saveFilePath)
+        if getJournalSize(self.__saveFilePath) > snapshotSize * FullDatas.JOURNAL_MAX_RATIO:
+            return False # => compact the journal
+        appendJournal(self.__saveFilePath, [
+            AsJson_JournalEntry(direction=direction, action=action.toJson())
+            for (direction, action) in self.__history.getJournal()])
+        self.__history.sealLastAction()
+        self.__history.clearJournal()
+        self.__lastSave_histNodeID = self.__history.getCurrentNodeID()
+        return True
+    
+    def __replayJournal(self)->None:
+        """applie the actions of the journal of the save file (when it has a valid one)\n
+        the actions aren't added to the history, their periodes are merged 
+        with the storage like new ones (see ._trusted_addPeriodes)"""
+        if self.__saveFilePath is None:
+            return None
+        self.__trustMode = True
+        self.__replaying = True
+        try:
+            for entry in readJournal(self.__saveFilePath):
+                action: "HistoryAction" = HistoryAction.actionFromJson(entry["action"])
+                if entry["direction"] == "applied":
+                    action.applie(self)
+                elif entry["direction"] == "reverted":
+                    action.revert(self)
+                else: raise ValueError(f"unknown journal direction: {entry['direction']}")
+        finally: 
+            self.__trustMode = False
+            self.__replaying = False
     
     def exportPeriodes(self, selectedInterval:"_TimeID|None", selectedActivities:"set[Activity]", 
                        useConfig:"Literal['self', 'export']"='export')->"FullDatas":
@@ -181,8 +520,9 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
         periodesToExport: "list[Periode]" = []
         if selectedInterval is None:
             selectedInterval = _TimeID(datetime.min, datetime.max)
+        self.__ensureLoaded(selectedInterval.startTime, selectedInterval.endTime)
         # get all the periodes to export
-        for periode in self.__allPeriodes.getSubset(selectedInterval):
+        for periode in self.__allPeriodes.getSubsetView(selectedInterval):
             if periode.activity in selectedActivities:
                 periodesToExport.append(periode)
         # create the config for the exported datas
@@ -209,7 +549,8 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
     
     def isSaved(self)->bool:
         """tell whether the datas are the same as what was last saved"""
-        return (self.__history.getCurrentNodeID() == self.__lastSave_histNodeID)
+        return (self.__history.getCurrentNodeID() 
+                == self.__history.translateNodeID(self.__lastSave_histNodeID))
     
     def getSavePath(self)->"Path|None":
         return self.__saveFilePath
@@ -238,9 +579,11 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
         elif isinstance(timeFrame, _TimeID): return timeFrame
         else: raise ValueError(f"invalide timeFrame: {timeFrame}")
     
-    def getPeriodes(self, selectedTime:"None|datetime", selectedTimeFrame:"None|_TimeFrame")->"PeriodesStorage[_TimeID]":
-        """get all the periodes in the given"""
-        return self.__allPeriodes.getSubset(self.get_TimeID(selectedTime, selectedTimeFrame))
+    def getPeriodes(self, selectedTime:"None|datetime", selectedTimeFrame:"None|_TimeFrame")->"PeriodesStorageView":
+        """get a (live) view of all the periodes in the given"""
+        timeID: "_TimeID" = self.get_TimeID(selectedTime, selectedTimeFrame)
+        self.__ensureLoaded(timeID.startTime, timeID.endTime)
+        return self.__allPeriodes.getSubsetView(timeID)
 
     def getConfigText(self, field:"_ConfigField")->str:
         """get the text of the field of the config for the edit\n
@@ -253,16 +596,31 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
     def getRegisteredActivites(self)->"list[Activity]":
         """return the activities sorted by nb of use (most used -> least used)"""
         return sorted(self.__registeredActivities, reverse=True,
-                      key=self.__allPeriodes.getActivitiesUsageCount)
+                      key=self.__getActivityUsageCount)
     
     def getActivitiesUsages(self)->"dict[Activity, int]":
         """return all the registered activities and the number of periodes that use them"""
-        return {activity: self.__allPeriodes.getActivitiesUsageCount(activity)
+        return {activity: self.__getActivityUsageCount(activity)
                 for activity in self.__registeredActivities}
     
+    def __getActivityUsageCount(self, activity:"Activity")->int:
+        """the number of periodes that use the `activity` (including the unloaded shards)"""
+        return self.__allPeriodes.getActivitiesUsageCount(activity) \
+            + sum(summary.activitiesCount.get(activity, 0) for summary in self.__unloadedSummaries())
+    
     def getAllPeriodesInterval(self)->"_TimeID|None":
         """return the precise interval that holds all the periodes, or None if it has no periodes"""
-        return self.__allPeriodes.getAllPeriodesInterval()
+        interval: "_TimeID|None" = self.__allPeriodes.getAllPeriodesInterval()
+        unloadedSummaries: "list[ShardSummary]" = self.__unloadedSummaries()
+        if len(unloadedSummaries) == 0:
+            return interval
+        # => combine with the bounds of the unloaded shards
+        startTimes: "list[datetime]" = [summary.firstStartTime for summary in unloadedSummaries]
+        endTimes: "list[datetime]" = [summary.lastEndTime for summary in unloadedSummaries]
+        if interval is not None:
+            startTimes.append(interval.startTime)
+            endTimes.append(interval.endTime)
+        return _TimeID(startTime=min(startTimes), endTime=max(endTimes))
     
     ### selected time
     
@@ -274,7 +632,7 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
             # => didin't changed the periodes interval
             return set()
         self.__history.addAction(HistorySelectedTime(
-            oldTime=oldSelectedTime, newTime=self.__selectedTime))
+            oldTime=oldSelectedTime, newTime=self.__selectedTime), coalesce=True)
         return {"selectedTime"}
     
     def goToPrev_TimeFrame(self)->"set[_UpdatedTarget]":
@@ -314,7 +672,7 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
         oldTimeFrame: "_TimeFrame" = self.__selectedTimeFrame
         self.__selectedTimeFrame = timeframe
         self.__history.addAction(HistorySelectedTimeFrame(
-            newSelection=timeframe, oldSelection=oldTimeFrame))
+            newSelection=timeframe, oldSelection=oldTimeFrame), coalesce=True)
         return {"selectedTimeFrame"}
     
     ### clockin related methodes
@@ -329,7 +687,8 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
     def clockin(self)->None:
         if self.isClockedIn():
             raise ValueError("alredy clocked in, can't clock in twice")
-        self.__clockinTime = datetime.now()
+        # the save files only keep the seconds
+        self.__clockinTime = datetime.now().replace(microsecond=0)
         self.__history.addAction(HistoryClockingAction(
             clockinValue=self.__clockinTime, action="clockedin"))
     
@@ -375,6 +734,7 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
         `weekSelection`: _WeekID -> over this specific week | 'all' -> over all weeks"""
         if selection == "all":
             return self.__allPeriodes.cumulatedDuration() \
+                + sum((summary.totalDuration for summary in self.__unloadedSummaries()), timedelta(0)) \
                 + self.timeSinceClockedIn(default=timedelta(0))
         # => over a specific week
         # compute the time since clocked in during the interval
@@ -386,8 +746,9 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
             timeClockedIn_selection = clockedIn_periode.intersection(selection, "None", requirePeriode=True).duration
         else: timeClockedIn_selection = timedelta(0) # => they don't intersect 
         # compute the total time done during the interval
+        self.__ensureLoaded(selection.startTime, selection.endTime)
         selectedTimeFrameTotal: timedelta = \
-            self.__allPeriodes.getSubset(selection).cumulatedDuration()
+            self.__allPeriodes.cumulatedDuration(selection)
         return selectedTimeFrameTotal + timeClockedIn_selection
         
     def averageTimePer_TimeFrame(self, selectedTimeFrame:"_TimeFrame|None")->timedelta:
@@ -397,19 +758,29 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
         # => selectedTimeFrame is a _TimeFrame
         nb_TimeID: int = 0
         totalTime: timedelta = timedelta(0)
-        subStorages: "dict[_TimeID, PeriodesStorage[_TimeID]]" = \
-            self.__allPeriodes.splitPer_TimeFrame(selectedTimeFrame)
+        timePerTimeID: "dict[_TimeID, timedelta]|dict[int, timedelta]"
+        if isinstance(selectedTimeFrame, str):
+            # => use the rollups (only contains the buckets with periodes)
+            timePerTimeID = self.__getBucketsTotals(selectedTimeFrame)
+        else: # => custom timeframe, need to split all the periodes
+            self.__ensureAllLoaded()
+            timePerTimeID = {
+                timeID: periodesStorage.cumulatedDuration()
+                for timeID, periodesStorage in self.__allPeriodes.splitPer_TimeFrame(selectedTimeFrame).items()
+                if periodesStorage.isEmpty() is False}
         # add the time of each
-        for periodesStorage in subStorages.values():
-            if periodesStorage.isEmpty():
-                continue
+        for timeIDTime in timePerTimeID.values():
             # => works this week
-            totalTime += periodesStorage.cumulatedDuration()
+            totalTime += timeIDTime
             nb_TimeID += 1
         # add the time since clocked in
         for timeID, clockedTime in self.__getTimeClockedIn_perTimeFrame(selectedTimeFrame).items():
             totalTime += clockedTime
-            if timeID not in subStorages.keys():
+            bucket: "_TimeID|int" = timeID
+            if isinstance(selectedTimeFrame, str):
+                # => the rollup is keyed by the buckets keys
+                bucket = bucketKey(timeID.startTime, selectedTimeFrame)
+            if bucket not in timePerTimeID.keys():
                 # => a new timeID
                 nb_TimeID += 1
         if totalTime == timedelta(0):
@@ -435,14 +806,28 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
         timeTarget: "TimeTarget" = self.getTimeTarget()
         targetCurrentTimeID: "_TimeID" = self.get_TimeID(
             selectedTime=None, selectedTimeFrame=timeTarget.timeFrame)
-        # get all the periodes betwin before the start of the current 
-        peridoesBefore: "PeriodesStorage[_TimeID]" = \
-            self.__allPeriodes.getSubset(_TimeID(datetime.min, targetCurrentTimeID.startTime))
-        nbTargetIntervals: int = len(peridoesBefore.splitPer_TimeFrame(timeTarget.timeFrame))
+        # all the periodes betwin before the start of the current 
+        intervalBefore: "_TimeID" = _TimeID(datetime.min, targetCurrentTimeID.startTime)
+        nbTargetIntervals: int
+        totalBefore: timedelta
+        if isinstance(timeTarget.timeFrame, str):
+            # => the rollups hold the _TimeIDs with periodes, the current one start at a bucket 
+            #   => the buckets before it hold exactly the time done before it
+            limitKey: int = bucketKey(targetCurrentTimeID.startTime, timeTarget.timeFrame)
+            totalsBefore: "list[timedelta]" = [
+                duration for key, duration in self.__getBucketsTotals(timeTarget.timeFrame).items()
+                if key < limitKey]
+            nbTargetIntervals = len(totalsBefore)
+            totalBefore = sum(totalsBefore, timedelta(0))
+        else: # => custom timeframe, need to split the periodes
+            self.__ensureLoaded(intervalBefore.startTime, intervalBefore.endTime)
+            nbTargetIntervals = len(self.__allPeriodes.getSubset(intervalBefore)\
+                .splitPer_TimeFrame(timeTarget.timeFrame))
+            totalBefore = self.__allPeriodes.cumulatedDuration(intervalBefore)
         if nbTargetIntervals == 0:
             # => no periodes in that interval
             return timedelta(0)
-        return timeTarget.targetedTime * nbTargetIntervals - peridoesBefore.cumulatedDuration()
+        return timeTarget.targetedTime * nbTargetIntervals - totalBefore
     
     def cumulatedDurationPerActivity(
             self, selectedTimeFrame:"_TimeFrame|None|Literal['all']")->"dict[Activity, timedelta]":
@@ -450,10 +835,15 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
             and the cummulated time per activity over the selected periode"""
         timePerActivity: "dict[Activity, timedelta]" = DefaultDict(lambda: timedelta(0))
         if selectedTimeFrame == "all":
-            selectedTimeFrame = _TimeID(datetime.min, datetime.max)
+            # => the totals are maintained by the storage (and the summaries of the unloaded shards)
+            timePerActivity.update(self.__allPeriodes.cumulatedDurationPerActivity(None))
+            for summary in self.__unloadedSummaries():
+                for activity, duration in summary.activitiesDuration.items():
+                    timePerActivity[activity] += duration
+            return timePerActivity
         timeSelection: "_TimeID" = self.get_TimeID(None, selectedTimeFrame)
-        for periode in self.__allPeriodes.getSubset(timeSelection):
-            timePerActivity[periode.activity] += periode.duration
+        self.__ensureLoaded(timeSelection.startTime, timeSelection.endTime)
+        timePerActivity.update(self.__allPeriodes.cumulatedDurationPerActivity(timeSelection))
         # don't add the clockin time since it don't have an activity
         return timePerActivity
     
@@ -463,8 +853,12 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
             newPeriodes:"Sequence[Periode]", histPeriodes:"HistoryPeriodesActions", 
             histActivities:"HistoryActivities|None"=None)->"set[_UpdatedTarget]":
         """add all the new periodes but it and register the new activities (will link HistoryActivities if needed)"""
+        newPeriodes = truncatePeriodesToSeconds(newPeriodes)
         if len(newPeriodes) == 0:
             return set() # => nothing to do
+        # the periodes they might be merged with must be loaded
+        self.__ensureLoaded(min(periode.startTime for periode in newPeriodes),
+                            max(periode.endTime for periode in newPeriodes))
         # add the periodes
         try: self.__allPeriodes.extends(newPeriodes, histPeriodes=histPeriodes)
         except Exception as err:
@@ -482,9 +876,25 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
             histPeriodes.linkHist(histActivities)
         return {"periodes"}
     
+    def __internalBulkExtends(self, newPeriodes:"Sequence[Periode]", 
+            histActivities:"HistoryActivities")->"tuple[HistoryBulkExtends, set[_UpdatedTarget]]":
+        """add all the new periodes like .__internalExtends(...), but return a compact history 
+        of the periodes added (see HistoryBulkExtends), the `histActivities` isn't linked to it"""
+        # => the full history of the periodes is only kept while they are added
+        histPeriodes = HistoryPeriodesActions()
+        updates: "set[_UpdatedTarget]" = self.__internalExtends(
+            newPeriodes=newPeriodes, histPeriodes=histPeriodes, histActivities=histActivities)
+        removed, added = histPeriodes.getNetChanges()
+        return (HistoryBulkExtends(added=added, displaced=removed), updates)
+    
     def __internalSubstract(self, 
             periode:"Periode", histPeriodes:"HistoryPeriodesActions")->"set[_UpdatedTarget]":
         """substract the given periode"""
+        truncatedPeriode: "Periode|None" = periode.truncatedToSeconds()
+        if truncatedPeriode is None:
+            return set() # => nothing to substract
+        periode = truncatedPeriode
+        self.__ensureLoaded(periode.startTime, periode.endTime)
         try: self.__allPeriodes.substractPeriode(periode, histPeriodes=histPeriodes)
         except Exception as err:
             self.__trustMode = True
@@ -510,7 +920,7 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
         if activity not in self.__registeredActivities:
             # => not reegistered
             raise KeyError(f"can't unregister the activity: {activity}, it isn't registered")
-        if self.__allPeriodes.getActivitiesUsageCount(activity) != 0:
+        if self.__getActivityUsageCount(activity) != 0:
             # => this activity is used by periodes
             raise KeyError(f"can't unregister the activity: {activity}, there are periodes that use it")
         self.__registeredActivities.remove(activity)
@@ -521,6 +931,15 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
     
     
     def extends(self, newPeriodes:"Sequence[Periode]")->"set[_UpdatedTarget]":
+        if len(newPeriodes) >= PeriodesStorage.BULK_EXTENDS_MIN_SIZE:
+            # => recorded compactly (see HistoryBulkExtends)
+            histActivities = HistoryActivities()
+            histBulk, updates = self.__internalBulkExtends(
+                newPeriodes=newPeriodes, histActivities=histActivities)
+            if histActivities.isEmpty() is False:
+                histBulk.linkHist(histActivities)
+            self.__history.addAction(histBulk)
+            return updates
         histPeriodes = HistoryPeriodesActions()
         updates: "set[_UpdatedTarget]" = self.__internalExtends(
             newPeriodes=newPeriodes, histPeriodes=histPeriodes)
@@ -584,17 +1003,16 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
     
     def mergeDatasWith(self, other:"FullDatas")->"set[_UpdatedTarget]":
         """add the periodes, registered activties of the other FullDatas into self"""
-        histPeriodes = HistoryPeriodesActions()
         histActivities = HistoryActivities()
-        # add the 
-        updates: "set[_UpdatedTarget]" = self.__internalExtends(
-            newPeriodes=list(other.__allPeriodes), histPeriodes=histPeriodes,
-            histActivities=histActivities)
+        other.__ensureAllLoaded()
+        # add the periodes (recorded compactly: it is a bulk operation)
+        histBulk, updates = self.__internalBulkExtends(
+            newPeriodes=list(other.__allPeriodes), histActivities=histActivities)
         updates.update(self.__internalRegisterActivities(
             activities=other.__registeredActivities, histActivities=histActivities))
         if histActivities.isEmpty() is False:
-            histPeriodes.linkHist(histActivities)
-        self.__history.addAction(histPeriodes)
+            histBulk.linkHist(histActivities)
+        self.__history.addAction(histBulk)
         return updates
     
     ### dubug utils
@@ -610,6 +1028,33 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
         if self.__trustMode is False: raise TrustError(self)
         return self.__allPeriodes
     
+    def _trusted_addPeriodes(self, periodes:"Iterable[Periode]")->None:
+        """add back the `periodes` of an action (see PeriodesStorage._trusted_addPeriodes)\n
+        when replaying the journal they are merged with the storage like new periodes"""
+        if self.__trustMode is False: raise TrustError(self)
+        if self.__replaying is False:
+            return self.__allPeriodes._trusted_addPeriodes(periodes)
+        self.__allPeriodes.extends(truncatePeriodesToSeconds(list(periodes)), histPeriodes=None)
+    
+    def _trusted_removePeriodes(self, periodes:"Iterable[Periode]")->None:
+        """remove the periodes of the storage that are equal to the `periodes` of an action\n
+        when replaying the journal the ones that don't match the storage are substracted"""
+        if self.__trustMode is False: raise TrustError(self)
+        if self.__replaying is True:
+            periodes = truncatePeriodesToSeconds(list(periodes))
+        toRemove: "list[Periode]" = []
+        toSubstract: "list[Periode]" = []
+        for periode in periodes:
+            storedPeriode: "Periode|None" = self.__allPeriodes.getPeriode(periode.startTime)
+            if storedPeriode == periode:
+                toRemove.append(storedPeriode)
+            elif self.__replaying is True:
+                toSubstract.append(periode)
+            else: raise KeyError(f"can't remove the periode: {repr(periode)}, it isn't in the storage")
+        self.__allPeriodes._trusted_removePeriodes(toRemove)
+        for periode in toSubstract:
+            self.__allPeriodes.substractPeriode(periode, histPeriodes=None)
+    
     def _trusted_getConfig(self)->"Configuration":
         if self.__trustMode is False: raise TrustError(self)
         return self.__configuration
@@ -632,13 +1077,228 @@ class FullDatas(PartialyFinalClass, PrettyfyClass, Jsonable):
     
 #########################################################
 
+class DatasSnapshot(FinalClass):
+    """immutable state of a FullDatas at a given point of its history (see FullDatas.takeSnapshot)\n
+    the periodes and activities are immutable => they are shared with the datas"""
+    __slots__ = ("periodes", "registeredActivities", "configuration", "selectedTime", 
+                 "selectedTimeFrame", "clockinTime", "histNodeID", "journalSize", )
+    FAST_SAVE_CHUNK_SIZE: int = 4096
+    """the number of periodes encoded at once by the fast json save"""
+    FAST_SAVE_MIN_PERIODES: int = 20_000
+    """from this number of periodes, .saveToPath(...) use the fast json save 
+    (the pretty json is only usefull to read / diff the small files)"""
+    
+    def __init__(self, periodes:"tuple[Periode, ...]", registeredActivities:"frozenset[Activity]",
+                 configuration:"Configuration", selectedTime:"datetime", selectedTimeFrame:"_TimeFrame",
+                 clockinTime:"datetime|None", histNodeID:int, journalSize:int) -> None:
+        self.periodes: "tuple[Periode, ...]" = periodes
+        """all the periodes (sorted)"""
+        self.registeredActivities: "frozenset[Activity]" = registeredActivities
+        self.configuration: "Configuration" = configuration
+        """a copy of the configuration (it is mutable)"""
+        self.selectedTime: "datetime" = selectedTime
+        self.selectedTimeFrame: "_TimeFrame" = selectedTimeFrame
+        self.clockinTime: "datetime|None" = clockinTime
+        self.histNodeID: int = histNodeID
+        """the node of the history when the snapshot was taken"""
+        self.journalSize: int = journalSize
+        """the number of entries in the journal when the snapshot was taken"""
+    
+    def toJson(self)->"AsJson_FullDatas":
+        return self.__toJson(periodes=[periode.toJson() for periode in self.periodes])
+    
+    def __toJson(self, periodes:"list[AsJson_Periode]")->"AsJson_FullDatas":
+        clockinTime: "AsJson_Datetime|None" = \
+            (None if self.clockinTime is None else datetimeToJson(self.clockinTime))
+        return AsJson_FullDatas(
+            cls=FullDatas.__name__,
+            periodes=periodes,
+            registeredActivities= \
+                [activity.toJson() for activity in self.registeredActivities],
+            configuration=self.configuration.toJson(),
+            selectedTime=datetimeToJson(self.selectedTime),
+            selectedTimeFrame=timeFrameToJson(self.selectedTimeFrame),
+            clockinTime=clockinTime)
+    
+    def saveToBinaryFile(self, file:BinaryIO)->None:
+        """save the snapshot to a file in the binary format (see binarySaveFormat), in a single write"""
+        file.write(encodeBinaryDatas(
+            self.__toJson(periodes=[]), 
+            map(Periode.toBinary, self.periodes)))
+    
+    def saveToFile(self, file:TextIO, compact:"_JsonCompactMode"=False)->None:
+        """save the snapshot to a file in the json format\n
+        `compact`: False -> semi compact pretty json, True -> compact pretty json, 
+        "fast" -> not pretty, streamed with the C json encoder (see .__saveToFileFast)"""
+        if compact == "fast":
+            return self.__saveToFileFast(file)
+        prettyPrintToJSON(
+            self.toJson(), stream=file, end=None,
+            indentSequence=" "*2, 
+            compact=(compact or JSON_SEMI_COMPACT_ARGS))
+    
+    def __saveToFileFast(self, file:TextIO)->None:
+        """write the json without formatting, the periodes are converted and encoded 
+        by chunks (a single call to the C encoder per chunk), the full json is never built"""
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        metadatas: "AsJson_FullDatas" = self.__toJson(periodes=[])
+        file.write("{")
+        for index, (key, value) in enumerate(metadatas.items()):
+            if index != 0: file.write(",")
+            file.write(encoder.encode(key) + ":")
+            if key != "periodes":
+                file.write(encoder.encode(value))
+                continue
+            # => stream the periodes
+            file.write("[")
+            for start in range(0, len(self.periodes), DatasSnapshot.FAST_SAVE_CHUNK_SIZE):
+                if start != 0: file.write(",")
+                chunk: "list[AsJson_Periode]" = [
+                    periode.toJson() for periode in 
+                    self.periodes[start: start+DatasSnapshot.FAST_SAVE_CHUNK_SIZE]]
+                file.write(encoder.encode(chunk)[1: -1]) # => without the [ ]
+            file.write("]")
+        file.write("}")
+    
+    def saveToPath(self, path:"Path")->None:
+        """atomically save the snapshot to the file at `path` (its suffix select the format)\n
+        it is written to a temp file that replace the file once complete (see atomicSave), 
+        when it fails the file is left untouched\n
+        the big json saves use the fast mode (see FAST_SAVE_MIN_PERIODES), 
+        the compressed json saves (.gz / .xz) always use it\n
+        the sharded datas can't be saved from a snapshot (see FullDatas.saveToPath)"""
+        if isShardedPath(path):
+            raise ValueError(f"can't save a snapshot as sharded datas: {path}")
+        compression: "_Compression|None" = getCompression(path)
+        if path.suffix == BINARY_FILE_EXTENSION:
+            with atomicWriteBinary(path) as binaryFile:
+                self.saveToBinaryFile(binaryFile)
+        elif compression is not None: # => compressed json (always streamed)
+            with atomicWriteCompressedText(path, compression, encoding=FILE_ENCODING) as file:
+                self.saveToFile(file, compact="fast")
+        else: # => json
+            with atomicWriteText(path, encoding=FILE_ENCODING) as file:
+                self.saveToFile(file, compact=(
+                    "fast" if len(self.periodes) >= DatasSnapshot.FAST_SAVE_MIN_PERIODES else False))
+        # => the load cache of the replaced file is outdated
+        removeLoadCache(path)
+
+
+class ShardSummary(FinalClass, Jsonable):
+    """the summary of a shard of sharded datas (see shardedSave)\n
+    it answer the global queries (counts, totals, bounds) without loading the periodes of the shard"""
+    __slots__ = ("monthKey", "fileName", "nbPeriodes", "firstStartTime", "lastEndTime", 
+                 "activitiesCount", "activitiesDuration", "bucketsDuration", )
+    
+    def __init__(self, monthKey:int, fileName:str, nbPeriodes:int, 
+                 firstStartTime:datetime, lastEndTime:datetime, 
+                 activitiesCount:"dict[Activity, int]", 
+                 activitiesDuration:"dict[Activity, timedelta]", 
+                 bucketsDuration:"dict[_TimeFrame_literals, dict[int, timedelta]]|None") -> None:
+        self.monthKey: int = monthKey
+        self.fileName: str = fileName
+        self.nbPeriodes: int = nbPeriodes
+        self.firstStartTime: datetime = firstStartTime
+        self.lastEndTime: datetime = lastEndTime
+        """the end of the last periode (it can be in the next months)"""
+        self.activitiesCount: "dict[Activity, int]" = activitiesCount
+        self.activitiesDuration: "dict[Activity, timedelta]" = activitiesDuration
+        self.bucketsDuration: "dict[_TimeFrame_literals, dict[int, timedelta]]|None" = bucketsDuration
+        """the cumulated duration per bucket of each time frame, like the rollups of a PeriodesStorage 
+        (None -> the shard was summarized before they were added)"""
+    
+    @classmethod
+    def fromPeriodes(cls, monthKey:int, fileName:str, periodes:"Sequence[Periode]")->"ShardSummary":
+        """summarize the (sorted, not empty) `periodes` of the shard"""
+        activitiesCount: "dict[Activity, int]" = DefaultDict(lambda: 0)
+        activitiesDuration: "dict[Activity, timedelta]" = DefaultDict(lambda: timedelta(0))
+        bucketsDuration: "dict[_TimeFrame_literals, dict[int, timedelta]]" = {
+            timeFrame: DefaultDict(lambda: timedelta(0)) for timeFrame in get_args(_TimeFrame_literals)}
+        for periode in periodes:
+            activitiesCount[periode.activity] += 1
+            activitiesDuration[periode.activity] += periode.duration
+            for timeFrame, totals in bucketsDuration.items():
+                for key, duration in durationPerBucket(periode.startTime, periode.endTime, timeFrame).items():
+                    totals[key] += duration
+        return ShardSummary(
+            monthKey=monthKey, fileName=fileName, nbPeriodes=len(periodes), 
+            firstStartTime=periodes[0].startTime, lastEndTime=periodes[-1].endTime,
+            activitiesCount=dict(activitiesCount), activitiesDuration=dict(activitiesDuration),
+            bucketsDuration={timeFrame: dict(totals) for timeFrame, totals in bucketsDuration.items()})
+    
+    @property
+    def totalDuration(self)->timedelta:
+        return sum(self.activitiesDuration.values(), timedelta(0))
+    
+    def intersect(self, startTime:datetime, endTime:datetime)->bool:
+        """tell whether a periode of the shard intersect (or touch) [`startTime`, `endTime`]"""
+        return (self.firstStartTime <= endTime) and (self.lastEndTime >= startTime)
+    
+    def toJson(self)->"AsJson_ShardSummary":
+        return AsJson_ShardSummary(
+            cls=self.__class__.__name__, monthKey=self.monthKey, 
+            fileName=self.fileName, nbPeriodes=self.nbPeriodes,
+            firstStartTime=datetimeToJson(self.firstStartTime),
+            lastEndTime=datetimeToJson(self.lastEndTime),
+            activities=[
+                (activity.toJson(), count, 
+                 PrettyTimedelta.fromTimedelta(self.activitiesDuration[activity]).toJson())
+                for activity, count in self.activitiesCount.items()],
+            buckets=({} if self.bucketsDuration is None else {
+                timeFrame: [(key, PrettyTimedelta.fromTimedelta(duration).toJson())
+                            for key, duration in totals.items()]
+                for timeFrame, totals in self.bucketsDuration.items()}))
+    
+    @classmethod
+    def fromJson(cls, datas:"AsJson_ShardSummary")->"Self":
+        assert datas["cls"] == cls.__name__
+        activitiesCount: "dict[Activity, int]" = {}
+        activitiesDuration: "dict[Activity, timedelta]" = {}
+        for activityDatas, count, durationDatas in datas["activities"]:
+            activity: "Activity" = Activity.fromJson(activityDatas)
+            activitiesCount[activity] = count
+            activitiesDuration[activity] = PrettyTimedelta.fromJson(durationDatas)
+        bucketsDuration: "dict[_TimeFrame_literals, dict[int, timedelta]]|None" = {
+            timeFrame: {key: PrettyTimedelta.fromJson(durationDatas) for key, durationDatas in totalsDatas}
+            for timeFrame, totalsDatas in datas.get("buckets", {}).items()}
+        if set(bucketsDuration.keys()) != set(get_args(_TimeFrame_literals)):
+            bucketsDuration = None # => written before the buckets were added
+        summary = ShardSummary.__new__(cls)
+        ShardSummary.__init__(
+            self=summary, monthKey=datas["monthKey"], fileName=datas["fileName"],
+            nbPeriodes=datas["nbPeriodes"],
+            firstStartTime=datetimeFromJson(datas["firstStartTime"]),
+            lastEndTime=datetimeFromJson(datas["lastEndTime"]),
+            activitiesCount=activitiesCount, activitiesDuration=activitiesDuration, 
+            bucketsDuration=bucketsDuration)
+        return summary
+
+
+class _ShardsState(FinalClass):
+    """the state of the sharded datas a FullDatas was loaded from / saved to"""
+    __slots__ = ("directory", "generation", "summaries", "unloaded", )
+    
+    def __init__(self, directory:"Path", generation:int, 
+                 summaries:"dict[int, ShardSummary]", unloaded:"set[int]") -> None:
+        self.directory: "Path" = directory
+        self.generation: int = generation
+        """the generation of the last save (see shardedSave)"""
+        self.summaries: "dict[int, ShardSummary]" = summaries
+        """the summary of each shard on the disk (per month key)"""
+        self.unloaded: "set[int]" = unloaded
+        """the keys of the shards whose periodes aren't loaded yet"""
 
-
+#########################################################
 
 
 class PeriodesStorage(PartialyFinalClass, Generic[_T_TimeID], PrettyfyClass):
-    __slots__ = ("timeframe", "__periodes", "__activitiesUsageCount", "__frozen")
-    __finals__ = {"timeframe", "__periodes", "__activitiesUsageCount"}
+    BULK_EXTENDS_MIN_SIZE: int = 16
+    """from this number of periodes, .extends(...) use the sort and sweep merging"""
+    __slots__ = ("timeframe", "__periodes", "__activitiesUsageCount", "__activitiesDuration",
+                 "__durationIndex", "__rollups", "__sortedIndexes", "__modifiedBuckets", "__frozen")
+    __finals__ = {"timeframe", "__activitiesUsageCount", "__activitiesDuration", 
+                  "__durationIndex", "__rollups", "__sortedIndexes", "__modifiedBuckets"}
+    # __periodes isn't final: it is rebuilt in one pass by the bulk extends
     
     def __init__(self, timeID:"_T_TimeID", periodes:"Iterable[Periode]|None", 
                  histActions:"HistoryPeriodesActions|None") -> None:
@@ -647,6 +1307,16 @@ class PeriodesStorage(PartialyFinalClass, Generic[_T_TimeID], PrettyfyClass):
         self.__periodes: "SkipList[Periode, datetime]" = \
             SkipList([], lambda periode: periode.startTime)
         self.__activitiesUsageCount: "dict[Activity, int]" = DefaultDict(lambda: 0)
+        self.__activitiesDuration: "dict[Activity, timedelta]" = DefaultDict(lambda: timedelta(0))
+        """the cumulated duration of the periodes of each activity (maintained with the counts)"""
+        self.__durationIndex: "DurationPrefixIndex" = DurationPrefixIndex()
+        self.__rollups: "dict[_TimeFrame_literals, CalendarRollupsIndex]" = {}
+        """the calendar rollups, created when first needed (see .getRollup(...))"""
+        self.__sortedIndexes: "dict[_PeriodeFields_sortable, SortedFieldIndex]" = {}
+        """the secondary indexes of the fields (other than the start/end times), 
+        created when first needed (see .iterPeriodes_sortedByfield(...))"""
+        self.__modifiedBuckets: "dict[_TimeFrame_literals, ModifiedBucketsIndex]" = {}
+        """track the modified buckets, created when first needed (see .getModifiedBuckets(...))"""
         if periodes is not None:
             self.extends(periodes, histPeriodes=histActions)
     
@@ -667,36 +1337,167 @@ class PeriodesStorage(PartialyFinalClass, Generic[_T_TimeID], PrettyfyClass):
         intersectWith: "list[Periode]" = self.__periodes.popSubList(startKey=periode.startTime, endKey=periode.endTime)
         """all the periodes that intersect with `periode`"""
         # it can also intersect with the periode that start before `periode`
-        try:
-            periodeBefore: Periode = \
-                self.__periodes.popBefore(periode.startTime)
+        try: periodeBefore: Periode = self.__periodes.getBefore(periode.startTime)
+        except KeyError: pass # no periodes before
+        else: 
             if periode.intersect(periodeBefore):
+                self.__periodes.remove(periodeBefore.startTime)
                 intersectWith.append(periodeBefore)
-            else: self.__periodes.append(periodeBefore)
-        except KeyError: pass # no periodes before
         if len(intersectWith) == 0:
             # => new periode don't intersect with any periode of the storage
             self.__periodes.append(periode)
             # => all periodes of the storage don't intersect each other => finished
-            self.__updateActivitiesCounts("added", [periode])
+            self.__periodesUpdated("added", [periode])
             if histPeriodes is not None: histPeriodes.periodesAdded([periode])
             return None        
         ### merge the periodes
-        self.__updateActivitiesCounts("removed", intersectWith)
+        self.__periodesUpdated("removed", intersectWith)
         if histPeriodes is not None: histPeriodes.periodesRemoved(intersectWith)
         # => `periode` intersect with all periodes in the sub list
         mergedPeriode: Periode = periode.mergeWithMultiple(intersectWith)
         self.__periodes.append(mergedPeriode)
         # => all periodes of the storage don't intersect each other => finished
-        self.__updateActivitiesCounts("added", [mergedPeriode])
+        self.__periodesUpdated("added", [mergedPeriode])
         if histPeriodes is not None: histPeriodes.periodesAdded([mergedPeriode])
         return None
         
     def extends(self, periodes:"Iterable[Periode]", histPeriodes:"HistoryPeriodesActions|None")->None:
         """add multiple periodes please refer to the docstring of .addPeriode(...) for more details\n
+        large batches are merged in a single sweep (see .__bulkExtends(...))\n
         if an error happend you should revert the history"""
+        periodes = list(periodes)
+        if len(periodes) >= PeriodesStorage.BULK_EXTENDS_MIN_SIZE:
+            return self.__bulkExtends(periodes, histPeriodes=histPeriodes)
         for periode in periodes:
             self.addPeriode(periode, histPeriodes=histPeriodes)
+
+    def loadPeriodes(self, periodes:"Sequence[Periode]")->None:
+        """add periodes that should already be normalized (loaded from a save), with no history\n
+        when they pass the checks of .__canInsertDirectly(...) they are inserted directly
+        (no merging), otherwise they are safely added with .extends(...)"""
+        if self.__frozen is True: raise ValueError("can't add periodes on a frozen periodes storage")
+        if len(periodes) == 0:
+            return None
+        if self.__canInsertDirectly(periodes):
+            self._trusted_addPeriodes(periodes)
+        else: self.extends(periodes, histPeriodes=None)
+
+    def __canInsertDirectly(self, periodes:"Sequence[Periode]")->bool:
+        """tell whether the `periodes` can be inserted without merging, in a single linear pass:
+         - they are sorted, disjoint and don't touch each other (the invariant of the storage)
+         - they fit in the timeframe of the storage (when setted)
+         - no periode of the storage intersect (or touch) the span of the `periodes`"""
+        prevPeriode: "Periode|None" = None
+        for periode in periodes:
+            if (prevPeriode is not None) and (prevPeriode.endTime >= periode.startTime):
+                return False # => not sorted or intersect / touch the previous periode
+            prevPeriode = periode
+        spanStart: datetime = periodes[0].startTime
+        spanEnd: datetime = periodes[-1].endTime
+        if (self.timeframe is not None) and ((spanStart < self.timeframe.startTime)
+                                             or (spanEnd > self.timeframe.endTime)):
+            return False
+        try: periodeBefore: "Periode" = self.__periodes.getBefore(spanStart)
+        except KeyError: pass # => no periodes before
+        else:
+            if periodeBefore.endTime >= spanStart:
+                return False
+        return self.__periodes.getSubListView(startKey=spanStart, endKey=spanEnd) is None
+
+    def __bulkExtends(self, periodes:"list[Periode]", histPeriodes:"HistoryPeriodesActions|None")->None:
+        """add all the `periodes` like multiple .addPeriode(...) would do, but in O(n log n):
+         - sort the new periodes once
+         - merge them with the periodes of the storage they intersect in a single sweep
+         - rebuild the skip list in one pass when the storage was empty or is heavily modified\n
+        the groups of intersecting periodes are merged like sequential .addPeriode(...) would do\n
+        no needs to revert the hist if an error is raised, there will be no modifications done"""
+        if self.__frozen is True: raise ValueError("can't add periodes on a frozen periodes storage")
+        if self.timeframe is not None:
+            for periode in periodes:
+                if self.timeframe.fullyContain(periode) is False:
+                    raise ValueError(f"this storage with a setted timeID of {self.timeframe} can't fully contain the periode trying to added: {repr(periode)}")
+        # => all the periodes can be added to this storage
+        if len(periodes) == 0:
+            return None # => nothing to add
+        newPeriodes: "list[tuple[datetime, int, Periode]]" = \
+            sorted(((periode.startTime, index, periode) for index, periode in enumerate(periodes)),
+                   key=lambda item: item[0])
+        """(startTime, insertion index, periode) sorted by startTime"""
+        spanStartTime: datetime = newPeriodes[0][0]
+        spanEndTime: datetime = max(periode.endTime for periode in periodes)
+        # get the periodes of the storage that can be merged (don't modify the storage yet)
+        oldPeriodes: "list[tuple[datetime, int, Periode]]" = []
+        """(startTime, -1, periode) sorted by startTime"""
+        try: periodeBefore: "Periode" = self.__periodes.getBefore(spanStartTime)
+        except KeyError: pass # no periodes before
+        else: 
+            if periodeBefore.endTime >= spanStartTime:
+                oldPeriodes.append((periodeBefore.startTime, -1, periodeBefore))
+        for periode in (self.__periodes.getSubListView(startKey=spanStartTime, endKey=spanEndTime) or ()):
+            if periode.startTime > spanEndTime:
+                break
+            oldPeriodes.append((periode.startTime, -1, periode))
+        ### sweep the two sorted lists to find the groups of intersecting periodes
+        removedPeriodes: "list[Periode]" = []
+        addedPeriodes: "list[Periode]" = []
+        group: "list[tuple[datetime, int, Periode]]" = []
+        groupEndTime: "datetime|None" = None
+        for item in heapq.merge(oldPeriodes, newPeriodes, key=lambda item: item[0]):
+            if (groupEndTime is not None) and (item[0] <= groupEndTime):
+                # => intersect with the current group
+                group.append(item)
+                groupEndTime = max(groupEndTime, item[2].endTime)
+                continue
+            # => start a new group
+            self.__mergeGroup(group, removed=removedPeriodes, added=addedPeriodes)
+            group = [item]
+            groupEndTime = item[2].endTime
+        self.__mergeGroup(group, removed=removedPeriodes, added=addedPeriodes)
+        ### applie the modifications (no errors can happend from here)
+        if (len(self.__periodes) == len(removedPeriodes)) \
+                or (len(addedPeriodes) + len(removedPeriodes) > len(self.__periodes)):
+            # => rebuild the whole skip list in one pass
+            removedStartTimes: "set[datetime]" = {periode.startTime for periode in removedPeriodes}
+            keptPeriodes: "list[Periode]" = [
+                periode for periode in self.__periodes 
+                if periode.startTime not in removedStartTimes]
+            self.__periodes = SkipList(
+                list(heapq.merge(keptPeriodes, addedPeriodes, key=lambda periode: periode.startTime)),
+                lambda periode: periode.startTime)
+        else: # => only a few periodes are modified
+            for periode in removedPeriodes:
+                self.__periodes.remove(periode.startTime)
+            self.__periodes.extend(addedPeriodes)
+        self.__periodesUpdated("removed", removedPeriodes)
+        if histPeriodes is not None: histPeriodes.periodesRemoved(removedPeriodes)
+        self.__periodesUpdated("added", addedPeriodes)
+        if histPeriodes is not None: histPeriodes.periodesAdded(addedPeriodes)
+    
+    @staticmethod
+    def __mergeGroup(group:"list[tuple[datetime, int, Periode]]", 
+                     removed:"list[Periode]", added:"list[Periode]")->None:
+        """merge a `group` of intersecting periodes (from the bulk extends)\n
+        the periodes of the storage (index of -1) to remove are put in `removed`, the new ones in `added`\n
+        the new periodes are merged in their insertion order, with the same checks and 
+        the same activity / comments as .addPeriode(...) (=> both always give the same result)"""
+        newItems = [item for item in group if item[1] != -1]
+        if len(newItems) == 0:
+            return None # => only a periode of the storage, keep it
+        if len(group) == 1:
+            # => a new periode that don't intersect anything
+            added.append(group[0][2])
+            return None
+        # => add the new periodes one by one on the periodes of the group (sorted, disjoint)
+        merged: "list[Periode]" = [periode for (_, index, periode) in group if index == -1]
+        for (_, _, periode) in sorted(newItems, key=lambda item: item[1]):
+            # the periodes that intersect (or touch) it are contiguous
+            start: int = bisect.bisect_left(merged, periode.startTime, key=lambda other: other.endTime)
+            end: int = bisect.bisect_right(merged, periode.endTime, key=lambda other: other.startTime)
+            merged[start: end] = [periode.mergeWithMultiple(merged[start: end])]
+        # => the group is connected => a single periode
+        assert len(merged) == 1
+        removed.extend(periode for (_, index, periode) in group if index == -1)
+        added.append(merged[0])
         
     def substractPeriode(self, periode:"Periode", histPeriodes:"HistoryPeriodesActions|None")->None:
         """substract a periode of the storage\n
@@ -708,53 +1509,91 @@ class PeriodesStorage(PartialyFinalClass, Generic[_T_TimeID], PrettyfyClass):
         intersectWith: "list[Periode]" = self.__periodes.popSubList(startKey=periode.startTime, endKey=periode.endTime)
         """all the periodes that intersect with `periode`"""
         # it can also intersect with the periode that start before `periode`
-        try:
-            periodeBefore: Periode = \
-                self.__periodes.popBefore(periode.startTime)
+        try: periodeBefore: Periode = self.__periodes.getBefore(periode.startTime)
+        except KeyError: pass # no periodes before
+        else: 
             if periode.intersect(periodeBefore):
+                self.__periodes.remove(periodeBefore.startTime)
                 intersectWith.append(periodeBefore)
-            else: self.__periodes.append(periodeBefore)
-        except KeyError: pass # no periodes before
         ### substract to the periodes
         if len(intersectWith) == 0:
             # => the periode to remove don't intersect with any periode of the storage => finished
             return None
-        self.__updateActivitiesCounts("removed", intersectWith)
+        self.__periodesUpdated("removed", intersectWith)
         if histPeriodes is not None: histPeriodes.periodesRemoved(intersectWith)
         substractedPeriodes: "list[Periode]" = []
         for currentPeriode in intersectWith:
             substractedPeriodes.extend(periode.substractOf(currentPeriode))
         self.__periodes.extend(substractedPeriodes)
-        self.__updateActivitiesCounts("added", substractedPeriodes)
+        self.__periodesUpdated("added", substractedPeriodes)
         if histPeriodes is not None: histPeriodes.periodesAdded(substractedPeriodes)
         return None
         
         
     def getSubset(self, timeID:"_TimeID")->"PeriodesStorage[_TimeID]":
-        """get a frozen subset of all the periodes inside the given `timeID`"""
-        subPeriodes: "Iterable[Periode]|None" = \
-            self.__periodes.getSubListView(startKey=timeID.startTime, endKey=timeID.endTime)
-        # transfert 
-        if subPeriodes is None: 
-            subPeriodes = []
-        # => subPeriodes is now an iterable only
-        subStorage: "PeriodesStorage[_TimeID]" = \
-            PeriodesStorage(
-                timeID=timeID, histActions=None, periodes=(
-                    periode.intersection(timeID, commentsMerge="self", requirePeriode=True) for periode in subPeriodes))
-        # add the periode before (to add its intersection)
+        """get a frozen subset of all the periodes inside the given `timeID`\n
+        (prefer .getSubsetView(...) when the periodes are only read)"""
+        # the periodes of self are alredy disjoint => no need to merge them again
+        return self.getSubsetView(timeID).toStorage()
+    
+    def getSubsetView(self, timeID:"_TimeID")->"PeriodesStorageView":
+        """get a read-only view of the periodes inside the given `timeID` (nothing is copied)"""
+        return PeriodesStorageView(storage=self, timeID=timeID)
+    
+    def iterPeriodesIn(self, timeID:"_TimeID")->"Iterator[Periode]":
+        """iterate (by startTime) over the periodes inside the given `timeID`\n
+        only the periodes that cross the bounds of `timeID` are clipped (new periodes), 
+        the others are the periodes of the storage"""
+        # the periode before might end inside the timeID
         try: periodeBefore: "Periode" = self.__periodes.getBefore(timeID.startTime)
         except KeyError: pass # => there is no periode before the start key
-        else: # add the periode if it is inside the given timeID
-            if periodeBefore.endTime >= timeID.startTime:
-                subStorage.addPeriode(periodeBefore.intersection(timeID, commentsMerge="self", requirePeriode=True), histPeriodes=None)
-        # freez the subset to make it safer to use
-        return subStorage.freez()
+        else:
+            clippedPeriode: "Periode|None" = periodeBefore.intersection(
+                timeID, commentsMerge="self", requirePeriode=False)
+            if clippedPeriode is not None:
+                yield clippedPeriode
+        subPeriodes: "Iterable[Periode]|None" = \
+            self.__periodes.getSubListView(startKey=timeID.startTime, endKey=timeID.endTime)
+        if subPeriodes is None:
+            return None # => no periodes starting inside the timeID
+        for periode in subPeriodes:
+            if periode.startTime >= timeID.endTime:
+                break # => after the timeID
+            if periode.endTime <= timeID.endTime:
+                yield periode # => fully inside
+                continue
+            # => the last periode, it overflow the timeID
+            clippedPeriode = periode.intersection(
+                timeID, commentsMerge="self", requirePeriode=False)
+            if clippedPeriode is not None:
+                yield clippedPeriode
+    
+    def getPeriodesStartingIn(self, startTime:datetime, endTime:datetime)->"list[Periode]":
+        """return the periodes (not clipped) that start in [`startTime`, `endTime`["""
+        subPeriodes: "Iterable[Periode]|None" = \
+            self.__periodes.getSubListView(startKey=startTime, endKey=endTime)
+        if subPeriodes is None:
+            return [] # => no periodes starting inside
+        return [periode for periode in subPeriodes 
+                if startTime <= periode.startTime < endTime]
     
     def getPeriodes_sortedByfield(self, field:"_PeriodeFields_sortable", ascendingOrder:bool=True)->"list[Periode]":
-        return sorted(
-            self.__periodes, key=lambda periode: getattr(periode, field),
-            reverse=(not ascendingOrder))
+        return list(self.iterPeriodes_sortedByfield(field, ascendingOrder))
+    
+    def iterPeriodes_sortedByfield(self, field:"_PeriodeFields_sortable", ascendingOrder:bool=True)->"Iterator[Periode]":
+        """iterate over the periodes sorted by the `field` (linear walk, no sorting)\n
+        the periodes are disjoint => the startTime order is also the endTime order, 
+        the other fields use a secondary index (created on the first call and then maintained)"""
+        if field in ("startTime", "endTime"):
+            if ascendingOrder is True:
+                return iter(self.__periodes)
+            return reversed(list(self.__periodes))
+        sortedIndex: "SortedFieldIndex|None" = self.__sortedIndexes.get(field, None)
+        if sortedIndex is None:
+            sortedIndex = SortedFieldIndex(field)
+            sortedIndex.added(self.__periodes)
+            self.__sortedIndexes[field] = sortedIndex
+        return sortedIndex.iterPeriodes(ascendingOrder)
     
     def getAllPeriodesInterval(self)->"_TimeID|_T_TimeID":
         """return the precise interval that holds all the periodes\n
@@ -771,8 +1610,12 @@ class PeriodesStorage(PartialyFinalClass, Generic[_T_TimeID], PrettyfyClass):
         return iter(self.__periodes)
     def isEmpty(self)->bool: 
         return (len(self.__periodes) == 0)
-    def cumulatedDuration(self)->"timedelta":
-        return sum((periode.duration for periode in self.__periodes), timedelta(0))
+    def cumulatedDuration(self, timeID:"_TimeID|None"=None)->"timedelta":
+        """return the cumulated duration of the periodes (clipped to the `timeID` if given)\n
+        it don't iterate over the periodes, it use the duration index"""
+        if timeID is None:
+            return self.__durationIndex.totalDuration()
+        return self.__durationIndex.durationIn(timeID.startTime, timeID.endTime)
     
     def getPeriode(self, startTime:datetime, default:"_T"=None)->"Periode|_T":
         """try to get the periode with this start time"""
@@ -791,13 +1634,65 @@ class PeriodesStorage(PartialyFinalClass, Generic[_T_TimeID], PrettyfyClass):
             storage.freez()
         return result
     
+    def __periodesUpdated(self, actionPeridoes:"Literal['added', 'removed']", 
+                          periodes:"Sequence[Periode]")->None:
+        """update the activity counts and the indexes after some periodes were added/removed"""
+        self.__updateActivitiesCounts(actionPeridoes, periodes)
+        if actionPeridoes == "added":
+            self.__durationIndex.added(periodes)
+            for rollup in self.__rollups.values():
+                rollup.added(periodes)
+            for sortedIndex in self.__sortedIndexes.values():
+                sortedIndex.added(periodes)
+            for modifiedBuckets in self.__modifiedBuckets.values():
+                modifiedBuckets.added(periodes)
+        else: 
+            self.__durationIndex.removed(periodes)
+            for rollup in self.__rollups.values():
+                rollup.removed(periodes)
+            for sortedIndex in self.__sortedIndexes.values():
+                sortedIndex.removed(periodes)
+            for modifiedBuckets in self.__modifiedBuckets.values():
+                modifiedBuckets.removed(periodes)
+    
+    def getRollup(self, timeFrame:"_TimeFrame_literals")->"CalendarRollupsIndex":
+        """return the per bucket durations of the `timeFrame`\n
+        the rollup is created on the first call and then maintained on every add/remove"""
+        rollup: "CalendarRollupsIndex|None" = self.__rollups.get(timeFrame, None)
+        if rollup is None:
+            rollup = CalendarRollupsIndex(timeFrame)
+            rollup.added(self.__periodes)
+            self.__rollups[timeFrame] = rollup
+        return rollup
+    
+    def getModifiedBuckets(self, timeFrame:"_TimeFrame_literals")->"ModifiedBucketsIndex":
+        """return the buckets of the `timeFrame` modified since the tracking started\n
+        the tracking start on the first call for this `timeFrame`"""
+        modifiedBuckets: "ModifiedBucketsIndex|None" = self.__modifiedBuckets.get(timeFrame, None)
+        if modifiedBuckets is None:
+            modifiedBuckets = ModifiedBucketsIndex(timeFrame)
+            self.__modifiedBuckets[timeFrame] = modifiedBuckets
+        return modifiedBuckets
+    
     def __updateActivitiesCounts(self, actionPeridoes:"Literal['added', 'removed']", 
                                  periodes:"Sequence[Periode]")->None:
         if actionPeridoes not in ("added", "removed"):
             raise ValueError(f"invalide action: {actionPeridoes}")
         delta = (-1 if actionPeridoes == "removed" else +1)
         for periode in periodes:
-            self.__activitiesUsageCount[periode.activity] += delta
+            activity: "Activity" = periode.activity
+            count: int = self.__activitiesUsageCount[activity] + delta
+            if count == 0:
+                # => no more periodes with this activity
+                del self.__activitiesUsageCount[activity]
+                del self.__activitiesDuration[activity]
+            else:
+                self.__activitiesUsageCount[activity] = count
+                self.__activitiesDuration[activity] += periode.duration * delta
+
+    def getUsedActivities(self)->"set[Activity]":
+        """return the activities used by at least one periode"""
+        return set(self.__activitiesUsageCount.keys())
 
     def getActivitiesUsageCount(self, activity:"Activity")->int:
         """tell how much time this activity is used (0 if the activity isn't used, never raise a KeyError)"""
@@ -805,17 +1700,104 @@ class PeriodesStorage(PartialyFinalClass, Generic[_T_TimeID], PrettyfyClass):
             return 0
         return self.__activitiesUsageCount[activity]
 
+    def cumulatedDurationPerActivity(self, timeID:"_TimeID|None"=None)->"dict[Activity, timedelta]":
+        """return the activities used by the periodes and their cumulated duration 
+        (the periodes are clipped to the `timeID` if given)\n
+        without `timeID` it is in O(activities), otherwise only the smallest side 
+        (inside or outside of the `timeID`) of the periodes is iterated"""
+        if timeID is None:
+            return dict(self.__activitiesDuration)
+        nbInside: int = self.__durationIndex.countIn(timeID.startTime, timeID.endTime)
+        if nbInside <= (len(self.__periodes) - nbInside):
+            # => less periodes inside, sum them
+            timePerActivity: "dict[Activity, timedelta]" = DefaultDict(lambda: timedelta(0))
+            for periode in self.iterPeriodesIn(timeID):
+                timePerActivity[periode.activity] += periode.duration
+            return dict(timePerActivity)
+        # => less periodes outside, substract them from the totals
+        timePerActivity = dict(self.__activitiesDuration)
+        for outsideStart, outsideEnd in ((datetime.min, timeID.startTime), (timeID.endTime, datetime.max)):
+            if outsideEnd <= outsideStart:
+                continue # => empty side
+            for periode in self.iterPeriodesIn(_TimeID(outsideStart, outsideEnd)):
+                timePerActivity[periode.activity] -= periode.duration
+        return {activity: duration for activity, duration in timePerActivity.items()
+                if duration != timedelta(0)}
+
     def _trusted_addPeriodes(self, periodes:"Iterable[Periode]")->None:
-        """add the `periodes` without any checks, update the activity counts"""
+        """add the `periodes` without any checks, update the activity counts and the indexes"""
+        periodes = list(periodes)
         for periode in periodes:
             self.__periodes.append(periode)
-            self.__activitiesUsageCount[periode.activity] += 1
+        self.__periodesUpdated("added", periodes)
     
     def _trusted_removePeriodes(self, periodes:"Iterable[Periode]")->None:
-        """remove the `periodes` without any checks, update the activity counts"""
+        """remove the `periodes` without any checks, update the activity counts and the indexes"""
+        periodes = list(periodes)
         for periode in periodes:
             self.__periodes.remove(periode.startTime)
-            self.__activitiesUsageCount[periode.activity] -= 1
+        self.__periodesUpdated("removed", periodes)
+
+class PeriodesStorageView(FinalClass, PrettyfyClass):
+    """read-only view of the periodes of a storage that are inside a `timeframe`\n
+    it don't copy the periodes, only the first and last periodes are clipped when iterating\n
+    the view is live: it reflect the modifications done to its storage"""
+    __slots__ = ("timeframe", "__storage", )
+    
+    def __init__(self, storage:"PeriodesStorage", timeID:"_TimeID") -> None:
+        self.timeframe: "_TimeID" = timeID
+        self.__storage: "PeriodesStorage" = storage
+    
+    def __iter__(self)->"Iterator[Periode]":
+        return self.__storage.iterPeriodesIn(self.timeframe)
+    
+    def isEmpty(self)->bool:
+        for _ in self:
+            return False
+        return True
+    
+    def cumulatedDuration(self)->"timedelta":
+        return self.__storage.cumulatedDuration(self.timeframe)
+    
+    def cumulatedDurationPerActivity(self)->"dict[Activity, timedelta]":
+        return self.__storage.cumulatedDurationPerActivity(self.timeframe)
+    
+    def getPeriode(self, startTime:datetime, default:"_T"=None)->"Periode|_T":
+        """try to get the periode with this start time"""
+        if startTime not in self.timeframe:
+            return default
+        periode: "Periode|None" = self.__storage.getPeriode(startTime)
+        if (periode is not None) and self.timeframe.fullyContain(periode):
+            return periode
+        # => it can be one of the clipped periodes
+        for periode in self:
+            if periode.startTime == startTime:
+                return periode
+            elif periode.startTime > startTime:
+                break
+        return default
+    
+    def getPeriodes_sortedByfield(self, field:"_PeriodeFields_sortable", ascendingOrder:bool=True)->"list[Periode]":
+        allPeriodesInterval: "_TimeID|None" = self.__storage.getAllPeriodesInterval()
+        if (allPeriodesInterval is None) or self.timeframe.fullyContain(allPeriodesInterval):
+            # => no periode is clipped, use the indexes of the storage
+            return self.__storage.getPeriodes_sortedByfield(field, ascendingOrder)
+        if field in ("startTime", "endTime"):
+            # => already iterated in that order
+            periodes: "list[Periode]" = list(self)
+            if ascendingOrder is False:
+                periodes.reverse()
+            return periodes
+        return sorted(
+            self, key=lambda periode: getattr(periode, field),
+            reverse=(not ascendingOrder))
+    
+    def toStorage(self)->"PeriodesStorage[_TimeID]":
+        """materialize the view in a new frozen storage"""
+        storage: "PeriodesStorage[_TimeID]" = PeriodesStorage(
+            timeID=self.timeframe, periodes=None, histActions=None)
+        storage._trusted_addPeriodes(self)
+        return storage.freez()
 
 #########################################################
 
@@ -843,6 +1825,28 @@ class Periode(FinalClass, PrettyfyClass, Jsonable):
         self.activity: "Activity" = activity
         self.comments: str = (Periode.EMPTY_COMMENT if comments is None else comments)
     
+    @classmethod
+    def _trusted_new(cls, startTime:datetime, endTime:datetime, 
+                     activity:"Activity", comments:str)->"Periode":
+        """create a periode without any checks (the values must already be valide)"""
+        periode: "Periode" = cls.__new__(cls)
+        periode.startTime = startTime
+        periode.endTime = endTime
+        periode.activity = activity
+        periode.comments = comments
+        return periode
+    
+    def truncatedToSeconds(self)->"Periode|None":
+        """return the periode with its times truncated to the seconds (the precision of the save files), 
+        self when it already is, None when it is empty once truncated"""
+        if (self.startTime.microsecond == 0) and (self.endTime.microsecond == 0):
+            return self
+        startTime: datetime = self.startTime.replace(microsecond=0)
+        endTime: datetime = self.endTime.replace(microsecond=0)
+        if endTime <= startTime:
+            return None # => the periode was within a second
+        return Periode._trusted_new(startTime, endTime, self.activity, self.comments)
+    
     def copyContent(self, newStartTime:datetime, newEndTime:datetime)->"Periode":
         return Periode(newStartTime, newEndTime, self.activity, self.comments)
     
@@ -1004,7 +2008,12 @@ class Periode(FinalClass, PrettyfyClass, Jsonable):
     
     def splitPer_TimeFrame(self, timeFrame:"_TimeFrame")->"dict[_TimeID, Periode]":
         splits: "dict[_TimeID, Periode]" = {}
-        # ge the _timeID that contain the start of the periode
+        if isinstance(timeFrame, str):
+            # => calendar timeframe, the buckets are directly computed
+            for key, startTime, endTime in splitPerBucket(self.startTime, self.endTime, timeFrame):
+                splits[_TimeID.fromBucketKey(key, timeFrame)] = self.copyContent(startTime, endTime)
+            return splits
+        # => custom timeframe, ge the _timeID that contain the start of the periode
         timeID: _TimeID = _TimeID.getTimeID(self.startTime, timeFrame)
         while self.intersect(timeID):
             intersection: "Periode|None" = self.intersection(timeID, commentsMerge="self", requirePeriode=False)
@@ -1035,6 +2044,12 @@ class Periode(FinalClass, PrettyfyClass, Jsonable):
         )
         return periode
 
+    def toBinary(self)->"AsBinary_Periode":
+        return AsBinary_Periode(
+            startTime=datetimeToMicroseconds(self.startTime),
+            endTime=datetimeToMicroseconds(self.endTime),
+            activity=self.activity.toJson()["activity"], comments=self.comments)
+
     def __hash__(self)->int:
         return hash((self.startTime, self.endTime, self.activity, self.comments))
     
@@ -1081,13 +2096,17 @@ class _TimeID(Periode, addPrettyAttrs_fromBases=False):
     @staticmethod
     def getTimeID(t:datetime, timeFrame:"_TimeFrame")->"_TimeID":
         """return the _TimeID that contain the moment `t` based on the given `timeFrame`"""
-        if timeFrame == "day": return _DayID.fromDatetime(t)
-        elif timeFrame == "week": return _WeekID.fromDatetime(t)
-        elif timeFrame == "month": return _MonthID.fromDatetime(t)
-        elif timeFrame == "year": return _YearID.fromDatetime(t)
-        elif isinstance(timeFrame, _TimeID): return timeFrame.shiftTo(t)
+        if isinstance(timeFrame, _TimeID): return timeFrame.shiftTo(t)
+        elif timeFrame in _CALENDAR_TIMEIDS_CLASSES.keys():
+            return _TimeID.fromBucketKey(bucketKey(t, timeFrame), timeFrame)
         else: raise ValueError(f"invalide timeFrame: {timeFrame}")
     
+    @staticmethod
+    def fromBucketKey(key:int, timeFrame:"_TimeFrame_literals")->"_TimeID":
+        """return the _TimeID of the bucket `key` of the `timeFrame` (see calendarEngine.bucketKey)"""
+        startTime, endTime = bucketBounds(key, timeFrame)
+        return _CALENDAR_TIMEIDS_CLASSES[timeFrame](startTime=startTime, endTime=endTime)
+    
     @classmethod
     def fromDuration(cls, startTime:datetime, duration:timedelta)->"_TimeID":
         return _TimeID(startTime=startTime, endTime=startTime+duration)
@@ -1116,13 +2135,12 @@ class _YearID(_TimeID):
     
     @classmethod
     def fromDatetime(cls, t:datetime) -> "_YearID":
-        return _YearID(startTime=datetime(year=t.year, month=1, day=1),
-                       endTime=datetime(year=t.year+1, month=1, day=1))
+        return _YearID(*bucketBounds(bucketKey(t, "year"), "year"))
         
     def next(self)->"_YearID":
-        return _YearID(startTime=self.endTime, endTime=self.endTime.replace(year=self.endTime.year+1))
+        return _YearID(*bucketBounds(bucketKey(self.startTime, "year") + 1, "year"))
     def prev(self)->"_YearID":
-        return _YearID(startTime=self.startTime.replace(year=self.startTime.year-1), endTime=self.startTime)
+        return _YearID(*bucketBounds(bucketKey(self.startTime, "year") - 1, "year"))
     
     @override
     def prettyText(self)->str: return f"from {prettyDatetime(self.startTime, 'date')} to {prettyDatetime(self.lastTime, 'date')}"
@@ -1132,24 +2150,12 @@ class _MonthID(_TimeID):
     
     @classmethod
     def fromDatetime(cls, t:datetime) -> "_MonthID":
-        return _MonthID(startTime=datetime(year=t.year, month=t.month, day=1), 
-                        endTime=datetime(*cls.__nextMonth(t), day=1))
-    
-    @classmethod
-    def __nextMonth(cls, t:datetime)->"tuple[int, int]":
-        if t.month == 12: return (t.year+1, 1)
-        else: return (t.year, t.month+1)
-    @classmethod
-    def __prevMonth(cls, t:datetime)->"tuple[int, int]":
-        if t.month == 1: return (t.year-1, 12)
-        else: return (t.year, t.month-1)
+        return _MonthID(*bucketBounds(bucketKey(t, "month"), "month"))
     
     def next(self)->"_MonthID":
-        nextEndTime = datetime(*self.__nextMonth(self.endTime), day=1)
-        return _MonthID(startTime=self.endTime, endTime=nextEndTime)
+        return _MonthID(*bucketBounds(bucketKey(self.startTime, "month") + 1, "month"))
     def prev(self)->"_MonthID":
-        prevStartTime = datetime(*self.__prevMonth(self.startTime), day=1)
-        return _MonthID(startTime=prevStartTime, endTime=self.startTime)
+        return _MonthID(*bucketBounds(bucketKey(self.startTime, "month") - 1, "month"))
     
     @override
     def prettyText(self)->str: return f"from {prettyDatetime(self.startTime, 'date')} to {prettyDatetime(self.lastTime, 'date')}"
@@ -1158,9 +2164,7 @@ class _WeekID(_TimeID):
     
     @classmethod
     def fromDatetime(cls, t:datetime) -> "_WeekID":
-        week = t.isocalendar()[1]
-        startTime: datetime =  datetime.strptime(f"{t.year}-{week}-1", "%Y-%W-%w")
-        return _WeekID(startTime=startTime, endTime=startTime+timedelta(days=7))
+        return _WeekID(*bucketBounds(bucketKey(t, "week"), "week"))
     
     @override
     def prettyText(self)->str: return f"from {prettyDatetime(self.startTime, 'date')} to {prettyDatetime(self.lastTime, 'date')}"
@@ -1170,13 +2174,16 @@ class _DayID(_TimeID):
     
     @classmethod
     def fromDatetime(cls, t:datetime) -> "_DayID":
-        startTime: datetime = datetime(year=t.year, month=t.month, day=t.day)
-        return _DayID(startTime=startTime, endTime=startTime+timedelta(days=1))
+        return _DayID(*bucketBounds(bucketKey(t, "day"), "day"))
 
     @override
     def prettyText(self)->str: return f"the {prettyDatetime(self.startTime, 'date')} from {prettyDatetime(self.endTime, 'time')} to {prettyDatetime(self.lastTime, 'time')}"
 
 
+_CALENDAR_TIMEIDS_CLASSES: "dict[_TimeFrame_literals, type[_TimeID]]" = {
+    "day": _DayID, "week": _WeekID, "month": _MonthID, "year": _YearID}
+
+
 
 
 
@@ -1392,24 +2399,341 @@ class Configuration(PrettyfyClass):
 
 #########################################################
     
-class History(_HistoryBackend["HistoryAction"]):
+class _HistoryEntry(FinalClass):
+    """a node of the History: its action is in memory or spilled to the spill file (or both)"""
+    __slots__ = ("nodeID", "size", "action", "spillLocation", "actionName", "creationTime", )
+    def __init__(self, nodeID:int, action:"HistoryAction") -> None:
+        self.nodeID: int = nodeID
+        self.actionName: str = action.__class__.__name__
+        """kept to describe the node without loading its action"""
+        self.creationTime: datetime = datetime.now()
+        self.size: int = action.estimatedSize()
+        """the estimated size of the action (when it is in memory)"""
+        self.action: "HistoryAction|None" = action
+        """None when the action is only in the spill file"""
+        self.spillLocation: "tuple[int, int]|None" = None
+        """where the action was spilled (kept when it is loaded back, the action don't change after)"""
+
+class HistoryNodeInfos(NamedTuple):
+    """describe a node of the History (see History.getNodesInfos())"""
+    nodeID: int
+    actionName: "str|None"
+    """the class of the action that lead to the node (None -> the base node)"""
+    creationTime: "datetime|None"
+    state: "_HistoryNodeState"
+
+class History(_HistoryBackend["_HistoryEntry"]):
+    """the history of the actions done on the datas\n
+    only the actions near the current node are kept in memory (see SPILL_AFTER), 
+    the others are spilled to a temp file (see historySpill) and loaded back when reached\n
+    the actions in memory are bounded in number and in estimated size (see HistoryAction.estimatedSize), 
+    when the budget is exceeded more actions are spilled (without spilling: the oldest actions 
+    are evicted, the state after them become the new baseline, they can't be reverted anymore)\n
+    the backend can't drop its oldest checkpoints, so it is rebuilt with the kept actions, 
+    their node ids change (see .translateNodeID)"""
+    MAX_ACTIONS: int = 2000
+    """the default maximum number of actions kept in memory (undo + redo)"""
+    MAX_SIZE: int = 64 * 1024 * 1024
+    """the default maximum estimated size (in bytes) of the actions kept in memory (undo + redo)"""
+    COMPACTION_RATIO: float = 0.75
+    """when compacting, actions are spilled / evicted until the history use 
+    this ratio of its budget (=> it isn't compacted at each new action)"""
+    COALESCING_WINDOW: float = 3.0
+    """the maximum delay (in seconds) betwin two actions of a coalesced run (see .addAction(...))"""
+    SPILL_AFTER: "int|None" = 200
+    """the default number of actions kept in memory on each side of the current node, 
+    the older ones are spilled (None -> never spill)"""
+    
+    def __init__(self, maxActions:"int|None"=None, maxSize:"int|None"=None) -> None:
+        super().__init__()
+        self.maxActions: int = (History.MAX_ACTIONS if maxActions is None else maxActions)
+        self.maxSize: int = (History.MAX_SIZE if maxSize is None else maxSize)
+        self.spillAfter: "int|None" = History.SPILL_AFTER
+        self.__journal: "list[tuple[_JournalDirection, _HistoryEntry]]" = []
+        """the actions applied / reverted since the last .clearJournal() (in order)"""
+        self.__undoEntries: "list[_HistoryEntry]" = []
+        """the entries that can be reverted (the last is the next to revert)"""
+        self.__redoEntries: "list[_HistoryEntry]" = []
+        """the entries that can be redone (the last is the next to redo)"""
+        self.__baseNodeID: int = super().getCurrentNodeID()
+        """the node id when all the actions are reverted"""
+        self.__nbResident: int = 0
+        """the number of entries with their action in memory"""
+        self.__residentSize: int = 0
+        """the estimated size of the actions in memory"""
+        self.__spillFile: "HistorySpillFile" = HistorySpillFile()
+        self.__remapedNodeIDs: "dict[int, int]" = {}
+        """the new id of the nodes that were rebuilt by a compaction (only the reachable ones)"""
+        self.__coalescingOpen: bool = False
+        """whether the next action can be coalesced with the last one (see .sealLastAction())"""
+        self.__lastActionTime: float = 0.0
+        """the time.monotonic() of the last action added"""
         
     def revertOne(self, datas:FullDatas)->"set[_UpdatedTarget]":
         """try to revert the last action on the `datas`, raise a NoHistoryError if there is no history available"""
-        return super().undoOne().revert(datas)
+        entry: "_HistoryEntry" = super().undoOne()
+        self.__coalescingOpen = False
+        self.__redoEntries.append(self.__undoEntries.pop())
+        self.__journal.append(("reverted", entry))
+        action: "HistoryAction" = self.__loadAction(entry)
+        self.__spillColdEntry(self.__redoEntries)
+        return action.revert(datas)
         
     def redoOne(self, datas:FullDatas)->"set[_UpdatedTarget]":
         """try to redo last action on the `datas`, raise a NoHistoryError if there is no history available"""
-        return super().redoOne().applie(datas)
-
-    def addAction(self, action:"HistoryAction")->None:
-        self.addCheckpoint(value=action)
+        entry: "_HistoryEntry" = super().redoOne()
+        self.__coalescingOpen = False
+        self.__undoEntries.append(self.__redoEntries.pop())
+        self.__journal.append(("applied", entry))
+        action: "HistoryAction" = self.__loadAction(entry)
+        self.__spillColdEntry(self.__undoEntries)
+        return action.applie(datas)
+
+    def revertMany(self, datas:FullDatas, nbActions:int)->"set[_UpdatedTarget]":
+        """revert the last `nbActions` actions on the `datas` and return all their updates, 
+        raise a NoHistoryError (before reverting anything) if there isn't enough history available"""
+        if nbActions > len(self.__undoEntries):
+            raise NoHistoryError(f"can't revert {nbActions} actions, only {len(self.__undoEntries)} available")
+        updates: "set[_UpdatedTarget]" = set()
+        for _ in range(nbActions):
+            updates.update(self.revertOne(datas))
+        return updates
+    
+    def redoMany(self, datas:FullDatas, nbActions:int)->"set[_UpdatedTarget]":
+        """redo the next `nbActions` actions on the `datas` and return all their updates, 
+        raise a NoHistoryError (before redoing anything) if there isn't enough history available"""
+        if nbActions > len(self.__redoEntries):
+            raise NoHistoryError(f"can't redo {nbActions} actions, only {len(self.__redoEntries)} available")
+        updates: "set[_UpdatedTarget]" = set()
+        for _ in range(nbActions):
+            updates.update(self.redoOne(datas))
+        return updates
+    
+    def revertTo(self, datas:FullDatas, nodeID:int)->"set[_UpdatedTarget]":
+        """revert / redo the actions on the `datas` until the node `nodeID` is the current one 
+        and return all their updates (the `nodeID` can be given before the compactions)
+
+        raise a ValueError if the node can't be reached (unknown, evicted or on a discarded branch)"""
+        nodeID = self.translateNodeID(nodeID)
+        if nodeID == self.__baseNodeID:
+            return self.revertMany(datas, len(self.__undoEntries))
+        for index, entry in enumerate(self.__undoEntries):
+            if entry.nodeID == nodeID:
+                return self.revertMany(datas, len(self.__undoEntries) - 1 - index)
+        for index, entry in enumerate(self.__redoEntries):
+            if entry.nodeID == nodeID:
+                return self.redoMany(datas, len(self.__redoEntries) - index)
+        raise ValueError(f"the node {nodeID} can't be reached from the current node")
+    
+    def getNodesInfos(self)->"list[HistoryNodeInfos]":
+        """return the nodes that can be reached, from the base node to the last one that can be redone 
+        (the spilled actions aren't loaded)"""
+        nodes: "list[HistoryNodeInfos]" = [HistoryNodeInfos(
+            nodeID=self.__baseNodeID, actionName=None, creationTime=None, 
+            state=("current" if len(self.__undoEntries) == 0 else "base"))]
+        for index, entry in enumerate(self.__undoEntries):
+            nodes.append(HistoryNodeInfos(
+                nodeID=entry.nodeID, actionName=entry.actionName, creationTime=entry.creationTime, 
+                state=("current" if index == len(self.__undoEntries) - 1 else "applied")))
+        for entry in reversed(self.__redoEntries):
+            nodes.append(HistoryNodeInfos(
+                nodeID=entry.nodeID, actionName=entry.actionName, 
+                creationTime=entry.creationTime, state="reverted"))
+        return nodes
+
+    def addAction(self, action:"HistoryAction", coalesce:bool=False)->None:
+        """add the action as a new node of the history\n
+        `coalesce`: try to merge the action into the last one instead (see HistoryAction.coalesceWith), 
+        only when the last action was added less than COALESCING_WINDOW ago, 
+        it wasn't reverted / redone and it was not sealed since"""
+        now: float = time.monotonic()
+        lastActionTime: float = self.__lastActionTime
+        self.__lastActionTime = now
+        if (coalesce is True) and (self.__coalescingOpen is True) \
+                and (now - lastActionTime <= History.COALESCING_WINDOW) \
+                and (len(self.__redoEntries) == 0) and (len(self.__undoEntries) != 0):
+            lastEntry: "_HistoryEntry" = self.__undoEntries[-1]
+            lastAction: "HistoryAction" = self.__loadAction(lastEntry)
+            if lastAction.coalesceWith(action) is True:
+                # => the last node (and its entry in the journal) now include the action
+                lastSize: int = lastEntry.size
+                lastEntry.size = lastAction.estimatedSize()
+                lastEntry.spillLocation = None # => the spilled version is outdated
+                self.__residentSize += lastEntry.size - lastSize
+                return None
+        self.__coalescingOpen = coalesce
+        # => the actions that could be redone are discarded
+        for entry in self.__redoEntries:
+            self.__forgetEntry(entry)
+        self.__redoEntries.clear()
+        entry = _HistoryEntry(nodeID=-1, action=action)
+        self.addCheckpoint(value=entry)
+        entry.nodeID = super().getCurrentNodeID()
+        self.__undoEntries.append(entry)
+        self.__nbResident += 1
+        self.__residentSize += entry.size
+        self.__journal.append(("applied", entry))
+        self.__spillColdEntry(self.__undoEntries)
+        if self.isOverBudget():
+            self.compact()
+    
+    def sealLastAction(self)->None:
+        """the next actions will not be coalesced with the last one 
+        (needed once the last action is saved: it must not change after)"""
+        self.__coalescingOpen = False
+    
+    def clearHistory(self)->None:
+        super().clearHistory()
+        self.__coalescingOpen = False
+        self.__undoEntries.clear()
+        self.__redoEntries.clear()
+        self.__nbResident = 0
+        self.__residentSize = 0
+        self.__remapedNodeIDs.clear()
+        self.__baseNodeID = super().getCurrentNodeID()
+        # the spill file is closed => the journal must not need it anymore
+        for (_, entry) in self.__journal:
+            if entry.action is None:
+                entry.action = self.__readSpilledAction(entry)
+        self.__spillFile.close()
+    
+    ### spilling
+    
+    def __readSpilledAction(self, entry:"_HistoryEntry")->"HistoryAction":
+        assert entry.spillLocation is not None
+        action = self.__spillFile.read(entry.spillLocation)
+        assert isinstance(action, HistoryAction)
+        return action
+    
+    def __loadAction(self, entry:"_HistoryEntry")->"HistoryAction":
+        """return the action of the `entry`, load it back in memory when it was spilled"""
+        if entry.action is None:
+            entry.action = self.__readSpilledAction(entry)
+            self.__nbResident += 1
+            self.__residentSize += entry.size
+        return entry.action
+    
+    def __spillEntry(self, entry:"_HistoryEntry")->None:
+        """remove the action of the `entry` from memory, write it to the spill file when needed"""
+        if entry.action is None:
+            return None # => already spilled
+        if entry.spillLocation is None:
+            entry.spillLocation = self.__spillFile.write(entry.action)
+        entry.action = None
+        self.__nbResident -= 1
+        self.__residentSize -= entry.size
+    
+    def __forgetEntry(self, entry:"_HistoryEntry")->None:
+        """the `entry` is removed from the history (its spilled action stay in the file)"""
+        if entry.action is not None:
+            self.__nbResident -= 1
+            self.__residentSize -= entry.size
+    
+    def __spillColdEntry(self, entries:"list[_HistoryEntry]")->None:
+        """spill the entry that just went out of the SPILL_AFTER nearest `entries`\n
+        (the current node move by one node at a time => all the entries further are already spilled)"""
+        if (self.spillAfter is not None) and (len(entries) > self.spillAfter):
+            self.__spillEntry(entries[-self.spillAfter - 1])
+    
+    ### budget
+    
+    def getNbActions(self)->int:
+        """the number of actions that can be reverted / redone (in memory or spilled)"""
+        return len(self.__undoEntries) + len(self.__redoEntries)
+    
+    def getNbResidentActions(self)->int:
+        return self.__nbResident
+    
+    def getEstimatedSize(self)->int:
+        """the estimated size of the actions in memory"""
+        return self.__residentSize
+    
+    def getSpilledSize(self)->int:
+        """the size of the spill file (in bytes)"""
+        return self.__spillFile.getSize()
+    
+    def isOverBudget(self)->bool:
+        return (self.__nbResident > self.maxActions) or (self.__residentSize > self.maxSize)
+    
+    def compact(self)->None:
+        """go under COMPACTION_RATIO of the budget: spill the actions furthest from the current node 
+        or, without spilling, evict the oldest actions (that can be reverted)\n
+        the newest action that can be reverted is always kept in memory"""
+        maxActions: int = int(self.maxActions * History.COMPACTION_RATIO)
+        maxSize: int = int(self.maxSize * History.COMPACTION_RATIO)
+        if self.spillAfter is not None:
+            # the oldest undo entries then the furthest redo entries
+            for entry in self.__undoEntries[: -1] + self.__redoEntries:
+                if (self.__nbResident <= maxActions) and (self.__residentSize <= maxSize):
+                    break
+                self.__spillEntry(entry)
+            return None
+        nbActions: int = self.getNbActions()
+        totalSize: int = self.__residentSize
+        nbEvicted: int = 0
+        while ((nbActions > maxActions) or (totalSize > maxSize)) \
+                and (nbEvicted < len(self.__undoEntries) - 1):
+            nbActions -= 1
+            totalSize -= self.__undoEntries[nbEvicted].size
+            nbEvicted += 1
+        if nbEvicted == 0:
+            return None # => nothing can be evicted
+        # => the state after the last evicted action is the new baseline
+        newBaseNodeID: int = self.__undoEntries[nbEvicted - 1].nodeID
+        for entry in self.__undoEntries[: nbEvicted]:
+            self.__forgetEntry(entry)
+        self.__rebuild(keptUndoEntries=self.__undoEntries[nbEvicted: ], newBaseNodeID=newBaseNodeID)
+    
+    def __rebuild(self, keptUndoEntries:"list[_HistoryEntry]", newBaseNodeID:int)->None:
+        """rebuild the backend with only the `keptUndoEntries` and the redo entries 
+        (the nodes before them are lost) and remap their node ids"""
+        redoEntries: "list[_HistoryEntry]" = self.__redoEntries
+        super().clearHistory()
+        remap: "dict[int, int]" = {newBaseNodeID: super().getCurrentNodeID()}
+        self.__baseNodeID = super().getCurrentNodeID()
+        self.__undoEntries = []
+        for entry in keptUndoEntries + redoEntries[::-1]:
+            super().addCheckpoint(value=entry)
+            remap[entry.nodeID] = super().getCurrentNodeID()
+            entry.nodeID = remap[entry.nodeID]
+            self.__undoEntries.append(entry)
+        self.__redoEntries = []
+        for _ in range(len(redoEntries)):
+            super().undoOne()
+            self.__redoEntries.append(self.__undoEntries.pop())
+        # compose with the previous remaps (the unreachable nodes are dropped)
+        self.__remapedNodeIDs = {
+            originalID: remap[nodeID] for (originalID, nodeID) in self.__remapedNodeIDs.items() 
+            if nodeID in remap}
+        self.__remapedNodeIDs.update(remap)
+    
+    def translateNodeID(self, nodeID:int)->int:
+        """the current id of a node given its id before the compactions (the evicted nodes keep their id)"""
+        return self.__remapedNodeIDs.get(nodeID, nodeID)
+    
+    ### journal
+    
+    def getJournal(self)->"list[tuple[_JournalDirection, HistoryAction]]":
+        """return the actions applied / reverted since the last .clearJournal() (in order)\n
+        the spilled actions are read from the spill file (they aren't loaded back in the history)"""
+        return [(direction, (entry.action if entry.action is not None else self.__readSpilledAction(entry)))
+                for (direction, entry) in self.__journal]
+    
+    def getJournalSize(self)->int:
+        return len(self.__journal)
+    
+    def clearJournal(self, upTo:"int|None"=None)->None:
+        """remove the first `upTo` entries of the journal (None -> all)"""
+        if upTo is None: self.__journal.clear()
+        else: del self.__journal[: upTo]
     
 #########################################################
 
 
 class HistoryAction(FinalClass, ABC, PrettyfyClass):
     """abstract base class to describe actions on the datas (to have a simple history)"""
+    ESTIMATED_BASE_SIZE: int = 512
+    """the estimated size of an action (see .estimatedSize())"""
     __slots__ = ("__linkedHists", )
     def __init__(self) -> None:
         self.__linkedHists: "set[HistoryAction]" = set()
@@ -1440,8 +2764,53 @@ class HistoryAction(FinalClass, ABC, PrettyfyClass):
     def isEmpty(self)->bool:
         """return whether the action and the actions linked are empty"""
         return all(hist.isEmpty() for hist in self.__linkedHists)
+    
+    @abstractmethod
+    def toJson(self)->"AsJson_HistoryAction":
+        raise NotImplementedError
+    
+    @staticmethod
+    def actionFromJson(datas:"AsJson_HistoryAction")->"HistoryAction":
+        """create the action with the subclass of datas["cls"]"""
+        actionClass: "type[HistoryAction]|None" = _HISTORY_ACTIONS_CLASSES.get(datas["cls"], None)
+        if actionClass is None:
+            raise ValueError(f"unknown history action class: {datas['cls']}")
+        return actionClass.fromJson(datas)
+    
+    @classmethod
+    @abstractmethod
+    def fromJson(cls, datas:"Any")->"Self":
+        raise NotImplementedError
+    
+    def coalesceWith(self, newerAction:"HistoryAction")->bool:
+        """try to merge the `newerAction` (done right after self) into self, 
+        return whether it was merged (by default the actions can't be merged)"""
+        return False
+    
+    def _coalesceLinked(self, newerAction:"HistoryAction")->bool:
+        """merge the `newerAction` into the linked action of the same class, 
+        or link it when there is none (it must be independent from self)"""
+        for hist in self.__linkedHists:
+            if (type(hist) is type(newerAction)) and hist.coalesceWith(newerAction):
+                return True
+        self.linkHist(newerAction)
+        return True
+    
+    def estimatedSize(self)->int:
+        """a rough estimation of the memory used by the action and its linked actions (in bytes)"""
+        return HistoryAction.ESTIMATED_BASE_SIZE + sum(
+            hist.estimatedSize() for hist in self.__linkedHists)
+    
+    def _linkedHistsToJson(self)->"list[AsJson_HistoryAction]":
+        return [hist.toJson() for hist in self.__linkedHists]
+    
+    def _linkHistsFromJson(self, datas:"AsJson_HistoryAction")->None:
+        for histDatas in datas["linkedHists"]:
+            self.linkHist(HistoryAction.actionFromJson(histDatas))
 
 class HistoryPeriodesActions(HistoryAction):
+    ESTIMATED_PERIODE_SIZE: int = 400
+    """the estimated size of a periode (object, datetimes, comments), see .estimatedSize()"""
     __slots__ = ("__subActions", )
     def __init__(self) -> None:
         super().__init__()
@@ -1461,31 +2830,39 @@ class HistoryPeriodesActions(HistoryAction):
         # => sub action wil not be empty
         self.__subActions.append(("removed", removedPeriodes))
     
+    def getNetChanges(self)->"tuple[list[Periode], list[Periode]]":
+        """return (the periodes removed, the periodes added) by the whole action 
+        (a periode added then removed by the action isn't in them)"""
+        removed: "dict[int, Periode]" = {}
+        added: "dict[int, Periode]" = {}
+        for (actionType, periodes) in self.__subActions:
+            for periode in periodes:
+                if actionType == "added": 
+                    added[id(periode)] = periode
+                elif id(periode) in added: # => removed after being added
+                    del added[id(periode)]
+                else: removed[id(periode)] = periode
+        return (list(removed.values()), list(added.values()))
+    
     @override
     def revert(self, datas:FullDatas)->"set[_UpdatedTarget]":
         updates: "set[_UpdatedTarget]" = super().revert(datas)
-        periodesStorage: "PeriodesStorage[None]" = \
-            datas._trusted_getPeriodesStorage()
-        del datas
         for (actionType, periodes) in reversed(self.__subActions):
             if actionType == "added":
-                periodesStorage._trusted_removePeriodes(periodes)
+                datas._trusted_removePeriodes(periodes)
             elif actionType == "removed":
-                periodesStorage._trusted_addPeriodes(periodes)
+                datas._trusted_addPeriodes(periodes)
             else: raise ValueError(f"unknown actionType: {actionType}")
             updates.add("periodes")
         return updates
 
     def applie(self, datas:FullDatas)->"set[_UpdatedTarget]":
         updates: "set[_UpdatedTarget]" = super().applie(datas)
-        periodesStorage: "PeriodesStorage[None]" = \
-            datas._trusted_getPeriodesStorage()
-        del datas
         for (actionType, periodes) in self.__subActions:
             if actionType == "added":
-                periodesStorage._trusted_addPeriodes(periodes)
+                datas._trusted_addPeriodes(periodes)
             elif actionType == "removed":
-                periodesStorage._trusted_removePeriodes(periodes)
+                datas._trusted_removePeriodes(periodes)
             else: raise ValueError(f"unknown actionType: {actionType}")
             updates.add("periodes")
         return updates
@@ -1494,6 +2871,100 @@ class HistoryPeriodesActions(HistoryAction):
     def isEmpty(self)->bool:
         return isEmptySubActions(self.__subActions) and super().isEmpty()
     
+    @override
+    def estimatedSize(self)->int:
+        return super().estimatedSize() + HistoryPeriodesActions.ESTIMATED_PERIODE_SIZE * sum(
+            len(periodes) for (_, periodes) in self.__subActions)
+    
+    @override
+    def toJson(self)->"AsJson_HistoryPeriodesActions":
+        return AsJson_HistoryPeriodesActions(
+            cls=self.__class__.__name__, linkedHists=self._linkedHistsToJson(),
+            subActions=[(actionType, [periode.toJson() for periode in periodes])
+                        for (actionType, periodes) in self.__subActions])
+    
+    @classmethod
+    @override
+    def fromJson(cls, datas:"AsJson_HistoryPeriodesActions")->"Self":
+        assert datas["cls"] == cls.__name__
+        action = cls()
+        for (actionType, periodesDatas) in datas["subActions"]:
+            action.__subActions.append(
+                (actionType, [Periode.fromJson(periodeDatas) for periodeDatas in periodesDatas]))
+        action._linkHistsFromJson(datas)
+        return action
+    
+class HistoryBulkExtends(HistoryAction):
+    """the addition of many periodes (.mergeDatasWith(...), big .extends(...)), recorded compactly:
+     - the added periodes are referenced (they are the objects of the storage, not copies)
+     - the periodes of the storage displaced by the merge are only referenced by the history, 
+       they are packed as binary records (see binarySaveFormat.packPeriodes) 
+       and rebuilt when the action is reverted"""
+    __slots__ = ("__added", "__displacedRecords", "__displacedStrings", )
+    def __init__(self, added:"Iterable[Periode]", displaced:"Iterable[Periode]") -> None:
+        super().__init__()
+        self.__added: "tuple[Periode, ...]" = tuple(added)
+        """the periodes added to the storage (merged ones included)"""
+        self.__displacedRecords: bytes
+        """the packed periodes of the storage that were removed by the merge"""
+        self.__displacedStrings: "list[str]"
+        self.__displacedRecords, self.__displacedStrings = \
+            packPeriodes(map(Periode.toBinary, displaced))
+    
+    def __iterDisplaced(self)->"Iterator[Periode]":
+        """rebuild the displaced periodes (they were valide periodes of the storage => no checks)"""
+        activities: "dict[str|None, Activity]" = {}
+        for periode in unpackPeriodes(self.__displacedRecords, self.__displacedStrings):
+            activity: "Activity|None" = activities.get(periode.activity, None)
+            if activity is None:
+                activity = activities[periode.activity] = Activity(periode.activity)
+            yield Periode._trusted_new(
+                microsecondsToDatetime(periode.startTime), microsecondsToDatetime(periode.endTime), 
+                activity, periode.comments)
+    
+    @override
+    def revert(self, datas:FullDatas)->"set[_UpdatedTarget]":
+        updates: "set[_UpdatedTarget]" = super().revert(datas)
+        datas._trusted_removePeriodes(self.__added)
+        datas._trusted_addPeriodes(self.__iterDisplaced())
+        updates.add("periodes")
+        return updates
+    
+    @override
+    def applie(self, datas:FullDatas)->"set[_UpdatedTarget]":
+        updates: "set[_UpdatedTarget]" = super().applie(datas)
+        # => the periodes of the storage are removed (not the rebuilt ones)
+        datas._trusted_removePeriodes(self.__iterDisplaced())
+        datas._trusted_addPeriodes(self.__added)
+        updates.add("periodes")
+        return updates
+    
+    @override
+    def isEmpty(self)->bool:
+        return (len(self.__added) == 0) and (len(self.__displacedRecords) == 0) and super().isEmpty()
+    
+    @override
+    def estimatedSize(self)->int:
+        # the added periodes are shared with the storage => only their references are counted
+        return super().estimatedSize() + 8 * len(self.__added) + len(self.__displacedRecords) \
+            + sum(len(string) for string in self.__displacedStrings)
+    
+    @override
+    def toJson(self)->"AsJson_HistoryBulkExtends":
+        return AsJson_HistoryBulkExtends(
+            cls=self.__class__.__name__, linkedHists=self._linkedHistsToJson(),
+            added=[periode.toJson() for periode in self.__added],
+            displaced=[periode.toJson() for periode in self.__iterDisplaced()])
+    
+    @classmethod
+    @override
+    def fromJson(cls, datas:"AsJson_HistoryBulkExtends")->"Self":
+        assert datas["cls"] == cls.__name__
+        action = cls(added=map(Periode.fromJson, datas["added"]), 
+                     displaced=map(Periode.fromJson, datas["displaced"]))
+        action._linkHistsFromJson(datas)
+        return action
+
 class HistoryClockingAction(HistoryAction):
     __slots__ = ("__clockinValue", "__actionType", )
     def __init__(self, clockinValue:"datetime", 
@@ -1526,6 +2997,20 @@ class HistoryClockingAction(HistoryAction):
     def isEmpty(self)->bool:
         # it always toogle a state, can't be empty
         return False 
+    
+    @override
+    def toJson(self)->"AsJson_HistoryClockingAction":
+        return AsJson_HistoryClockingAction(
+            cls=self.__class__.__name__, linkedHists=self._linkedHistsToJson(),
+            clockinValue=datetimeToJson(self.__clockinValue), actionType=self.__actionType)
+    
+    @classmethod
+    @override
+    def fromJson(cls, datas:"AsJson_HistoryClockingAction")->"Self":
+        assert datas["cls"] == cls.__name__
+        action = cls(clockinValue=datetimeFromJson(datas["clockinValue"]), action=datas["actionType"])
+        action._linkHistsFromJson(datas)
+        return action
 
 class HistoryEditConfig(HistoryAction):
     __slots__ = ("__oldDatas", "__newDatas", )
@@ -1562,8 +3047,26 @@ class HistoryEditConfig(HistoryAction):
             return False
         # => self is empty
         return super().isEmpty()
+    
+    @override
+    def toJson(self)->"AsJson_HistoryEditConfig":
+        return AsJson_HistoryEditConfig(
+            cls=self.__class__.__name__, linkedHists=self._linkedHistsToJson(),
+            oldDatas=dict(self.__oldDatas), newDatas=dict(self.__newDatas))
+    
+    @classmethod
+    @override
+    def fromJson(cls, datas:"AsJson_HistoryEditConfig")->"Self":
+        assert datas["cls"] == cls.__name__
+        action = cls()
+        action.__oldDatas.update(cast("dict[_ConfigField, str]", datas["oldDatas"]))
+        action.__newDatas.update(cast("dict[_ConfigField, str]", datas["newDatas"]))
+        action._linkHistsFromJson(datas)
+        return action
 
 class HistoryActivities(HistoryAction):
+    ESTIMATED_ACTIVITY_SIZE: int = 120
+    """the estimated size of an activity (object and its name), see .estimatedSize()"""
     __slots__ = ("__subActions", )
     def __init__(self) -> None:
         super().__init__()
@@ -1616,6 +3119,29 @@ class HistoryActivities(HistoryAction):
     @override
     def isEmpty(self)->bool:
         return isEmptySubActions(self.__subActions) and super().isEmpty()
+    
+    @override
+    def estimatedSize(self)->int:
+        return super().estimatedSize() + HistoryActivities.ESTIMATED_ACTIVITY_SIZE * sum(
+            len(activities) for (_, activities) in self.__subActions)
+    
+    @override
+    def toJson(self)->"AsJson_HistoryActivities":
+        return AsJson_HistoryActivities(
+            cls=self.__class__.__name__, linkedHists=self._linkedHistsToJson(),
+            subActions=[(actionType, [activity.toJson() for activity in activities])
+                        for (actionType, activities) in self.__subActions])
+    
+    @classmethod
+    @override
+    def fromJson(cls, datas:"AsJson_HistoryActivities")->"Self":
+        assert datas["cls"] == cls.__name__
+        action = cls()
+        for (actionType, activitiesDatas) in datas["subActions"]:
+            action.__subActions.append(
+                (actionType, [Activity.fromJson(activityDatas) for activityDatas in activitiesDatas]))
+        action._linkHistsFromJson(datas)
+        return action
 
 
 class HistorySelectedTimeFrame(HistoryAction):
@@ -1625,6 +3151,16 @@ class HistorySelectedTimeFrame(HistoryAction):
         self.__oldSelection: "_TimeFrame" = oldSelection
         self.__newSelection: "_TimeFrame" = newSelection
     
+    @override
+    def coalesceWith(self, newerAction:"HistoryAction")->bool:
+        """merge the consecutive selections: keep the oldest selection and take the newest one"""
+        if isinstance(newerAction, HistorySelectedTimeFrame):
+            self.__newSelection = newerAction.__newSelection
+            return True
+        elif isinstance(newerAction, HistorySelectedTime):
+            return self._coalesceLinked(newerAction)
+        return False
+    
     def revert(self, datas:FullDatas)->"set[_UpdatedTarget]": 
         updates: "set[_UpdatedTarget]" = super().revert(datas)
         datas._trusted_setSelectedTimeFrame(self.__oldSelection)
@@ -1644,6 +3180,22 @@ class HistorySelectedTimeFrame(HistoryAction):
             return False
         # => self is empty
         return super().isEmpty()
+    
+    @override
+    def toJson(self)->"AsJson_HistorySelectedTimeFrame":
+        return AsJson_HistorySelectedTimeFrame(
+            cls=self.__class__.__name__, linkedHists=self._linkedHistsToJson(),
+            oldSelection=timeFrameToJson(self.__oldSelection),
+            newSelection=timeFrameToJson(self.__newSelection))
+    
+    @classmethod
+    @override
+    def fromJson(cls, datas:"AsJson_HistorySelectedTimeFrame")->"Self":
+        assert datas["cls"] == cls.__name__
+        action = cls(oldSelection=timeFrameFromJson(datas["oldSelection"]),
+                     newSelection=timeFrameFromJson(datas["newSelection"]))
+        action._linkHistsFromJson(datas)
+        return action
 
 
 
@@ -1654,6 +3206,16 @@ class HistorySelectedTime(HistoryAction):
         self.__oldTime: "datetime" = oldTime
         self.__newTime: "datetime" = newTime
     
+    @override
+    def coalesceWith(self, newerAction:"HistoryAction")->bool:
+        """merge the consecutive selections: keep the oldest time and take the newest one"""
+        if isinstance(newerAction, HistorySelectedTime):
+            self.__newTime = newerAction.__newTime
+            return True
+        elif isinstance(newerAction, HistorySelectedTimeFrame):
+            return self._coalesceLinked(newerAction)
+        return False
+    
     def revert(self, datas:FullDatas)->"set[_UpdatedTarget]": 
         updates: "set[_UpdatedTarget]" = super().revert(datas)
         datas._trusted_setSelectedTime(self.__oldTime)
@@ -1673,6 +3235,26 @@ class HistorySelectedTime(HistoryAction):
             return False
         # => self is empty
         return super().isEmpty()
+    
+    @override
+    def toJson(self)->"AsJson_HistorySelectedTime":
+        return AsJson_HistorySelectedTime(
+            cls=self.__class__.__name__, linkedHists=self._linkedHistsToJson(),
+            oldTime=datetimeToJson(self.__oldTime), newTime=datetimeToJson(self.__newTime))
+    
+    @classmethod
+    @override
+    def fromJson(cls, datas:"AsJson_HistorySelectedTime")->"Self":
+        assert datas["cls"] == cls.__name__
+        action = cls(oldTime=datetimeFromJson(datas["oldTime"]), newTime=datetimeFromJson(datas["newTime"]))
+        action._linkHistsFromJson(datas)
+        return action
+
+
+_HISTORY_ACTIONS_CLASSES: "dict[str, type[HistoryAction]]" = {
+    actionClass.__name__: actionClass for actionClass in (
+        HistoryPeriodesActions, HistoryBulkExtends, HistoryClockingAction, HistoryEditConfig,
+        HistoryActivities, HistorySelectedTimeFrame, HistorySelectedTime)}
 
 #########################################################
 
@@ -0,0 +1,234 @@
+from datetime import datetime, timedelta
+from bisect import bisect_left
+
+from holo.__typing import (
+    Iterable, Iterator, Any, TYPE_CHECKING,
+)
+
+from calendarEngine import bucketKey, bucketKeys, bucketStart, durationPerBucket
+from utils import _TimeFrame_literals, _PeriodeFields_sortable
+
+if TYPE_CHECKING:
+    from model import Periode
+
+
+class DurationPrefixIndex():
+    """index the cumulated duration of the periodes of a storage (sorted by startTime)\n
+    it allow to get the total duration over any interval with two lookups\n
+    the prefix sums are lazily recomputed from the first modified position"""
+    __slots__ = ("__startTimes", "__endTimes", "__prefixSums", )
+
+    def __init__(self) -> None:
+        self.__startTimes: "list[datetime]" = []
+        self.__endTimes: "list[datetime]" = []
+        self.__prefixSums: "list[timedelta]" = [timedelta(0)]
+        """`__prefixSums[i]` is the total duration of the `i` first periodes\n
+        (only the part that is still valid is kept, the rest is recomputed when needed)"""
+
+    def __len__(self)->int:
+        return len(self.__startTimes)
+
+    def added(self, periodes:"Iterable[Periode]")->None:
+        """register the new `periodes` (they must not be in the index)"""
+        for periode in periodes:
+            index: int = bisect_left(self.__startTimes, periode.startTime)
+            self.__startTimes.insert(index, periode.startTime)
+            self.__endTimes.insert(index, periode.endTime)
+            self.__invalidateFrom(index)
+
+    def removed(self, periodes:"Iterable[Periode]")->None:
+        """unregister the `periodes`, raise a KeyError if one of them isn't in the index"""
+        for periode in periodes:
+            index: int = bisect_left(self.__startTimes, periode.startTime)
+            if (index == len(self.__startTimes)) \
+                    or (self.__startTimes[index] != periode.startTime):
+                raise KeyError(f"the periode: {repr(periode)} isn't in the index")
+            del self.__startTimes[index]
+            del self.__endTimes[index]
+            self.__invalidateFrom(index)
+
+    def __invalidateFrom(self, index:int)->None:
+        """the prefix sums after the periode at `index` are no longer valid"""
+        del self.__prefixSums[index+1: ]
+
+    def __prefixSum(self, index:int)->timedelta:
+        """return the total duration of the `index` first periodes"""
+        prefixSums = self.__prefixSums
+        for currIndex in range(len(prefixSums)-1, index):
+            prefixSums.append(prefixSums[currIndex] \
+                + (self.__endTimes[currIndex] - self.__startTimes[currIndex]))
+        return prefixSums[index]
+
+    def countIn(self, startTime:datetime, endTime:datetime)->int:
+        """return the number of periodes that intersect the interval [`startTime`, `endTime`["""
+        if endTime <= startTime:
+            return 0 # => empty interval
+        firstIndex: int = bisect_left(self.__startTimes, startTime)
+        endIndex: int = bisect_left(self.__startTimes, endTime)
+        if (firstIndex > 0) and (self.__endTimes[firstIndex-1] > startTime):
+            firstIndex -= 1 # => the periode before overflow inside the interval
+        return endIndex - firstIndex
+
+    def totalDuration(self)->timedelta:
+        return self.__prefixSum(len(self.__startTimes))
+
+    def durationIn(self, startTime:datetime, endTime:datetime)->timedelta:
+        """return the cumulated duration of the periodes clipped to the interval [`startTime`, `endTime`["""
+        if endTime <= startTime:
+            return timedelta(0) # => empty interval
+        firstIndex: int = bisect_left(self.__startTimes, startTime)
+        """the first periode that start inside the interval"""
+        endIndex: int = bisect_left(self.__startTimes, endTime)
+        """the periode after the last one that start inside the interval"""
+        total: timedelta = timedelta(0)
+        if endIndex > firstIndex:
+            total = self.__prefixSum(endIndex) - self.__prefixSum(firstIndex)
+            # remove the part of the last periode that is after the interval
+            overflow: timedelta = self.__endTimes[endIndex-1] - endTime
+            if overflow > timedelta(0):
+                total -= overflow
+        # add the part of the periode that start before the interval
+        if (firstIndex > 0) and (self.__endTimes[firstIndex-1] > startTime):
+            total += min(self.__endTimes[firstIndex-1], endTime) - startTime
+        return total
+
+
+class CalendarRollupsIndex():
+    """index the cumulated duration of the periodes of a storage per bucket of a `timeFrame` 
+    (the periodes across multiple buckets are splited)\n
+    the buckets are identified by their key (see calendarEngine.bucketKey)\n
+    only the buckets that contain some periodes are kept"""
+    __slots__ = ("timeFrame", "__totals", "__counts", )
+
+    def __init__(self, timeFrame:"_TimeFrame_literals") -> None:
+        self.timeFrame: "_TimeFrame_literals" = timeFrame
+        self.__totals: "dict[int, timedelta]" = {}
+        self.__counts: "dict[int, int]" = {}
+        """the number of periodes (parts) inside each bucket"""
+
+    def added(self, periodes:"Iterable[Periode]")->None:
+        for periode in periodes:
+            self.__update(periode, delta=+1)
+
+    def removed(self, periodes:"Iterable[Periode]")->None:
+        for periode in periodes:
+            self.__update(periode, delta=-1)
+
+    def __update(self, periode:"Periode", delta:int)->None:
+        for key, duration in durationPerBucket(periode.startTime, periode.endTime, self.timeFrame).items():
+            count: int = self.__counts.get(key, 0) + delta
+            if count == 0:
+                # => no more periodes in this bucket
+                del self.__counts[key]
+                del self.__totals[key]
+            else:
+                self.__counts[key] = count
+                self.__totals[key] = self.__totals.get(key, timedelta(0)) + duration * delta
+
+    def __len__(self)->int:
+        """the number of buckets that contain some periodes"""
+        return len(self.__totals)
+
+    def getTotals(self)->"dict[int, timedelta]":
+        """return the cumulated duration of each bucket (key) that contains some periodes"""
+        return dict(self.__totals)
+
+    def countBucketsBefore(self, t:datetime)->int:
+        """return the number of buckets (that contain some periodes) starting before `t`"""
+        limitKey: int = bucketKey(t, self.timeFrame)
+        nbBuckets: int = sum(1 for key in self.__totals.keys() if key < limitKey)
+        if (limitKey in self.__totals) and (bucketStart(limitKey, self.timeFrame) < t):
+            # => the bucket of `t` start before it
+            nbBuckets += 1
+        return nbBuckets
+
+
+class SortedFieldIndex():
+    """keep the periodes of a storage sorted by a `field` (the ties are sorted by startTime)\n
+    it allow to walk the periodes in that order (or the descending one) without sorting them"""
+    __slots__ = ("field", "__keys", "__periodes", )
+    BULK_MIN_SIZE: int = 32
+    """from this number of added periodes, the index is sorted again instead of inserting them one by one"""
+
+    def __init__(self, field:"_PeriodeFields_sortable") -> None:
+        self.field: "_PeriodeFields_sortable" = field
+        self.__keys: "list[tuple[Any, datetime]]" = []
+        """the sorting keys, (value of the field, startTime) of each periode"""
+        self.__periodes: "list[Periode]" = []
+        """the periodes in the same order as the keys"""
+
+    def __len__(self)->int:
+        return len(self.__periodes)
+
+    def __getKey(self, periode:"Periode")->"tuple[Any, datetime]":
+        return (getattr(periode, self.field), periode.startTime)
+
+    def added(self, periodes:"Iterable[Periode]")->None:
+        """register the new `periodes` (they must not be in the index)"""
+        periodes = list(periodes)
+        if len(periodes) >= self.BULK_MIN_SIZE:
+            # => faster to sort everything again
+            entries: "list[tuple[tuple[Any, datetime], Periode]]" = \
+                sorted(zip(self.__keys + [self.__getKey(periode) for periode in periodes], 
+                           self.__periodes + periodes), key=lambda entry: entry[0])
+            self.__keys = [key for key, _ in entries]
+            self.__periodes = [periode for _, periode in entries]
+            return None
+        for periode in periodes:
+            key: "tuple[Any, datetime]" = self.__getKey(periode)
+            index: int = bisect_left(self.__keys, key)
+            self.__keys.insert(index, key)
+            self.__periodes.insert(index, periode)
+
+    def removed(self, periodes:"Iterable[Periode]")->None:
+        """unregister the `periodes`, raise a KeyError if one of them isn't in the index"""
+        for periode in periodes:
+            key: "tuple[Any, datetime]" = self.__getKey(periode)
+            index: int = bisect_left(self.__keys, key)
+            if (index == len(self.__keys)) or (self.__keys[index] != key):
+                raise KeyError(f"the periode: {repr(periode)} isn't in the index")
+            del self.__keys[index]
+            del self.__periodes[index]
+
+    def iterPeriodes(self, ascendingOrder:bool=True)->"Iterator[Periode]":
+        """iterate over the periodes sorted by the field\n
+        the ties are always in ascending startTime (like a stable sort of the periodes of the storage)"""
+        if ascendingOrder is True:
+            return iter(self.__periodes)
+        return self.__iterDescending()
+
+    def __iterDescending(self)->"Iterator[Periode]":
+        """the runs of periodes with the same value are walked from the last one, each run in its order"""
+        end: int = len(self.__keys)
+        while end > 0:
+            start: int = bisect_left(self.__keys, self.__keys[end - 1][0], 0, end, key=lambda key: key[0])
+            yield from self.__periodes[start: end]
+            end = start
+
+
+class ModifiedBucketsIndex():
+    """track the buckets of a timeframe that contain the startTime of a periode added/removed
+    since it was created (or cleared)\n
+    it tell which parts of the datas changed (ex: the shards to save again)"""
+    __slots__ = ("timeFrame", "__keys", )
+
+    def __init__(self, timeFrame:"_TimeFrame_literals") -> None:
+        self.timeFrame: "_TimeFrame_literals" = timeFrame
+        self.__keys: "set[int]" = set()
+
+    def added(self, periodes:"Iterable[Periode]")->None:
+        self.__keys.update(bucketKeys([periode.startTime for periode in periodes], self.timeFrame))
+
+    def removed(self, periodes:"Iterable[Periode]")->None:
+        self.__keys.update(bucketKeys([periode.startTime for periode in periodes], self.timeFrame))
+
+    def getKeys(self)->"set[int]":
+        """return the keys of the modified buckets"""
+        return set(self.__keys)
+
+    def discard(self, keys:"Iterable[int]")->None:
+        """the buckets with the given `keys` are no longer considered modified"""
+        self.__keys.difference_update(keys)
+
+    def clear(self)->None:
+        self.__keys.clear()
@@ -1,10 +1,10 @@
 from datetime import datetime
 
-from holo.__typing import Any as _Any, TypedDict
+from holo.__typing import Any as _Any, TypedDict, Literal
 
+from datetimeCodec import decodeDatetime, encodeDatetime
 from utils import (
-    datetimeFromText, datetimeToText,
-    _TimeFrame_literals,
+    _TimeFrame_literals, _SubActionType, _JournalDirection,
 )
 
 
@@ -12,11 +12,11 @@ def hasRequiredKeys(datas:"dict[str, _Any]", requiredKeys:"frozenset[str]")->boo
     return requiredKeys.issubset(datas.keys())
 
 def datetimeToJson(t: datetime)->"AsJson_Datetime":
-    return AsJson_Datetime(cls=datetime.__name__, value=datetimeToText(t))
+    return AsJson_Datetime(cls=datetime.__name__, value=encodeDatetime(t))
 def datetimeFromJson(datas:"AsJson_Datetime")->"datetime":
     assert datas["cls"] == datetime.__name__
     assert isinstance(datas["value"], str)
-    return datetimeFromText(datas["value"])
+    return decodeDatetime(datas["value"])
 
 
 #########################################################
@@ -61,3 +61,74 @@ class AsJson_TimeTarget(TypedDict):
     cls: str
     targetedTime: "AsJson_PrettyTimedelta"
     timeFrame: "_TimeFrame_literals|AsJson_Periode"
+
+
+class AsJson_HistoryAction(TypedDict):
+    cls: str
+    linkedHists: "list[AsJson_HistoryAction]"
+
+class AsJson_HistoryPeriodesActions(AsJson_HistoryAction):
+    subActions: "list[tuple[_SubActionType, list[AsJson_Periode]]]"
+
+class AsJson_HistoryClockingAction(AsJson_HistoryAction):
+    clockinValue: "AsJson_Datetime"
+    actionType: "Literal['clockedin', 'unclockedin']"
+
+class AsJson_HistoryEditConfig(AsJson_HistoryAction):
+    oldDatas: "dict[str, str]"
+    newDatas: "dict[str, str]"
+
+class AsJson_HistoryActivities(AsJson_HistoryAction):
+    subActions: "list[tuple[_SubActionType, list[AsJson_Activity]]]"
+
+class AsJson_HistorySelectedTimeFrame(AsJson_HistoryAction):
+    oldSelection: "_TimeFrame_literals|AsJson_Periode"
+    newSelection: "_TimeFrame_literals|AsJson_Periode"
+
+class AsJson_HistorySelectedTime(AsJson_HistoryAction):
+    oldTime: "AsJson_Datetime"
+    newTime: "AsJson_Datetime"
+
+class AsJson_HistoryBulkExtends(AsJson_HistoryAction):
+    added: "list[AsJson_Periode]"
+    displaced: "list[AsJson_Periode]"
+
+
+class AsJson_ShardSummary(TypedDict):
+    cls: str
+    monthKey: int
+    """the month of the periodes of the shard (see calendarEngine.bucketKey)"""
+    fileName: str
+    nbPeriodes: int
+    firstStartTime: "AsJson_Datetime"
+    lastEndTime: "AsJson_Datetime"
+    activities: "list[tuple[AsJson_Activity, int, AsJson_PrettyTimedelta]]"
+    """for each activity used in the shard: its number of periodes and their cumulated duration"""
+    buckets: "dict[_TimeFrame_literals, list[tuple[int, AsJson_PrettyTimedelta]]]"
+    """for each time frame: the cumulated duration of the periodes of the shard in each bucket 
+    (see calendarEngine.bucketKey), missing in the manifests written before it was added"""
+
+class AsJson_ShardsManifest(TypedDict):
+    cls: str
+    version: int
+    generation: int
+    """incremented at each save, the new shards files are named with it"""
+    datas: "AsJson_FullDatas"
+    """the datas without the periodes"""
+    shards: "list[AsJson_ShardSummary]"
+
+class AsJson_Shard(TypedDict):
+    cls: str
+    monthKey: int
+    periodes: "list[AsJson_Periode]"
+
+
+class AsJson_JournalHeader(TypedDict):
+    cls: str
+    snapshotSize: int
+    snapshotHash: str
+    """the sha256 of the snapshot the journal applies to"""
+
+class AsJson_JournalEntry(TypedDict):
+    direction: "_JournalDirection"
+    action: "AsJson_HistoryAction"
@@ -0,0 +1,155 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+
+from holo.__typing import Iterable, Iterator, BinaryIO
+
+from saveFormat import AsJson_JournalHeader, AsJson_JournalEntry
+from projectPaths import FILE_ENCODING
+
+### the journal of a save file (the snapshot)
+# it is a sidecar file (json lines) next to the snapshot:
+#   - the header: the size and hash of the snapshot it applies to
+#   - the entries: the history actions applied / reverted since the snapshot (in order)
+# a journal that don't match its snapshot (the snapshot was rewritten) is outdated and ignored
+
+JOURNAL_EXTENSION: str = ".journal"
+_HASH_CHUNK_SIZE: int = 1 << 20
+_TAIL_CHUNK_SIZE: int = 1 << 16
+"""the journal is read backward by chunks of this size to find its last complete line"""
+
+
+def getJournalPath(snapshotPath:Path)->Path:
+    return snapshotPath.with_name(snapshotPath.name + JOURNAL_EXTENSION)
+
+def hashFile(path:Path)->str:
+    """the sha256 of the content of the file at `path` (read by chunks)"""
+    with open(path, mode="rb") as file:
+        return hashOpenedFile(file)
+
+def hashOpenedFile(file:"BinaryIO")->str:
+    """the sha256 of the content of an opened `file` (read by chunks from its start, 
+    its position is restored after)"""
+    hasher = hashlib.sha256()
+    position: int = file.tell()
+    file.seek(0)
+    while len(chunk := file.read(_HASH_CHUNK_SIZE)) != 0:
+        hasher.update(chunk)
+    file.seek(position)
+    return hasher.hexdigest()
+
+def _createHeader(snapshotPath:Path)->"AsJson_JournalHeader":
+    return AsJson_JournalHeader(
+        cls="Journal", snapshotSize=os.path.getsize(snapshotPath),
+        snapshotHash=hashFile(snapshotPath))
+
+def _iterLines(journalPath:Path)->"Iterator[str]":
+    """iterate over the complete lines of the journal (an interrupted last line is ignored)"""
+    with open(journalPath, mode="r", encoding=FILE_ENCODING) as file:
+        for line in file:
+            if line.endswith("\n") is False:
+                return None # => interrupted append
+            yield line
+
+def getJournalSize(snapshotPath:Path)->int:
+    """return the size of the journal of the snapshot (0 when it has no journal)"""
+    journalPath: Path = getJournalPath(snapshotPath)
+    if journalPath.exists() is False:
+        return 0
+    return os.path.getsize(journalPath)
+
+def readJournal(snapshotPath:Path)->"list[AsJson_JournalEntry]":
+    """return the entries of the journal of the snapshot (in order)\n
+    there is no entries when the snapshot has no journal or when it is outdated"""
+    journalPath: Path = getJournalPath(snapshotPath)
+    if journalPath.exists() is False:
+        return []
+    lines: "Iterator[str]" = _iterLines(journalPath)
+    for headerLine in lines:
+        if json.loads(headerLine) != _createHeader(snapshotPath):
+            return [] # => outdated journal
+        return [json.loads(line) for line in lines]
+    return [] # => empty journal
+
+def _parseHeader(headerLine:bytes)->"AsJson_JournalHeader|None":
+    try: return json.loads(headerLine)
+    except ValueError: return None # => corrupted journal
+
+def _findLinesEnd(file:"BinaryIO", minSize:int)->int:
+    """return the end of the last complete line of the `file` (read backward from its end by chunks), 
+    the `minSize` first bytes are known to be complete lines"""
+    end: int = file.seek(0, os.SEEK_END)
+    while end > minSize:
+        start: int = max(minSize, end - _TAIL_CHUNK_SIZE)
+        file.seek(start)
+        lastNewLine: int = file.read(end - start).rfind(b"\n")
+        if lastNewLine != -1:
+            return start + lastNewLine + 1
+        end = start
+    return minSize
+
+def appendJournal(snapshotPath:Path, entries:"Iterable[AsJson_JournalEntry]")->None:
+    """append the `entries` to the journal of the snapshot (in a single write)\n
+    the journal is (re)created when it is missing or outdated (its header is fully checked), 
+    an interrupted last line is dropped, only its header and its end are read\n
+    if an error happend, the journal is restored as it was before"""
+    journalPath: Path = getJournalPath(snapshotPath)
+    texts: "list[str]" = [json.dumps(entry, ensure_ascii=False) for entry in entries]
+    header: "AsJson_JournalHeader" = _createHeader(snapshotPath)
+    validSize: int = 0
+    """the size of the complete lines of the journal (0 => the journal must be recreated)"""
+    if journalPath.exists():
+        with open(journalPath, mode="rb") as file:
+            headerLine: bytes = file.readline()
+            # the full header (with the hash): an outdated journal that has the same size 
+            # (crash before its removal, external edit) must not receive the new entries
+            if headerLine.endswith(b"\n") and (_parseHeader(headerLine) == header):
+                validSize = _findLinesEnd(file, minSize=len(headerLine))
+    if validSize == 0:
+        texts.insert(0, json.dumps(header))
+    with open(journalPath, mode=("r+b" if validSize != 0 else "wb")) as file:
+        file.seek(validSize)
+        file.truncate()
+        try:
+            file.write("".join(text + "\n" for text in texts).encode(FILE_ENCODING))
+            file.flush()
+        except Exception as err:
+            file.truncate(validSize)
+            raise err
+
+def removeJournal(snapshotPath:Path)->None:
+    getJournalPath(snapshotPath).unlink(missing_ok=True)
+
+
+def _checkRoundTrip()->None:
+    """check that datas edited with sub-second times and reloaded from their journal 
+    are the same as when they are fully saved"""
+    import tempfile
+    from datetime import datetime, timedelta
+    from model import FullDatas, Periode
+    day = datetime(2000, 1, 1)
+    datas = FullDatas.create_empty()
+    datas.addPeriode(Periode(day.replace(hour=9), day.replace(hour=10), activity="work", comments=None))
+    with tempfile.TemporaryDirectory() as directory:
+        journalSavePath = Path(directory).joinpath("journal.json")
+        fullSavePath = Path(directory).joinpath("full.json")
+        datas.saveToPath(journalSavePath)
+        # within a second (=> empty once saved) and touching the first one once saved
+        datas.addPeriode(Periode(day.replace(hour=12, microsecond=400_000), 
+                                 day.replace(hour=12, microsecond=900_000), activity="work", comments=None))
+        datas.addPeriode(Periode(day.replace(hour=10, microsecond=300_000), 
+                                 day.replace(hour=11), activity="work", comments=None))
+        datas.substractPeriode(Periode(day.replace(hour=9, minute=30, microsecond=500_000), 
+                                       day.replace(hour=9, minute=31) + timedelta(microseconds=1), 
+                                       activity=None, comments=None))
+        assert datas.appendToJournal() is True
+        datas.saveToPath(fullSavePath)
+        for path in (journalSavePath, fullSavePath):
+            with open(path, mode="rb") as file:
+                loadedDatas: "FullDatas" = FullDatas.fromFile(file)
+            assert loadedDatas.toJson()["periodes"] == datas.toJson()["periodes"], path
+
+
+if __name__ == "__main__":
+    _checkRoundTrip()
@@ -0,0 +1,74 @@
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+
+from holo.__typing import Iterable
+
+from atomicSave import atomicWriteText
+from calendarEngine import bucketStart
+from saveFormat import AsJson_Periode, AsJson_Shard, AsJson_ShardsManifest
+from projectPaths import FILE_ENCODING
+
+### the sharded layout of the datas (a directory)
+#   - manifest.json: the datas without the periodes, and a summary of each shard
+#     (number of periodes, first / last times, count and duration per activity)
+#   - one shard per month: the periodes that start in that month (sorted)
+# the shards are named with the generation of the save that wrote them:
+#   the modified shards are written to new files, then the manifest is atomically
+#   replaced (it commit the save), then the shards no longer referenced are removed
+#   => a crash during a save leaves the previous generation intact
+
+SHARDED_EXTENSION: str = ".wtd"
+MANIFEST_NAME: str = "manifest.json"
+MANIFEST_VERSION: int = 1
+_SHARD_NAME_PATTERN = re.compile(r"^\d{4}-\d{2}\.\d+\.json$")
+
+
+def isShardedPath(path:Path)->bool:
+    """tell whether the `path` is the directory of sharded datas (existing or not)"""
+    return path.suffix == SHARDED_EXTENSION
+
+def isShardsManifest(path:Path)->bool:
+    """tell whether the `path` is the manifest of sharded datas"""
+    return (path.name == MANIFEST_NAME) and isShardedPath(path.parent)
+
+def getShardFileName(monthKey:int, generation:int)->str:
+    """the name of the file of the shard of the month (see calendarEngine.bucketKey) for the `generation`"""
+    month: datetime = bucketStart(monthKey, "month")
+    return f"{month.year:04d}-{month.month:02d}.{generation}.json"
+
+def _writeJson(path:Path, datas:object, backupGenerations:int)->None:
+    """atomically write the `datas` (a single call to the C json encoder, the shards are small)"""
+    with atomicWriteText(path, encoding=FILE_ENCODING, backupGenerations=backupGenerations) as file:
+        file.write(json.dumps(datas, ensure_ascii=False, separators=(",", ":")))
+
+def readManifest(directory:Path)->"AsJson_ShardsManifest":
+    with open(directory.joinpath(MANIFEST_NAME), mode="r", encoding=FILE_ENCODING) as file:
+        manifest: "AsJson_ShardsManifest" = json.load(file)
+    if manifest["version"] != MANIFEST_VERSION:
+        raise ValueError(f"unsupported manifest version: {manifest['version']} (expected {MANIFEST_VERSION})")
+    return manifest
+
+def writeManifest(directory:Path, manifest:"AsJson_ShardsManifest")->None:
+    """atomically replace the manifest (it commit the shards written before)"""
+    _writeJson(directory.joinpath(MANIFEST_NAME), manifest, backupGenerations=0)
+
+def readShard(directory:Path, fileName:str)->"list[AsJson_Periode]":
+    with open(directory.joinpath(fileName), mode="r", encoding=FILE_ENCODING) as file:
+        shard: "AsJson_Shard" = json.load(file)
+    return shard["periodes"]
+
+def writeShard(directory:Path, fileName:str, monthKey:int, periodes:"list[AsJson_Periode]")->None:
+    """write a new shard (the name of a shard is never reused, no backups are needed)"""
+    directory.mkdir(parents=True, exist_ok=True)
+    _writeJson(directory.joinpath(fileName),
+               AsJson_Shard(cls="Shard", monthKey=monthKey, periodes=periodes),
+               backupGenerations=0)
+
+def removeUnusedShards(directory:Path, usedFileNames:"Iterable[str]")->None:
+    """remove the shards files that aren't in `usedFileNames` (the previous generations)"""
+    usedNames: "set[str]" = set(usedFileNames)
+    for path in directory.iterdir():
+        if (path.name not in usedNames) and _SHARD_NAME_PATTERN.match(path.name):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,308 @@
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import TracebackType
+
+from holo.__typing import (
+    Iterable, Iterator, Literal, Self, FinalClass,
+)
+from holo.protocols import _T
+
+from model import (
+    Periode, Activity, PeriodesStorage, PeriodesStorageView,
+    HistoryPeriodesActions, _TimeID,
+)
+from utils import (
+    _PeriodeFields_sortable,
+    datetimeToMicroseconds, microsecondsToDatetime,
+)
+
+### a PeriodesStorage backed by a sqlite database
+# the periodes are rows of a table indexed on their times:
+#   startTime (the primary key) and endTime as int64 microseconds since utils.EPOCH
+#   activity: the raw activity (NULL for the empty activity), comments
+# like the in memory storage, the periodes are disjoint and never touch
+#   => the startTime order is also the endTime order, the periodes that intersect an
+#   interval are the one that start before it (at most one) and the ones that start inside
+# the totals and the subsets are computed with sql range / aggregate queries
+# and the merge / substract of the periodes are done in a single transaction
+
+_SCHEMA: "list[str]" = [
+    """CREATE TABLE IF NOT EXISTS periodes (
+        startTime INTEGER PRIMARY KEY,
+        endTime INTEGER NOT NULL,
+        activity TEXT,
+        comments TEXT NOT NULL)""",
+    "CREATE INDEX IF NOT EXISTS periodes_endTime ON periodes (endTime)",
+    "CREATE INDEX IF NOT EXISTS periodes_activity ON periodes (activity)",
+]
+_COLUMNS: str = "startTime, endTime, activity, comments"
+_IN_RANGE: str = (
+    "startTime >= COALESCE((SELECT MAX(startTime) FROM periodes WHERE startTime < :start), :start) "
+    "AND startTime < :end AND endTime > :start")
+"""the periodes that intersect [:start, :end[ (the periode before is found with the primary key)"""
+_CLIPPED_DURATION: str = "(MIN(endTime, :end) - MAX(startTime, :start))"
+_ORDER_BY_FIELD: "dict[_PeriodeFields_sortable, str]" = {
+    "startTime": "startTime", "endTime": "endTime",
+    "duration": "endTime - startTime", "activity": "COALESCE(activity, '/')",
+}
+"""the sql ordering of each field (the empty activity is sorted like its text: '/')"""
+
+_Row = tuple[int, int, "str|None", str]
+
+
+class SqlitePeriodesStorage(FinalClass):
+    """a storage of periodes (like PeriodesStorage[None]) backed by a sqlite database\n
+    loading it is instant and its memory is flat: the periodes are only read when needed"""
+    __slots__ = ("timeframe", "path", "__connection", "__activities", )
+
+    def __init__(self, path:"Path|str") -> None:
+        """open (or create) the database at `path` (":memory:" for a temporary database)"""
+        self.timeframe: None = None
+        """like a PeriodesStorage[None]: the periodes aren't bounded"""
+        self.path: "Path|str" = path
+        self.__connection: "sqlite3.Connection" = sqlite3.connect(path)
+        self.__activities: "dict[str|None, Activity]" = {None: Activity(None)}
+        """the activities of the raw values (created once per value)"""
+        with self.__connection:
+            for statement in _SCHEMA:
+                self.__connection.execute(statement)
+
+    def close(self)->None:
+        self.__connection.close()
+
+    def __enter__(self)->"Self":
+        return self
+
+    def __exit__(self, exc_type:"type[BaseException]|None", exc_value:"BaseException|None",
+                 traceback:"TracebackType|None")->None:
+        self.close()
+
+    ### conversions
+
+    def __toActivity(self, value:"str|None")->"Activity":
+        activity: "Activity|None" = self.__activities.get(value, None)
+        if activity is None:
+            activity = self.__activities[value] = Activity(value)
+        return activity
+
+    def __toPeriode(self, row:"_Row")->"Periode":
+        startTime, endTime, activity, comments = row
+        return Periode(
+            startTime=microsecondsToDatetime(startTime), endTime=microsecondsToDatetime(endTime),
+            activity=self.__toActivity(activity), comments=comments)
+
+    @staticmethod
+    def __toRow(periode:"Periode")->"_Row":
+        return (datetimeToMicroseconds(periode.startTime), datetimeToMicroseconds(periode.endTime),
+                periode.activity.toJson()["activity"], periode.comments)
+
+    @staticmethod
+    def __rangeParams(timeID:"_TimeID")->"dict[str, int]":
+        return {"start": datetimeToMicroseconds(timeID.startTime),
+                "end": datetimeToMicroseconds(timeID.endTime)}
+
+    ### modifications
+
+    def __selectIntersecting(self, periode:"Periode")->"list[Periode]":
+        """return the periodes that intersect (or touch) the `periode`"""
+        params = self.__rangeParams(periode)
+        rows: "list[_Row]" = self.__connection.execute(
+            f"SELECT {_COLUMNS} FROM periodes WHERE startTime < :start "
+            "ORDER BY startTime DESC LIMIT 1", params).fetchall()
+        if (len(rows) != 0) and (rows[0][1] < params["start"]):
+            rows = [] # => the periode before don't intersect
+        rows.extend(self.__connection.execute(
+            f"SELECT {_COLUMNS} FROM periodes WHERE startTime BETWEEN :start AND :end "
+            "ORDER BY startTime", params).fetchall())
+        return [self.__toPeriode(row) for row in rows]
+
+    def __replace(self, removed:"list[Periode]", added:"list[Periode]")->None:
+        """remove then add the periodes (inside the current transaction)"""
+        self.__connection.executemany(
+            "DELETE FROM periodes WHERE startTime = ?",
+            [(datetimeToMicroseconds(periode.startTime), ) for periode in removed])
+        self.__connection.executemany(
+            f"INSERT INTO periodes ({_COLUMNS}) VALUES (?, ?, ?, ?)",
+            [self.__toRow(periode) for periode in added])
+
+    def __addOne(self, periode:"Periode", changes:"list[tuple[list[Periode], list[Periode]]]")->None:
+        """add the `periode` (merged with the ones it intersect), like PeriodesStorage.addPeriode\n
+        the (removed, added) periodes are appended to `changes`"""
+        intersectWith: "list[Periode]" = self.__selectIntersecting(periode)
+        if len(intersectWith) == 0:
+            # => new periode don't intersect with any periode of the storage
+            self.__replace([], [periode])
+            changes.append(([], [periode]))
+            return None
+        mergedPeriode: "Periode" = periode.mergeWithMultiple(intersectWith)
+        self.__replace(intersectWith, [mergedPeriode])
+        changes.append((intersectWith, [mergedPeriode]))
+
+    def __substractOne(self, periode:"Periode", changes:"list[tuple[list[Periode], list[Periode]]]")->None:
+        """substract the `periode`, like PeriodesStorage.substractPeriode\n
+        the (removed, added) periodes are appended to `changes`"""
+        intersectWith: "list[Periode]" = self.__selectIntersecting(periode)
+        if len(intersectWith) == 0:
+            return None # => nothing to substract
+        substractedPeriodes: "list[Periode]" = []
+        for currentPeriode in intersectWith:
+            substractedPeriodes.extend(periode.substractOf(currentPeriode))
+        self.__replace(intersectWith, substractedPeriodes)
+        changes.append((intersectWith, substractedPeriodes))
+
+    def __applie(self, action:"Literal['add', 'substract']", periodes:"Iterable[Periode]",
+                 histPeriodes:"HistoryPeriodesActions|None")->None:
+        """applie the `action` with each of the `periodes` in a single transaction\n
+        when an error is raised nothing is modified (the transaction is rolled back)
+        and the history is only updated once it is commited"""
+        changes: "list[tuple[list[Periode], list[Periode]]]" = []
+        with self.__connection: # => commit or rollback
+            for periode in periodes:
+                if action == "add": self.__addOne(periode, changes)
+                else: self.__substractOne(periode, changes)
+        if histPeriodes is None:
+            return None
+        for removed, added in changes:
+            if len(removed) != 0: histPeriodes.periodesRemoved(removed)
+            if len(added) != 0: histPeriodes.periodesAdded(added)
+
+    def addPeriode(self, periode:"Periode", histPeriodes:"HistoryPeriodesActions|None")->None:
+        """add a periode to the storage (merged with the periodes it intersect)\n
+        no needs to revert the hist if an error is raised, there will be no modifications done"""
+        self.__applie("add", [periode], histPeriodes=histPeriodes)
+
+    def extends(self, periodes:"Iterable[Periode]", histPeriodes:"HistoryPeriodesActions|None")->None:
+        """add multiple periodes (see .addPeriode(...)), in a single transaction\n
+        no needs to revert the hist if an error is raised, there will be no modifications done"""
+        self.__applie("add", periodes, histPeriodes=histPeriodes)
+
+    def substractPeriode(self, periode:"Periode", histPeriodes:"HistoryPeriodesActions|None")->None:
+        """substract a periode of the storage\n
+        no needs to revert the hist if an error is raised, there will be no modifications done"""
+        self.__applie("substract", [periode], histPeriodes=histPeriodes)
+
+    def _trusted_addPeriodes(self, periodes:"Iterable[Periode]")->None:
+        """add the `periodes` without any checks"""
+        with self.__connection:
+            self.__replace([], list(periodes))
+
+    def _trusted_removePeriodes(self, periodes:"Iterable[Periode]")->None:
+        """remove the `periodes` without any checks"""
+        with self.__connection:
+            self.__replace(list(periodes), [])
+
+    ### queries
+
+    def __iter__(self)->"Iterator[Periode]":
+        for row in self.__connection.execute(f"SELECT {_COLUMNS} FROM periodes ORDER BY startTime"):
+            yield self.__toPeriode(row)
+
+    def __len__(self)->int:
+        return self.__connection.execute("SELECT COUNT(*) FROM periodes").fetchone()[0]
+
+    def isEmpty(self)->bool:
+        return self.__connection.execute("SELECT 1 FROM periodes LIMIT 1").fetchone() is None
+
+    def getPeriode(self, startTime:datetime, default:"_T"=None)->"Periode|_T":
+        """try to get the periode with this start time"""
+        row: "_Row|None" = self.__connection.execute(
+            f"SELECT {_COLUMNS} FROM periodes WHERE startTime = ?",
+            (datetimeToMicroseconds(startTime), )).fetchone()
+        return (default if row is None else self.__toPeriode(row))
+
+    def iterPeriodesIn(self, timeID:"_TimeID")->"Iterator[Periode]":
+        """iterate (by startTime) over the periodes inside the given `timeID`\n
+        only the periodes that cross the bounds of `timeID` are clipped"""
+        rows: "list[_Row]" = self.__connection.execute(
+            f"SELECT {_COLUMNS} FROM periodes WHERE {_IN_RANGE} ORDER BY startTime",
+            self.__rangeParams(timeID)).fetchall()
+        for row in rows:
+            periode: "Periode" = self.__toPeriode(row)
+            if timeID.fullyContain(periode):
+                yield periode
+                continue
+            clippedPeriode: "Periode|None" = periode.intersection(
+                timeID, commentsMerge="self", requirePeriode=False)
+            if clippedPeriode is not None:
+                yield clippedPeriode
+
+    def getSubset(self, timeID:"_TimeID")->"PeriodesStorage[_TimeID]":
+        """get a frozen (in memory) subset of all the periodes inside the given `timeID`"""
+        storage: "PeriodesStorage[_TimeID]" = PeriodesStorage(
+            timeID=timeID, periodes=None, histActions=None)
+        storage._trusted_addPeriodes(self.iterPeriodesIn(timeID))
+        return storage.freez()
+
+    def getSubsetView(self, timeID:"_TimeID")->"PeriodesStorageView":
+        """get a read-only view of the periodes inside the given `timeID`\n
+        unlike PeriodesStorage.getSubsetView(...) it is a snapshot (see .getSubset(...))"""
+        return self.getSubset(timeID).getSubsetView(timeID)
+
+    def getPeriodes_sortedByfield(self, field:"_PeriodeFields_sortable", ascendingOrder:bool=True)->"list[Periode]":
+        """return the periodes sorted by the `field` (the ties are sorted by startTime)"""
+        order: str = ("ASC" if ascendingOrder is True else "DESC")
+        return [self.__toPeriode(row) for row in self.__connection.execute(
+            f"SELECT {_COLUMNS} FROM periodes "
+            f"ORDER BY {_ORDER_BY_FIELD[field]} {order}, startTime {order}")]
+
+    def getAllPeriodesInterval(self)->"_TimeID|None":
+        """return the precise interval that holds all the periodes (None if it has no periodes)"""
+        startTime, endTime = self.__connection.execute(
+            "SELECT MIN(startTime), MAX(endTime) FROM periodes").fetchone()
+        if startTime is None:
+            return None
+        return _TimeID(startTime=microsecondsToDatetime(startTime),
+                       endTime=microsecondsToDatetime(endTime))
+
+    def cumulatedDuration(self, timeID:"_TimeID|None"=None)->"timedelta":
+        """return the cumulated duration of the periodes (clipped to the `timeID` if given)"""
+        total: int
+        if timeID is None:
+            (total, ) = self.__connection.execute(
+                "SELECT COALESCE(SUM(endTime - startTime), 0) FROM periodes").fetchone()
+        else:
+            (total, ) = self.__connection.execute(
+                f"SELECT COALESCE(SUM({_CLIPPED_DURATION}), 0) FROM periodes WHERE {_IN_RANGE}",
+                self.__rangeParams(timeID)).fetchone()
+        return timedelta(microseconds=total)
+
+    def getUsedActivities(self)->"set[Activity]":
+        """return the activities used by at least one periode"""
+        return {self.__toActivity(value) for (value, ) in
+                self.__connection.execute("SELECT DISTINCT activity FROM periodes")}
+
+    def getActivitiesUsageCount(self, activity:"Activity")->int:
+        """tell how much time this activity is used (0 if the activity isn't used)"""
+        return self.__connection.execute(
+            "SELECT COUNT(*) FROM periodes WHERE activity IS ?",
+            (activity.toJson()["activity"], )).fetchone()[0]
+
+    def cumulatedDurationPerActivity(self, timeID:"_TimeID|None"=None)->"dict[Activity, timedelta]":
+        """return the activities used by the periodes and their cumulated duration
+        (the periodes are clipped to the `timeID` if given)"""
+        cursor: "sqlite3.Cursor"
+        if timeID is None:
+            cursor = self.__connection.execute(
+                "SELECT activity, SUM(endTime - startTime) FROM periodes GROUP BY activity")
+        else:
+            cursor = self.__connection.execute(
+                f"SELECT activity, SUM({_CLIPPED_DURATION}) FROM periodes "
+                f"WHERE {_IN_RANGE} GROUP BY activity", self.__rangeParams(timeID))
+        return {self.__toActivity(value): timedelta(microseconds=total)
+                for (value, total) in cursor}
+
+    ### conversions with the in memory storage
+
+    @classmethod
+    def fromPeriodes(cls, path:"Path|str", periodes:"Iterable[Periode]")->"SqlitePeriodesStorage":
+        """create the database at `path` and add all the `periodes` in it (in a single transaction)"""
+        storage = SqlitePeriodesStorage(path)
+        storage.extends(periodes, histPeriodes=None)
+        return storage
+
+    def toStorage(self)->"PeriodesStorage[None]":
+        """load all the periodes in a new (in memory) storage"""
+        storage: "PeriodesStorage[None]" = PeriodesStorage(timeID=None, periodes=None, histActions=None)
+        storage._trusted_addPeriodes(self)
+        return storage
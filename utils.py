@@ -51,6 +51,10 @@ _CommentsMerge = Literal['self', 'other', 'None']
 _T_TimeID = TypeVar("_T_TimeID", "_TimeID", None)
 _UpdatedTarget = Literal["periodes", "clockin", "activity", "config", "selectedTime", "selectedTimeFrame"]
 _UpdatedALLTarget: "set[_UpdatedTarget]" = set(get_args(_UpdatedTarget))
+_JournalDirection = Literal["applied", "reverted"]
+_HistoryNodeState = Literal["base", "applied", "current", "reverted"]
+_JsonCompactMode = Union[bool, Literal["fast"]]
+"""False -> semi compact pretty json, True -> compact pretty json, "fast" -> not pretty, C encoder"""
 _SaveResponse = Literal['done', 'canceled']
 _ActivityColumn = Literal["name", "number of time used", "total cumulated duration"]
 _SubActionType = Literal['added', 'removed']
@@ -102,6 +106,16 @@ def datetimeToText(t:datetime)->str:
 def datetimeFromText(text:str)->datetime:
     return datetime.strptime(text, DATETIME_FORMAT)
 
+EPOCH: datetime = datetime(1970, 1, 1)
+"""the origin of the int64 microseconds times (naive local time, like all the datetimes)"""
+_MICROSECOND: timedelta = timedelta(microseconds=1)
+
+def datetimeToMicroseconds(t:datetime)->int:
+    return (t - EPOCH) // _MICROSECOND
+
+def microsecondsToDatetime(microseconds:int)->datetime:
+    return EPOCH + timedelta(microseconds=int(microseconds))
+
 def timedeltaFromText(text:str)->timedelta:
     m = PARSE_TIME_PATTERN.match(text)
     if m is None: raise ValueError(f"the deltatime text: {repr(text)} don't match the regex pattern: {PARSE_TIME_PATTERN.pattern}")